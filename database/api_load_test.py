@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+API Load Test
+-------------
+בדיקת עומס מקומית לשרת ה-API: מספר בקשות לשנייה וזמני תגובה
+
+ברירת המחדל מפעילה שרת בתוך התהליך מול בסיס הנתונים הראשי. עם --url
+הבדיקה רצה מול שרת שכבר פועל. --conditional שולח את ה-ETag שהתקבל
+בבקשה הקודמת לאותה כתובת, כמו דפדפן שמאמת מחדש את המטמון שלו.
+"""
+
+import os
+import time
+import argparse
+import threading
+import http.client
+from collections import Counter
+from urllib.parse import urlsplit
+
+# כתובות ברירת המחדל - העמוד הראשון, חיפוש, פאסטות ומכרז בודד
+DEFAULT_PATHS = (
+    '/api/tenders?limit=20',
+    '/api/tenders?status=%D7%A4%D7%AA%D7%95%D7%97&limit=20',
+    '/api/search?q=%D7%A0%D7%92%D7%A8%D7%95%D7%AA&limit=20',
+    '/api/facets',
+    '/api/tenders/1'
+)
+
+def _percentile(values, fraction):
+    """אחוזון מתוך רשימה ממוינת"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def run_load_test(base_url, paths=DEFAULT_PATHS, concurrency=8, duration=10.0, conditional=False, use_gzip=True):
+    """שליחת בקשות במקביל במשך duration שניות והחזרת סיכום
+    
+    כל thread פותח חיבור חדש לכל בקשה ועובר על הכתובות לפי הסדר. מחזיר מילון עם
+    מספר הבקשות, בקשות לשנייה, אחוזוני זמן התגובה במילישניות וספירה לפי קוד.
+    """
+    target = urlsplit(base_url)
+    deadline = time.perf_counter() + duration
+    latencies = []
+    statuses = Counter()
+    lock = threading.Lock()
+    
+    def worker(offset):
+        """לולאת הבקשות של thread אחד"""
+        etags = {}
+        local_latencies = []
+        local_statuses = Counter()
+        i = offset
+        while time.perf_counter() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            headers = {'Accept-Encoding': 'gzip'} if use_gzip else {}
+            if conditional and path in etags:
+                headers['If-None-Match'] = etags[path]
+            
+            started = time.perf_counter()
+            try:
+                conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                conn.close()
+            except OSError as e:
+                local_statuses[type(e).__name__] += 1
+                continue
+            local_latencies.append((time.perf_counter() - started) * 1000)
+            local_statuses[response.status] += 1
+            if response.getheader('ETag'):
+                etags[path] = response.getheader('ETag')
+        
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+    
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'seconds': round(elapsed, 2),
+        'requests_per_sec': round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(_percentile(latencies, 0.5), 2),
+        'p95_ms': round(_percentile(latencies, 0.95), 2),
+        'max_ms': round(latencies[-1], 2) if latencies else 0.0,
+        'statuses': {str(status): count for status, count in sorted(statuses.items(), key=str)}
+    }
+
+def main():
+    """הרצת בדיקת העומס והדפסת התוצאות"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description='בדיקת עומס לשרת ה-API של המכרזים')
+    parser.add_argument('--url', help='כתובת שרת פועל (ללא הפעלת שרת בתוך התהליך)')
+    parser.add_argument('--db', default=os.path.join(base_dir, 'database', 'tenders.db'))
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--conditional', action='store_true', help='שליחת If-None-Match עם ה-ETag האחרון')
+    parser.add_argument('--no-gzip', action='store_true')
+    parser.add_argument('paths', nargs='*', default=list(DEFAULT_PATHS))
+    args = parser.parse_args()
+    
+    server = None
+    base_url = args.url
+    if base_url is None:
+        from api_server import create_server
+        server = create_server(args.db, os.path.join(base_dir, 'database', 'schema.sql'), port=0, workers=args.concurrency)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    try:
+        report = run_load_test(
+            base_url, args.paths, concurrency=args.concurrency, duration=args.duration,
+            conditional=args.conditional, use_gzip=not args.no_gzip
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+    
+    print(f"{report['requests']} בקשות ב-{report['seconds']} שניות: {report['requests_per_sec']} בקשות לשנייה")
+    print(f"זמן תגובה: p50 {report['p50_ms']}ms | p95 {report['p95_ms']}ms | מקסימום {report['max_ms']}ms")
+    print(f"קודי תשובה: {report['statuses']}")
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tenders API Server
+------------------
+שרת HTTP מקומי שמגיש את נתוני המכרזים כ-JSON לאפליקציית ה-Next.js
+
+נקודות הקצה (GET בלבד):
+    /api/tenders            רשימה מסוננת עם דפדוף (cursor, limit ומסנני list_tenders)
+    /api/tenders/<id>       מכרז בודד עם הקטגוריות, אנשי הקשר והמסמכים שלו
+    /api/search?q=...       חיפוש מדורג עם snippet (category_id, status, limit, offset)
+    /api/facets             ספירות לפי מקור, סטטוס וקטגוריה (אותם מסננים כמו הרשימה)
+    /api/categories         כל הקטגוריות
+    /api/health             דור הנתונים וסטטיסטיקת המטמון
+
+כל תשובה מקבלת ETag חזק שנגזר מדור הנתונים, מהכתובת ומהקידוד, ולכן בקשה
+עם If-None-Match תואם נענית ב-304 בלי להריץ שאילתה. תשובות גדולות נדחסות ב-gzip.
+"""
+
+import os
+import sys
+import gzip
+import json
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from models import TenderModel, CategoryModel, FILTER_KEYS, initialize_database
+from query_cache import QueryCache, get_generation
+
+logger = logging.getLogger('api_server')
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# מספר ה-threads שמטפלים בבקשות - כל אחד מחזיק חיבור קבוע משלו לבסיס הנתונים
+DEFAULT_WORKERS = 8
+
+# גודל עמוד מרבי ברשימה ובחיפוש
+MAX_LIMIT = 100
+
+# תשובות קטנות מזה נשלחות ללא דחיסה
+GZIP_MIN_BYTES = 1024
+
+# מסננים שמקבלים כמה ערכים, ושמות הרבים של מסננים שחוזרים בכתובת יותר מפעם אחת
+PLURAL_FILTERS = {'category_id': 'category_ids', 'status': 'statuses', 'source': 'sources'}
+DATE_FILTERS = ('publish_from', 'publish_to', 'submission_from', 'submission_to')
+
+class APIError(Exception):
+    """שגיאה שמוחזרת ללקוח עם קוד HTTP"""
+    
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _int_param(params, name, default, maximum=None):
+    """פרמטר מספרי מהכתובת"""
+    value = params.get(name, [default])[-1]
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise APIError(400, f"ערך לא תקין לפרמטר {name}: {value}")
+    if value < 0:
+        raise APIError(400, f"ערך שלילי לפרמטר {name}")
+    return min(value, maximum) if maximum is not None else value
+
+def parse_filters(params, reserved=('cursor', 'limit')):
+    """המרת פרמטרי הכתובת למילון הסינון של TenderModel.list_tenders
+    
+    פרמטר שחוזר כמה פעמים (status=a&status=b) הופך לרשימה, מזהי קטגוריות
+    מומרים למספרים ותאריכים יכולים להינתן כטקסט או כחותמת זמן.
+    """
+    filters = {}
+    for key, values in params.items():
+        if key in reserved:
+            continue
+        if key not in FILTER_KEYS:
+            raise APIError(400, f"מסנן לא מוכר: {key}")
+        
+        if key in PLURAL_FILTERS.values():
+            filters.setdefault(key, []).extend(values)
+        elif key in PLURAL_FILTERS and len(values) > 1:
+            filters.setdefault(PLURAL_FILTERS[key], []).extend(values)
+        else:
+            filters[key] = values[-1]
+    
+    for key in ('category_id', 'category_ids'):
+        if key in filters:
+            try:
+                filters[key] = [int(value) for value in filters[key]] if key == 'category_ids' else int(filters[key])
+            except ValueError:
+                raise APIError(400, f"מזהה קטגוריה לא תקין: {filters[key]}")
+    for key in DATE_FILTERS:
+        if key in filters and filters[key].isdigit():
+            filters[key] = int(filters[key])
+    return filters
+
+class TendersAPI:
+    """נתיבי ה-API מעל המודלים - מחזיר את גוף התשובה כאובייקט Python"""
+    
+    def __init__(self, db):
+        """אתחול ה-API מול בסיס נתונים עם מטמון קריאה"""
+        self.db = db
+        self.db.enable_cache()
+        self.tender_model = TenderModel(db)
+        self.category_model = CategoryModel(db)
+    
+    def route(self, path, params):
+        """הפניית הבקשה לנתיב המתאים"""
+        parts = [part for part in path.split('/') if part]
+        if parts[:1] != ['api'] or len(parts) < 2:
+            raise APIError(404, f"נתיב לא קיים: {path}")
+        
+        resource, rest = parts[1], parts[2:]
+        if resource == 'tenders' and not rest:
+            return self.list_tenders(params)
+        if resource == 'tenders' and len(rest) == 1:
+            return self.get_tender(rest[0])
+        if resource == 'search' and not rest:
+            return self.search(params)
+        if resource == 'facets' and not rest:
+            return self.tender_model.facets(parse_filters(params, reserved=()))
+        if resource == 'categories' and not rest:
+            return {'items': self.category_model.get_all()}
+        if resource == 'health' and not rest:
+            return {'generation': get_generation(self.db), 'cache': self.db.cache.stats()}
+        raise APIError(404, f"נתיב לא קיים: {path}")
+    
+    def list_tenders(self, params):
+        """רשימת מכרזים מסוננת עם דפדוף לפי cursor"""
+        return self.tender_model.list_tenders(
+            parse_filters(params),
+            cursor=params.get('cursor', [None])[-1],
+            limit=_int_param(params, 'limit', 20, MAX_LIMIT)
+        )
+    
+    def get_tender(self, tender_id):
+        """מכרז בודד עם הרשומות הקשורות אליו (כולל מכרזים בארכיון, ללא הקשרים)"""
+        if not tender_id.isdigit():
+            raise APIError(404, f"מכרז לא קיים: {tender_id}")
+        
+        tenders = self.tender_model.get_many_with_relations([int(tender_id)])
+        if tenders:
+            return tenders[0]
+        
+        tender = self.tender_model.get_by_id(int(tender_id), include_archive=True)
+        if tender is None:
+            raise APIError(404, f"מכרז לא קיים: {tender_id}")
+        # התוצאה משותפת עם מטמון הקריאה ולכן מועתקת לפני ההשלמה
+        return dict(tender, categories=[], contacts=[], documents=[])
+    
+    def search(self, params):
+        """חיפוש מדורג"""
+        category_id = params.get('category_id', [None])[-1]
+        if category_id is not None and not category_id.isdigit():
+            raise APIError(400, f"מזהה קטגוריה לא תקין: {category_id}")
+        items = self.tender_model.search(
+            params.get('q', [''])[-1],
+            category_id=int(category_id) if category_id else None,
+            status=params.get('status', [None])[-1],
+            limit=_int_param(params, 'limit', 20, MAX_LIMIT),
+            offset=_int_param(params, 'offset', 0)
+        )
+        return {'items': items}
+
+class TendersRequestHandler(BaseHTTPRequestHandler):
+    """טיפול בבקשת HTTP אחת"""
+    
+    server_version = 'TendersAPI/1.0'
+    
+    def do_GET(self):
+        """בקשת GET - תשובה מהמטמון, 304 או תשובה חדשה"""
+        server = self.server
+        url = urlsplit(self.path)
+        use_gzip = 'gzip' in self.headers.get('Accept-Encoding', '')
+        etag = None
+        
+        try:
+            generation = get_generation(server.api.db)
+            # הדור נקרא כאן ממילא - מטמון הקריאה של המודלים מתעדכן בלי לחכות למרווח הבדיקה שלו
+            server.api.db.cache.observe_generation(generation)
+            url_hash = hashlib.sha1(self.path.encode('utf-8')).hexdigest()[:16]
+            etag = f'"{generation}-{url_hash}{"-gz" if use_gzip else ""}"'
+            
+            if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+                self._send(304, etag=etag)
+                return
+            
+            status, body, encoding = server.responses.get_or_compute(
+                (self.path, use_gzip), generation,
+                lambda: self._render(url, use_gzip)
+            )
+        except Exception as e:
+            logger.exception(f"שגיאה בטיפול בבקשה {self.path}: {e}")
+            status, body, encoding = 500, json.dumps({'error': 'שגיאה פנימית'}, ensure_ascii=False).encode('utf-8'), None
+        
+        self._send(status, body, etag=etag if status == 200 else None, encoding=encoding)
+    
+    def _render(self, url, use_gzip):
+        """חישוב התשובה: קוד, גוף (bytes) וקידוד"""
+        try:
+            status, payload = 200, self.server.api.route(url.path, parse_qs(url.query, keep_blank_values=False))
+        except APIError as e:
+            status, payload = e.status, {'error': str(e)}
+        except ValueError as e:
+            status, payload = 400, {'error': str(e)}
+        
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+        if use_gzip and len(body) >= GZIP_MIN_BYTES:
+            return status, gzip.compress(body, compresslevel=6), 'gzip'
+        return status, body, None
+    
+    def _send(self, status, body=b'', etag=None, encoding=None):
+        """שליחת התשובה עם הכותרות"""
+        self.send_response(status)
+        if status != 304:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if etag:
+            self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """רישום הבקשות ביומן במקום stderr"""
+        logger.debug(format % args)
+
+class TendersAPIServer(ThreadingHTTPServer):
+    """שרת HTTP שמטפל בבקשות במאגר threads קבוע
+    
+    המאגר הקבוע (במקום thread חדש לכל בקשה) שומר על חיבור SQLite פתוח אחד לכל
+    thread, והקוראים רצים במקביל בזכות מצב WAL.
+    """
+    
+    daemon_threads = True
+    
+    # תור החיבורים הממתינים - ברירת המחדל (5) גורמת לדחיית חיבורים תחת עומס
+    request_queue_size = 128
+    
+    def __init__(self, address, db, workers=DEFAULT_WORKERS, response_cache_size=512):
+        """אתחול השרת מול בסיס נתונים פתוח"""
+        super().__init__(address, TendersRequestHandler)
+        self.api = TendersAPI(db)
+        self.responses = QueryCache(max_entries=response_cache_size, ttl=None)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+    
+    def process_request(self, request, client_address):
+        """העברת הבקשה למאגר ה-threads"""
+        self.pool.submit(self.process_request_thread, request, client_address)
+    
+    def server_close(self):
+        """סגירת השרת, המאגר והחיבורים לבסיס הנתונים"""
+        super().server_close()
+        self.pool.shutdown(wait=True)
+        self.api.db.close_all()
+
+def create_server(db_path, schema_path, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS):
+    """יצירת שרת API מוכן להפעלה (port=0 לבחירת פורט פנוי)"""
+    db = initialize_database(db_path, schema_path)
+    return TendersAPIServer((host, port), db, workers=workers)
+
+def main():
+    """הפעלת שרת ה-API"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description='שרת JSON מקומי לנתוני המכרזים')
+    parser.add_argument('--db', default=os.path.join(base_dir, 'database', 'tenders.db'))
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = create_server(args.db, os.path.join(base_dir, 'database', 'schema.sql'), args.host, args.port, args.workers)
+    logger.info(f"שרת ה-API מאזין בכתובת http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tender Archive
+--------------
+העברת מכרזים סגורים או שמועד ההגשה שלהם עבר לטבלאות הארכיון,
+כך שהשאילתות הרגילות רצות רק על המכרזים הפעילים
+"""
+
+import os
+import time
+from tender_dates import now_timestamp
+from query_cache import bump_generation
+
+# טבלה פעילה, טבלת הארכיון המקבילה והעמודה שמקשרת למכרז
+ARCHIVE_TABLES = (
+    ('tenders', 'tenders_archive', 'id'),
+    ('tender_categories', 'tender_categories_archive', 'tender_id'),
+    ('contacts', 'contacts_archive', 'tender_id'),
+    ('documents', 'documents_archive', 'tender_id')
+)
+
+# סטטוסים של מכרז שהסתיים, בלי קשר למועד ההגשה
+CLOSED_STATUSES = ('סגור', 'בוטל', 'הסתיים')
+
+# מועד הגשה ללא שעה נשמר כחצות של אותו יום - הארכיון ממתין יום נוסף
+DEFAULT_GRACE_DAYS = 1
+
+# מספר המכרזים שמועברים בכל טרנזקציה
+DEFAULT_BATCH_SIZE = 1000
+
+def archive_cutoff(now=None, grace_days=DEFAULT_GRACE_DAYS):
+    """חותמת הזמן שמכרז שמועד ההגשה שלו קודם לה עובר לארכיון"""
+    return (now if now is not None else now_timestamp()) - grace_days * 86400
+
+def is_archivable(status, submission_ts, cutoff):
+    """האם מכרז שייך לארכיון לפי הסטטוס ומועד ההגשה שלו"""
+    return status in CLOSED_STATUSES or 0 < (submission_ts or 0) < cutoff
+
+def move_tenders(db, tender_ids, to_archive=True):
+    """העברת מכרזים והרשומות הקשורות אליהם בין הטבלאות הפעילות לארכיון
+    
+    המכרזים שומרים על המזהים שלהם. יש לקרוא לפונקציה בתוך db.transaction().
+    to_archive=False מחזיר מכרזים מהארכיון לטבלאות הפעילות.
+    """
+    tables = [(hot, archive, key) if to_archive else (archive, hot, key) for hot, archive, key in ARCHIVE_TABLES]
+    
+    # בכיוון החזרה המכרז נכתב לפני הקשרים שלו, ובכיוון הארכיון נמחק אחריהם
+    copy_order = tables
+    delete_order = tables[1:] + tables[:1]
+    
+    ids = list(dict.fromkeys(tender_ids))
+    for start in range(0, len(ids), DEFAULT_BATCH_SIZE):
+        chunk = ids[start:start + DEFAULT_BATCH_SIZE]
+        placeholders = ', '.join('?' * len(chunk))
+        
+        for source, target, key in copy_order:
+            columns = ', '.join(row['name'] for row in db.execute(f"PRAGMA table_info({source})"))
+            db.execute(
+                f"INSERT INTO {target} ({columns}) SELECT {columns} FROM {source} WHERE {key} IN ({placeholders})",
+                chunk
+            )
+        
+        for source, _, key in delete_order:
+            db.execute(f"DELETE FROM {source} WHERE {key} IN ({placeholders})", chunk)
+    
+    if ids:
+        bump_generation(db)
+
+def archive_expired(db, now=None, grace_days=DEFAULT_GRACE_DAYS, batch_size=DEFAULT_BATCH_SIZE):
+    """העברת כל המכרזים הסגורים או שפג מועד הגשתם לארכיון
+    
+    כל אצווה נכתבת בטרנזקציה נפרדת כדי לא לחסום קוראים לאורך כל הריצה.
+    מחזיר דוח עם גודל הטבלה הפעילה לפני ואחרי, מספר המכרזים שהועברו,
+    גודל הארכיון ומשך הריצה בשניות.
+    """
+    started = time.perf_counter()
+    cutoff = archive_cutoff(now, grace_days)
+    status_placeholders = ', '.join('?' * len(CLOSED_STATUSES))
+    hot_before = db.execute("SELECT COUNT(*) FROM tenders")[0][0]
+    
+    archived = 0
+    while True:
+        with db.transaction(immediate=True):
+            ids = [row['id'] for row in db.execute(
+                f"""
+                SELECT id FROM tenders
+                WHERE (submission_ts > 0 AND submission_ts < ?) OR status IN ({status_placeholders})
+                LIMIT ?
+                """,
+                (cutoff, *CLOSED_STATUSES, batch_size)
+            )]
+            if ids:
+                move_tenders(db, ids)
+        if not ids:
+            break
+        archived += len(ids)
+    
+    return {
+        'hot_before': hot_before,
+        'hot_after': db.execute("SELECT COUNT(*) FROM tenders")[0][0],
+        'archived': archived,
+        'archive_total': db.execute("SELECT COUNT(*) FROM tenders_archive")[0][0],
+        'seconds': time.perf_counter() - started
+    }
+
+def main():
+    """הרצת העברה לארכיון על בסיס הנתונים הראשי"""
+    from models import initialize_database
+    
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    db_path = os.path.join(base_dir, 'database', 'tenders.db')
+    schema_path = os.path.join(base_dir, 'database', 'schema.sql')
+    
+    db = initialize_database(db_path, schema_path)
+    report = archive_expired(db)
+    print(
+        f"הועברו לארכיון {report['archived']} מכרזים ב-{report['seconds']:.2f} שניות. "
+        f"מכרזים פעילים: {report['hot_before']} -> {report['hot_after']}, "
+        f"סה\"כ בארכיון: {report['archive_total']}"
+    )
+    db.close_all()
+    return report
+
+if __name__ == "__main__":
+    main()
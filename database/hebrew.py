@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Hebrew Text Normalization
+-------------------------
+נרמול טקסט עברי לאינדקס החיפוש המלא (FTS5) של המכרזים
+"""
+
+import re
+from functools import lru_cache
+
+# ניקוד וטעמי המקרא (U+0591-U+05C7, ללא סימני הפיסוק מקף, פסק וסוף פסוק)
+NIQQUD = [
+    cp for cp in range(0x0591, 0x05C8)
+    if chr(cp) not in '\u05BE\u05C0\u05C3\u05C6'
+]
+
+# הסרת ניקוד בלבד
+STRIP_NIQQUD = dict.fromkeys(NIQQUD)
+
+# הסרת ניקוד והמרת אותיות סופיות למקבילותיהן הרגילות - במעבר אחד
+NORMALIZE = {**STRIP_NIQQUD, **str.maketrans('ךםןףץ', 'כמנפצ')}
+
+# אותיות שימוש שנצמדות לתחילת מילה (ו, ה, ב, ל, מ, ש, כ)
+PREFIX_LETTERS = frozenset('והבלמשכ')
+
+# מספר אותיות השימוש המרבי שמוסרות מתחילת מילה
+MAX_PREFIX_LENGTH = 3
+
+# אורך מינימלי למילה שנותרת לאחר הסרת אותיות שימוש
+MIN_STEM_LENGTH = 3
+
+# מילה - אותיות, ספרות וסימני ניקוד שבתוכה
+WORD_RE = re.compile(r'(?:\w|[\u0591-\u05BD\u05BF\u05C1\u05C2\u05C4\u05C5\u05C7])+')
+
+def strip_niqqud(text):
+    """הסרת ניקוד וטעמים מהטקסט"""
+    return text.translate(STRIP_NIQQUD)
+
+def normalize_word(word):
+    """נרמול מילה בודדת: הסרת ניקוד, אותיות קטנות והמרת אותיות סופיות"""
+    return word.lower().translate(NORMALIZE)
+
+@lru_cache(maxsize=65536)
+def word_variants(word):
+    """המילה המנורמלת וגרסאותיה ללא אותיות שימוש בתחילתה
+    
+    לדוגמה: "ולבית" -> ("ולבית", "לבית", "בית")
+    """
+    variants = [word]
+    for length in range(1, MAX_PREFIX_LENGTH + 1):
+        if word[length - 1] not in PREFIX_LETTERS or len(word) - length < MIN_STEM_LENGTH:
+            break
+        variants.append(word[length:])
+    return tuple(variants)
+
+def tokenize(text):
+    """פירוק טקסט למילים מנורמלות"""
+    if not text:
+        return []
+    return WORD_RE.findall(text.lower().translate(NORMALIZE))
+
+def index_text(text):
+    """הטקסט שנכתב לאינדקס החיפוש - כל מילה וגרסאותיה ללא אותיות שימוש"""
+    return ' '.join(variant for word in tokenize(text) for variant in word_variants(word))
+
+def build_match_query(keyword):
+    """בניית ביטוי MATCH של FTS5 ממחרוזת חיפוש חופשית
+    
+    כל מילה בחיפוש הופכת לקבוצת חלופות (המילה וגרסאותיה ללא אותיות שימוש)
+    עם התאמת תחילית, וכל הקבוצות חייבות להתקיים. מחזיר None אם אין מילים.
+    """
+    groups = []
+    for word in tokenize(keyword):
+        alternatives = ' OR '.join(f'"{variant}"*' for variant in word_variants(word))
+        groups.append(f"({alternatives})")
+    return ' AND '.join(groups) if groups else None
+
+def make_snippet(text, keyword, context_words=12, start_mark='<mark>', end_mark='</mark>'):
+    """קטע מהטקסט המקורי סביב ההתאמה הראשונה, עם סימון המילים שהותאמו
+    
+    מחזיר None כאשר יש מילות חיפוש ואף אחת מהן לא נמצאה בטקסט.
+    """
+    if not text:
+        return ''
+    
+    terms = [variant for word in tokenize(keyword) for variant in word_variants(word)]
+    words = WORD_RE.findall(text)
+    if not words:
+        return ''
+    
+    def matches(word):
+        return any(
+            variant.startswith(term)
+            for variant in word_variants(normalize_word(word))
+            for term in terms
+        )
+    
+    hits = {i for i, word in enumerate(words) if matches(word)}
+    if terms and not hits:
+        return None
+    first = min(hits) if hits else 0
+    start = max(0, first - context_words // 2)
+    end = min(len(words), start + context_words)
+    
+    parts = [f"{start_mark}{word}{end_mark}" if i in hits else word for i, word in enumerate(words[start:end], start)]
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if end < len(words) else ''
+    return prefix + ' '.join(parts) + suffix
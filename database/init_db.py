@@ -11,6 +11,11 @@ import os
 import sys
 import json
 from models import Database, initialize_database, import_tenders_from_json
+from query_stats import QueryStats
+from near_duplicates import SignatureStore
+
+# משתנה סביבה להפעלת מדידת השאילתות - ערכו הוא סף השאילתה האיטית במילישניות
+QUERY_STATS_ENV = 'TENDERS_QUERY_STATS'
 
 def main():
     """פונקציה ראשית לאתחול בסיס הנתונים"""
@@ -19,9 +24,14 @@ def main():
     db_path = os.path.join(base_dir, 'database', 'tenders.db')
     schema_path = os.path.join(base_dir, 'database', 'schema.sql')
     
+    # מדידת שאילתות (אופציונלי)
+    stats = None
+    if os.environ.get(QUERY_STATS_ENV):
+        stats = QueryStats(slow_query_ms=float(os.environ[QUERY_STATS_ENV]))
+    
     # אתחול בסיס הנתונים
     print(f"מאתחל בסיס נתונים בנתיב: {db_path}")
-    db = initialize_database(db_path, schema_path)
+    db = initialize_database(db_path, schema_path, stats=stats)
     
     # בדיקה אם יש קובץ JSON לייבוא
     data_dir = os.path.join(base_dir, 'data')
@@ -44,6 +54,19 @@ def main():
     else:
         print("לא נמצאו קבצי JSON לייבוא. הרץ את סקריפט איסוף הנתונים תחילה.")
     
+    # חתימות לזיהוי כפילויות בין מקורות למכרזים חדשים או שהשתנו
+    signed = SignatureStore(db).index_pending()
+    if signed:
+        print(f"חושבו חתימות כפילויות ל-{signed} מכרזים")
+    
+    # סיכום זמני השאילתות של הריצה
+    if stats is not None:
+        stats_path = os.path.join(data_dir, 'query_stats.json')
+        os.makedirs(data_dir, exist_ok=True)
+        stats.dump(stats_path)
+        print(stats.format_summary())
+        print(f"סטטיסטיקת השאילתות נשמרה בקובץ: {stats_path}")
+    
     print("אתחול בסיס הנתונים הושלם בהצלחה!")
 
 if __name__ == "__main__":
@@ -0,0 +1,2 @@
+-- Content hash of the scraped fields, used to skip unchanged tenders on re-import
+ALTER TABLE tenders ADD COLUMN content_hash TEXT;
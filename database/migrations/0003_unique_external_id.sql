@@ -0,0 +1,16 @@
+-- One row per (source, external_id) so re-imports update in place
+
+-- Legacy rows without a source id are keyed by their URL
+UPDATE tenders SET external_id = url
+WHERE COALESCE(external_id, '') IN ('', 'לא צוין') AND COALESCE(url, '') != '';
+
+-- Drop duplicates left by earlier re-imports before adding the unique key
+DELETE FROM tenders WHERE COALESCE(external_id, '') != '' AND id NOT IN (
+    SELECT MAX(id) FROM tenders GROUP BY source, external_id
+);
+DELETE FROM tender_categories WHERE tender_id NOT IN (SELECT id FROM tenders);
+DELETE FROM contacts WHERE tender_id NOT IN (SELECT id FROM tenders);
+DELETE FROM documents WHERE tender_id NOT IN (SELECT id FROM tenders);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tenders_source_external_id
+ON tenders(source, external_id) WHERE external_id != '';
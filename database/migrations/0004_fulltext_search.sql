@@ -0,0 +1,29 @@
+-- Hebrew-normalized full-text index, kept in sync with tenders by triggers
+-- d1: skip (the triggers call the hebrew_index() function registered by models.Database)
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tenders_fts USING fts5(
+    title, description, publisher,
+    content = '', tokenize = 'unicode61 remove_diacritics 0'
+);
+
+CREATE TRIGGER IF NOT EXISTS tenders_fts_insert AFTER INSERT ON tenders BEGIN
+    INSERT INTO tenders_fts (rowid, title, description, publisher)
+    VALUES (new.id, hebrew_index(new.title), hebrew_index(new.description), hebrew_index(new.publisher));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tenders_fts_delete AFTER DELETE ON tenders BEGIN
+    INSERT INTO tenders_fts (tenders_fts, rowid, title, description, publisher)
+    VALUES ('delete', old.id, hebrew_index(old.title), hebrew_index(old.description), hebrew_index(old.publisher));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tenders_fts_update AFTER UPDATE OF title, description, publisher ON tenders BEGIN
+    INSERT INTO tenders_fts (tenders_fts, rowid, title, description, publisher)
+    VALUES ('delete', old.id, hebrew_index(old.title), hebrew_index(old.description), hebrew_index(old.publisher));
+    INSERT INTO tenders_fts (rowid, title, description, publisher)
+    VALUES (new.id, hebrew_index(new.title), hebrew_index(new.description), hebrew_index(new.publisher));
+END;
+
+-- Index the tenders that already exist
+INSERT INTO tenders_fts (rowid, title, description, publisher)
+SELECT id, hebrew_index(title), hebrew_index(description), hebrew_index(publisher) FROM tenders
+WHERE id NOT IN (SELECT rowid FROM tenders_fts);
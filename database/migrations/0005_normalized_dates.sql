@@ -0,0 +1,12 @@
+-- Publish/submission dates as epoch timestamps (0 = unknown) for indexed sorting and range queries
+ALTER TABLE tenders ADD COLUMN publish_ts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE tenders ADD COLUMN submission_ts INTEGER NOT NULL DEFAULT 0;
+
+-- The text date columns are no longer sorted or filtered on
+DROP INDEX IF EXISTS idx_tenders_publish_date_id;
+DROP INDEX IF EXISTS idx_tenders_publish_date;
+DROP INDEX IF EXISTS idx_tenders_submission_date;
+
+-- Composite index for cursor pagination and an index for deadline ranges
+CREATE INDEX IF NOT EXISTS idx_tenders_publish_ts_id ON tenders(publish_ts, id);
+CREATE INDEX IF NOT EXISTS idx_tenders_submission_ts ON tenders(submission_ts);
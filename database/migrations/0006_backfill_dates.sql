@@ -0,0 +1,6 @@
+-- Fill the timestamp columns for tenders imported before 0005
+-- d1: skip (uses the parse_tender_date() function registered by models.Database)
+UPDATE tenders SET
+    publish_ts = COALESCE(parse_tender_date(publish_date), 0),
+    submission_ts = COALESCE(parse_tender_date(submission_date), 0)
+WHERE publish_ts = 0 AND submission_ts = 0;
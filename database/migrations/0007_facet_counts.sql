@@ -0,0 +1,57 @@
+-- Materialized tender counts per source, status and category for facet sidebars.
+-- Kept up to date by the triggers below, so reading the unfiltered facets never scans tenders.
+CREATE TABLE IF NOT EXISTS tender_facets (
+    facet TEXT NOT NULL,              -- 'source', 'status' or 'category'
+    value TEXT NOT NULL,              -- Source / status text, or the category id
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (facet, value)
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS tender_facets_insert AFTER INSERT ON tenders BEGIN
+    INSERT INTO tender_facets (facet, value, count) VALUES ('source', new.source, 1)
+    ON CONFLICT (facet, value) DO UPDATE SET count = count + 1;
+    INSERT INTO tender_facets (facet, value, count) VALUES ('status', COALESCE(new.status, ''), 1)
+    ON CONFLICT (facet, value) DO UPDATE SET count = count + 1;
+END;
+
+-- Deleting a tender also removes its category links (foreign keys are not enforced),
+-- which in turn decrements the category counts
+CREATE TRIGGER IF NOT EXISTS tender_facets_delete AFTER DELETE ON tenders BEGIN
+    UPDATE tender_facets SET count = count - 1
+    WHERE (facet = 'source' AND value = old.source) OR (facet = 'status' AND value = COALESCE(old.status, ''));
+    DELETE FROM tender_facets WHERE facet IN ('source', 'status') AND count <= 0;
+    DELETE FROM tender_categories WHERE tender_id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tender_facets_update AFTER UPDATE OF source, status ON tenders
+WHEN old.source IS NOT new.source OR COALESCE(old.status, '') != COALESCE(new.status, '') BEGIN
+    UPDATE tender_facets SET count = count - 1
+    WHERE (facet = 'source' AND value = old.source) OR (facet = 'status' AND value = COALESCE(old.status, ''));
+    INSERT INTO tender_facets (facet, value, count) VALUES ('source', new.source, 1)
+    ON CONFLICT (facet, value) DO UPDATE SET count = count + 1;
+    INSERT INTO tender_facets (facet, value, count) VALUES ('status', COALESCE(new.status, ''), 1)
+    ON CONFLICT (facet, value) DO UPDATE SET count = count + 1;
+    DELETE FROM tender_facets WHERE facet IN ('source', 'status') AND count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tender_facets_category_insert AFTER INSERT ON tender_categories BEGIN
+    INSERT INTO tender_facets (facet, value, count) VALUES ('category', new.category_id, 1)
+    ON CONFLICT (facet, value) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tender_facets_category_delete AFTER DELETE ON tender_categories BEGIN
+    UPDATE tender_facets SET count = count - 1 WHERE facet = 'category' AND value = CAST(old.category_id AS TEXT);
+    DELETE FROM tender_facets WHERE facet = 'category' AND value = CAST(old.category_id AS TEXT) AND count <= 0;
+END;
+
+-- Category links of tenders that no longer exist
+DELETE FROM tender_categories WHERE tender_id NOT IN (SELECT id FROM tenders);
+
+-- Initial counts for the existing tenders
+DELETE FROM tender_facets;
+INSERT INTO tender_facets (facet, value, count)
+SELECT 'source', source, COUNT(*) FROM tenders GROUP BY source;
+INSERT INTO tender_facets (facet, value, count)
+SELECT 'status', COALESCE(status, ''), COUNT(*) FROM tenders GROUP BY COALESCE(status, '');
+INSERT INTO tender_facets (facet, value, count)
+SELECT 'category', category_id, COUNT(*) FROM tender_categories GROUP BY category_id;
@@ -0,0 +1,12 @@
+-- Composite indexes for filtered listings ordered by (publish_ts, id):
+-- an equality filter seeks to its value and walks the rest of the index in listing order
+CREATE INDEX IF NOT EXISTS idx_tenders_source_publish_ts ON tenders(source, publish_ts, id);
+CREATE INDEX IF NOT EXISTS idx_tenders_status_publish_ts ON tenders(status, publish_ts, id);
+CREATE INDEX IF NOT EXISTS idx_tenders_publisher_publish_ts ON tenders(publisher, publish_ts, id);
+
+-- Category filters start from the category side
+CREATE INDEX IF NOT EXISTS idx_tender_categories_category ON tender_categories(category_id, tender_id);
+
+-- Covered by the composite indexes above
+DROP INDEX IF EXISTS idx_tenders_source;
+DROP INDEX IF EXISTS idx_tenders_status;
@@ -0,0 +1,69 @@
+-- Archive for closed and expired tenders (see database/archive.py).
+-- d1: skip (local hot/archive split; the archive search triggers call hebrew_index())
+--
+-- tenders_archive mirrors tenders column for column and in the same order, so listings can
+-- UNION ALL both tables; a migration that adds a column to tenders must add it here as well.
+-- Ids are never reused (tenders is AUTOINCREMENT), so a tender keeps its id when it moves.
+CREATE TABLE IF NOT EXISTS tenders_archive (
+    id INTEGER PRIMARY KEY,
+    external_id TEXT,
+    title TEXT NOT NULL,
+    description TEXT,
+    publisher TEXT NOT NULL,
+    publish_date TEXT,
+    submission_date TEXT,
+    status TEXT,
+    url TEXT,
+    source TEXT NOT NULL,
+    created_at TIMESTAMP,
+    updated_at TIMESTAMP,
+    content_hash TEXT,
+    publish_ts INTEGER NOT NULL DEFAULT 0,
+    submission_ts INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS tender_categories_archive (
+    tender_id INTEGER,
+    category_id INTEGER,
+    PRIMARY KEY (tender_id, category_id)
+);
+
+CREATE TABLE IF NOT EXISTS contacts_archive (
+    id INTEGER PRIMARY KEY,
+    tender_id INTEGER NOT NULL,
+    name TEXT,
+    email TEXT,
+    phone TEXT,
+    created_at TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS documents_archive (
+    id INTEGER PRIMARY KEY,
+    tender_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    url TEXT,
+    created_at TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_tenders_archive_source_external_id
+ON tenders_archive(source, external_id) WHERE external_id != '';
+CREATE INDEX IF NOT EXISTS idx_tenders_archive_publish_ts_id ON tenders_archive(publish_ts, id);
+CREATE INDEX IF NOT EXISTS idx_tender_categories_archive_category ON tender_categories_archive(category_id, tender_id);
+CREATE INDEX IF NOT EXISTS idx_contacts_archive_tender_id ON contacts_archive(tender_id);
+CREATE INDEX IF NOT EXISTS idx_documents_archive_tender_id ON documents_archive(tender_id);
+
+-- Full-text index of the archive, only queried when a listing opts in to the archive
+CREATE VIRTUAL TABLE IF NOT EXISTS tenders_archive_fts USING fts5(
+    title, description, publisher,
+    content = '', tokenize = 'unicode61 remove_diacritics 0'
+);
+
+CREATE TRIGGER IF NOT EXISTS tenders_archive_fts_insert AFTER INSERT ON tenders_archive BEGIN
+    INSERT INTO tenders_archive_fts (rowid, title, description, publisher)
+    VALUES (new.id, hebrew_index(new.title), hebrew_index(new.description), hebrew_index(new.publisher));
+END;
+
+CREATE TRIGGER IF NOT EXISTS tenders_archive_fts_delete AFTER DELETE ON tenders_archive BEGIN
+    INSERT INTO tenders_archive_fts (tenders_archive_fts, rowid, title, description, publisher)
+    VALUES ('delete', old.id, hebrew_index(old.title), hebrew_index(old.description), hebrew_index(old.publisher));
+END;
@@ -0,0 +1,8 @@
+-- Application-level counters. data_generation is bumped by every write to the tender
+-- data, so in-memory read caches can tell when their results are stale.
+CREATE TABLE IF NOT EXISTS app_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO app_meta (key, value) VALUES ('data_generation', 0);
@@ -0,0 +1,19 @@
+-- MinHash signatures and LSH band buckets for cross-source near-duplicate detection
+-- (see near_duplicates.py). content_hash records which version of the tender the
+-- signature was computed from, so only new or changed tenders are re-signed.
+-- d1: skip (signatures are computed and matched locally by the ingest pipeline)
+CREATE TABLE IF NOT EXISTS tender_signatures (
+    tender_id INTEGER PRIMARY KEY,
+    content_hash TEXT,
+    publisher_key TEXT,               -- normalized publisher (blocking key)
+    deadline_day INTEGER,             -- submission_ts / 86400 (blocking key)
+    signature BLOB                    -- NULL when the title has no usable words
+);
+
+-- One row per LSH band of each signature. Bucket keys are derived from the signature,
+-- so stale rows are deleted through the primary key without a tender_id index.
+CREATE TABLE IF NOT EXISTS tender_lsh_buckets (
+    bucket INTEGER NOT NULL,
+    tender_id INTEGER NOT NULL,
+    PRIMARY KEY (bucket, tender_id)
+) WITHOUT ROWID;
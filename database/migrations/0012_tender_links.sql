@@ -0,0 +1,13 @@
+-- Tenders from another source that were merged into a stored tender at import time
+-- (see models.link_near_duplicates). A later import of the same (source, external_id)
+-- goes straight to the linked tender, and find_similar never links a second tender
+-- of a source that is already linked to a stored tender.
+-- d1: skip (duplicates are linked locally by the ingest pipeline)
+CREATE TABLE IF NOT EXISTS tender_links (
+    source TEXT NOT NULL,
+    external_id TEXT NOT NULL,
+    tender_id INTEGER NOT NULL,
+    PRIMARY KEY (source, external_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_tender_links_tender ON tender_links(tender_id);
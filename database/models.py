@@ -10,27 +10,182 @@ Database Models
 import os
 import sqlite3
 import json
+import time
+import base64
+import hashlib
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from hebrew import index_text, build_match_query, make_snippet
+from tender_dates import parse_tender_date, now_timestamp
+from query_stats import QueryStats
+from query_cache import QueryCache, cached_read, bump_generation
+from schema_migrations import migrate
+from archive import move_tenders, is_archivable, archive_cutoff
+from tender_record import Tender, read_json, as_tender, merge_tenders, PLACEHOLDER_VALUES
+from near_duplicates import SignatureStore, IN_CLAUSE_CHUNK
 
 class Database:
-    """מחלקה לניהול החיבור לבסיס הנתונים"""
+    """מחלקה לניהול החיבור לבסיס הנתונים
     
-    def __init__(self, db_path):
-        """אתחול החיבור לבסיס הנתונים"""
+    במצב ברירת המחדל כל קריאה פותחת חיבור וסוגרת אותו בסיומה.
+    במצב persistent נשמר חיבור פתוח אחד לכל thread, והמודלים משתמשים בו שוב ושוב.
+    """
+    
+    def __init__(self, db_path, persistent=False, journal_mode='WAL', synchronous='NORMAL', busy_timeout=5000, stats=None, cache=None):
+        """אתחול החיבור לבסיס הנתונים
+        
+        persistent - שימוש חוזר בחיבור אחד לכל thread במקום חיבור חדש לכל שאילתה
+        journal_mode - מצב היומן (WAL מאפשר קוראים במקביל לכותב), None להשארת ברירת המחדל
+        synchronous - רמת הסנכרון לדיסק (OFF / NORMAL / FULL), None להשארת ברירת המחדל
+        busy_timeout - זמן המתנה במילישניות לשחרור נעילה לפני כישלון
+        stats - אובייקט QueryStats לאיסוף זמני הריצה של השאילתות (None לביטול המדידה)
+        cache - אובייקט QueryCache לשמירת תוצאות הקריאה של המודלים (None לביטול המטמון)
+        """
         self.db_path = db_path
-        self.connection = None
+        self.persistent = persistent
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.busy_timeout = busy_timeout
+        
+        # חיבור ועומק טרנזקציה נשמרים לכל thread בנפרד
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        
+        # מונה השאילתות שנשלחו לבסיס הנתונים (לבדיקת מספר הקריאות לפעולה)
+        self.query_count = 0
+        
+        # פונקציות שנקראות כאשר טרנזקציה או SAVEPOINT מבוטלים (לניקוי מטמונים)
+        self.rollback_hooks = []
+        
+        # מדידת זמני השאילתות - פעילה רק כאשר הועבר אובייקט QueryStats
+        self.stats = stats
         
+        # מטמון תוצאות הקריאה - פעיל רק כאשר הועבר אובייקט QueryCache
+        self.cache = cache
+    
+    def enable_stats(self, slow_query_ms=100, explain_slow=True):
+        """הפעלת מדידת זמני השאילתות והחזרת אובייקט הסטטיסטיקה"""
+        if self.stats is None:
+            self.stats = QueryStats(slow_query_ms=slow_query_ms, explain_slow=explain_slow)
+        return self.stats
+    
+    def enable_cache(self, max_entries=256, ttl=300, recheck_interval=1.0):
+        """הפעלת מטמון תוצאות הקריאה והחזרת אובייקט המטמון"""
+        if self.cache is None:
+            self.cache = QueryCache(max_entries=max_entries, ttl=ttl, recheck_interval=recheck_interval)
+        return self.cache
+    
+    @property
+    def connection(self):
+        """החיבור הפתוח של ה-thread הנוכחי (או None)"""
+        return getattr(self._local, 'connection', None)
+    
+    @property
+    def in_transaction(self):
+        """האם ה-thread הנוכחי נמצא בתוך טרנזקציה תחומה"""
+        return getattr(self._local, 'depth', 0) > 0
+    
     def connect(self):
-        """יצירת חיבור לבסיס הנתונים"""
-        self.connection = sqlite3.connect(self.db_path)
-        self.connection.row_factory = sqlite3.Row
-        return self.connection
+        """יצירת חיבור לבסיס הנתונים (או החזרת החיבור הפתוח של ה-thread)"""
+        conn = self.connection
+        if conn is not None:
+            return conn
+        
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout / 1000, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        self._configure(conn)
+        
+        self._local.connection = conn
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+    
+    def _configure(self, conn):
+        """החלת הגדרות PRAGMA ורישום פונקציות SQL על חיבור חדש"""
+        # נרמול עברית לאינדקס החיפוש - נקרא מהטריגרים של tenders_fts
+        conn.create_function('hebrew_index', 1, index_text, deterministic=True)
+        # המרת תאריך טקסטואלי לחותמת זמן - משמש למילוי עמודות התאריך הקיימות
+        conn.create_function('parse_tender_date', 1, parse_tender_date, deterministic=True)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout)}")
+        if self.journal_mode:
+            conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        if self.synchronous:
+            conn.execute(f"PRAGMA synchronous = {self.synchronous}")
     
     def close(self):
-        """סגירת החיבור לבסיס הנתונים"""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
+        """סגירת החיבור לבסיס הנתונים
+        
+        במצב persistent, בתוך טרנזקציה או כל עוד iter_query פעיל, החיבור נשאר פתוח.
+        """
+        conn = self.connection
+        if conn is None or self.persistent or self.in_transaction or getattr(self._local, 'iterators', 0):
+            return
+        self._release(conn)
+    
+    def close_all(self):
+        """סגירת כל החיבורים הפתוחים של כל ה-threads"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+    
+    def _release(self, conn):
+        """סגירת חיבור והסרתו מרשימת החיבורים הפתוחים"""
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+        self._local.connection = None
+    
+    @contextmanager
+    def transaction(self, immediate=False):
+        """טרנזקציה תחומה שמשותפת לכל קריאות המודלים בתוכה
+        
+        כל השאילתות בתוך הבלוק רצות על אותו חיבור ונשמרות ב-commit אחד בסיומו,
+        או מבוטלות כולן אם נזרקה חריגה. טרנזקציות מקוננות ממומשות כ-SAVEPOINT.
+        immediate - נעילת כתיבה כבר בתחילת הטרנזקציה (BEGIN IMMEDIATE)
+        """
+        conn = self.connect()
+        depth = getattr(self._local, 'depth', 0)
+        savepoint = f"sp_{depth}"
+        
+        if depth == 0:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+        else:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        self._local.depth = depth + 1
+        
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                conn.rollback()
+                self.close()
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            # גם SAVEPOINT שבוטל מוחק שורות שכבר נכנסו למטמונים, גם אם הטרנזקציה החיצונית ממשיכה
+            for hook in list(self.rollback_hooks):
+                hook()
+            raise
+        
+        self._local.depth = depth
+        if depth == 0:
+            conn.commit()
+            self.close()
+        else:
+            conn.execute(f"RELEASE {savepoint}")
+    
+    def _commit(self, conn):
+        """commit רק כאשר לא נמצאים בתוך טרנזקציה תחומה"""
+        if not self.in_transaction:
+            conn.commit()
     
     def execute_script(self, script_path):
         """הרצת סקריפט SQL"""
@@ -42,24 +197,226 @@ class Database:
     
     def execute(self, query, params=None):
         """הרצת שאילתת SQL"""
+        self.query_count += 1
         conn = self.connect()
         cursor = conn.cursor()
+        started = time.perf_counter() if self.stats else None
         if params:
             cursor.execute(query, params)
         else:
             cursor.execute(query)
-        conn.commit()
         result = cursor.fetchall()
+        if started is not None:
+            rows = len(result) if cursor.description else cursor.rowcount
+            self.stats.record(query, time.perf_counter() - started, rows, conn, params)
+        self._commit(conn)
         self.close()
         return result
     
+    def iter_query(self, query, params=None, batch=500):
+        """הרצת שאילתה והחזרת השורות בזו אחר זו, בלי לטעון את כל התוצאה לזיכרון
+        
+        השורות נשלפות מה-cursor במנות של batch שורות (fetchmany), כך שמעבר על
+        טבלה שלמה רץ בזיכרון קבוע. החיבור נשאר פתוח עד שהמעבר מסתיים או נעצר,
+        וניתן להריץ שאילתות אחרות באותו thread בזמן המעבר.
+        """
+        self.query_count += 1
+        conn = self.connect()
+        self._local.iterators = getattr(self._local, 'iterators', 0) + 1
+        elapsed = 0.0
+        rows = 0
+        try:
+            started = time.perf_counter()
+            cursor = conn.execute(query, params or ())
+            elapsed += time.perf_counter() - started
+            while True:
+                started = time.perf_counter()
+                chunk = cursor.fetchmany(batch)
+                elapsed += time.perf_counter() - started
+                if not chunk:
+                    break
+                rows += len(chunk)
+                yield from chunk
+            cursor.close()
+        finally:
+            self._local.iterators -= 1
+            # רק זמן השליפה נמדד, ללא זמן העיבוד של הצרכן
+            if self.stats:
+                self.stats.record(query, elapsed, rows, conn, params)
+            self.close()
+    
     def execute_many(self, query, params_list):
         """הרצת שאילתת SQL עם מספר סטים של פרמטרים"""
+        self.query_count += 1
         conn = self.connect()
         cursor = conn.cursor()
+        started = time.perf_counter() if self.stats else None
         cursor.executemany(query, params_list)
-        conn.commit()
+        if started is not None:
+            # תוכנית הביצוע של שאילתה איטית נבדקת עם סט הפרמטרים הראשון
+            first_params = params_list[0] if isinstance(params_list, (list, tuple)) and params_list else None
+            self.stats.record(query, time.perf_counter() - started, cursor.rowcount, conn, first_params)
+        self._commit(conn)
+        self.close()
+    
+    def insert(self, query, params):
+        """הרצת שאילתת INSERT והחזרת מזהה השורה החדשה"""
+        self.query_count += 1
+        conn = self.connect()
+        cursor = conn.cursor()
+        started = time.perf_counter() if self.stats else None
+        cursor.execute(query, params)
+        if started is not None:
+            self.stats.record(query, time.perf_counter() - started, cursor.rowcount, conn, params)
+        row_id = cursor.lastrowid
+        self._commit(conn)
         self.close()
+        return row_id
+
+# עמודות המכרז שנכתבות מנתוני הסורקים, בסדר הכתיבה לטבלה.
+# publish_ts ו-submission_ts מחושבים מהתאריכים הטקסטואליים (0 כאשר לא זוהה תאריך)
+TENDER_COLUMNS = (
+    'external_id', 'title', 'description', 'publisher',
+    'publish_date', 'submission_date', 'status', 'url', 'source',
+    'publish_ts', 'submission_ts'
+)
+
+# מיקום הסטטוס ומועד ההגשה בשורה שנבנית מ-TENDER_COLUMNS
+STATUS_INDEX = TENDER_COLUMNS.index('status')
+SUBMISSION_TS_INDEX = TENDER_COLUMNS.index('submission_ts')
+
+# מפתחות מילון הסינון של TenderModel (ראו _filter_clause)
+FILTER_KEYS = frozenset((
+    'keyword', 'category_id', 'category_ids', 'status', 'statuses', 'source', 'sources', 'publisher',
+    'publish_from', 'publish_to', 'submission_from', 'submission_to'
+))
+
+def _external_id(tender_data):
+    """מזהה חיצוני יציב למכרז
+    
+    המזהה מהמקור, כתובת המכרז כאשר אין מזהה, ולבסוף גיבוב של הכותרת והמפרסם.
+    """
+    for key in ('id', 'url', 'details_url'):
+        value = tender_data.get(key)
+        if value is not None and str(value).strip() not in PLACEHOLDER_VALUES:
+            return str(value).strip()
+    
+    fallback = f"{tender_data.get('title') or ''}|{tender_data.get('publisher') or ''}"
+    return 'sha1:' + hashlib.sha1(fallback.encode('utf-8')).hexdigest()
+
+def _tender_row(tender_data):
+    """המרת נתוני מכרז לערכי העמודות לפי TENDER_COLUMNS"""
+    return (_external_id(tender_data),) + tuple(
+        tender_data.get(column) or '' for column in TENDER_COLUMNS[1:-2]
+    ) + (
+        parse_tender_date(tender_data.get('publish_date')) or 0,
+        parse_tender_date(tender_data.get('submission_date')) or 0
+    )
+
+def encode_cursor(values):
+    """קידוד מיקום בדפדוף (ערכי מפתח המיון של השורה האחרונה) למחרוזת אטומה"""
+    serialized = json.dumps(values, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(serialized.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+    """פענוח מחרוזת cursor שנוצרה ב-encode_cursor"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"cursor לא תקין: {token}") from e
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError(f"cursor לא תקין: {token}")
+    return values
+
+def _filter_values(filters, single, plural):
+    """ערכי מסנן שיכול להינתן כערך יחיד או כרשימה, ללא ערכים ריקים וכפולים"""
+    values = []
+    if filters.get(single) not in (None, ''):
+        values.append(filters[single])
+    plural_values = filters.get(plural) or ()
+    if isinstance(plural_values, (str, int)):
+        plural_values = (plural_values,)
+    values.extend(value for value in plural_values if value not in (None, ''))
+    return list(dict.fromkeys(values))
+
+def _filter_timestamp(value, name):
+    """המרת גבול של טווח תאריכים לחותמת זמן"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return int(value)
+    timestamp = parse_tender_date(value)
+    if timestamp is None:
+        raise ValueError(f"תאריך לא תקין במסנן {name}: {value}")
+    return timestamp
+
+def compute_content_hash(tender_data, row=None):
+    """גיבוב של תוכן המכרז כולל הקטגוריות, איש הקשר והמסמכים
+    
+    משמש לזיהוי מכרזים שלא השתנו בין ריצות רענון.
+    row - ערכי העמודות אם כבר חושבו עם _tender_row
+    """
+    contact_data = _parse_contact(tender_data) or {}
+    content = [
+        row or _tender_row(tender_data),
+        sorted(_parse_categories(tender_data)),
+        [contact_data.get(key) or '' for key in ('name', 'email', 'phone')],
+        sorted((doc.get('name') or '', doc.get('url') or '') for doc in _parse_documents(tender_data))
+    ]
+    serialized = json.dumps(content, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+def refresh_content_hashes(db, tender_ids):
+    """חישוב מחדש של גיבוב התוכן של מכרזים אחרי שינוי בקטגוריות, באנשי הקשר או במסמכים שלהם
+    
+    הגיבוב כולל את הרשומות הקשורות, ולפיו static_shards ו-bulk_upsert מזהים
+    מכרזים שהשתנו - ולכן הוא מחושב מהקשרים השמורים כפי שהם אחרי השינוי.
+    יש לקרוא לפונקציה בתוך db.transaction().
+    """
+    records = TenderModel(db).get_many_with_relations(tender_ids, records=True)
+    db.execute_many(
+        "UPDATE tenders SET content_hash = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        [(compute_content_hash(record), record.tender_id) for record in records]
+    )
+
+def _tender_ids_of(db, table, key, value):
+    """מזהי המכרזים של רשומות קשורות לפי עמודה (למשל כל המכרזים של קטגוריה)"""
+    return [row['tender_id'] for row in db.execute(f"SELECT tender_id FROM {table} WHERE {key} = ?", (value,))]
+
+def _parse_categories(tender_data):
+    """חילוץ רשימת שמות הקטגוריות של מכרז"""
+    categories = tender_data.get('categories')
+    if not categories:
+        return []
+    if isinstance(categories, str):
+        try:
+            categories = json.loads(categories)
+        except ValueError:
+            categories = [categories]
+    return [name for name in categories if name]
+
+def _parse_contact(tender_data):
+    """חילוץ פרטי איש הקשר של מכרז"""
+    contact_data = tender_data.get('contact')
+    if not contact_data:
+        return None
+    if isinstance(contact_data, str):
+        try:
+            contact_data = json.loads(contact_data)
+        except ValueError:
+            contact_data = {'name': contact_data}
+    return contact_data if isinstance(contact_data, dict) else None
+
+def _parse_documents(tender_data):
+    """חילוץ רשימת המסמכים של מכרז"""
+    documents = tender_data.get('documents')
+    if not documents:
+        return []
+    if isinstance(documents, str):
+        try:
+            documents = json.loads(documents)
+        except ValueError:
+            documents = []
+    return [doc for doc in documents if isinstance(doc, dict)]
 
 class TenderModel:
     """מודל לניהול מכרזים בבסיס הנתונים"""
@@ -67,84 +424,187 @@ class TenderModel:
     def __init__(self, db):
         """אתחול המודל"""
         self.db = db
+        
+        # מספר השאילתות שביצעה הקריאה האחרונה ל-get_many_with_relations
+        self.last_query_count = 0
     
     def create(self, tender_data):
         """יצירת מכרז חדש"""
-        query = """
-        INSERT INTO tenders (
-            external_id, title, description, publisher, 
-            publish_date, submission_date, status, url, source
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        query = f"""
+        INSERT INTO tenders ({', '.join(TENDER_COLUMNS)}, content_hash)
+        VALUES ({', '.join('?' * len(TENDER_COLUMNS))}, ?)
         """
-        params = (
-            tender_data.get('id', ''),
-            tender_data.get('title', ''),
-            tender_data.get('description', ''),
-            tender_data.get('publisher', ''),
-            tender_data.get('publish_date', ''),
-            tender_data.get('submission_date', ''),
-            tender_data.get('status', ''),
-            tender_data.get('url', ''),
-            tender_data.get('source', '')
-        )
+        row = _tender_row(tender_data)
+        params = row + (compute_content_hash(tender_data, row),)
         
-        conn = self.db.connect()
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        tender_id = cursor.lastrowid
-        conn.commit()
-        self.db.close()
-        
-        # טיפול בקטגוריות
-        if 'categories' in tender_data and tender_data['categories']:
-            categories = tender_data['categories']
-            if isinstance(categories, str):
-                try:
-                    categories = json.loads(categories)
-                except:
-                    categories = [categories]
+        # המכרז וכל הרשומות הקשורות אליו נשמרים בטרנזקציה אחת, הקשרים בכתיבה מקובצת
+        # כמו ב-bulk_upsert - גיבוב התוכן כבר כולל אותם, ודור הנתונים מתקדם פעם אחת
+        with self.db.transaction():
+            tender_id = self.db.insert(query, params)
+            self._write_relations([(tender_id, tender_data)])
+            bump_generation(self.db)
+        
+        return tender_id
+    
+    def bulk_upsert(self, tenders, batch_size=500):
+        """הכנסה או עדכון של מכרזים רבים בטרנזקציות מקובצות
+        
+        המכרזים מזוהים לפי (source, external_id) ומושווים לפי גיבוב התוכן:
+        מכרז שלא השתנה לא נכתב כלל, ומכרז שהשתנה מתעדכן יחד עם updated_at.
+        כל אצווה נכתבת בטרנזקציה אחת עם executemany עבור המכרזים, הקטגוריות,
+        אנשי הקשר והמסמכים. מחזיר רשימה עם סטטיסטיקה לכל אצווה:
+        inserted / updated / unchanged, משך הכתיבה בשניות וקצב השורות לשנייה.
+        """
+        stats = []
+        batch = []
+        
+        for tender_data in tenders:
+            batch.append(tender_data)
+            if len(batch) >= batch_size:
+                stats.append(self._upsert_batch(batch, len(stats) + 1))
+                batch = []
+        
+        if batch:
+            stats.append(self._upsert_batch(batch, len(stats) + 1))
+        
+        return stats
+    
+    def _upsert_batch(self, batch, batch_number):
+        """כתיבת אצווה אחת של מכרזים בטרנזקציה אחת"""
+        started = time.perf_counter()
+        
+        # מכרז שמופיע פעמיים באותה אצווה - הגרסה האחרונה קובעת
+        keyed = {}
+        for tender_data in batch:
+            row = _tender_row(tender_data)
+            row += (compute_content_hash(tender_data, row),)
+            keyed[(row[8], row[0])] = (row, tender_data)
+        
+        with self.db.transaction(immediate=True):
+            existing = self._fetch_existing(keyed.keys())
+            archived = self._fetch_existing([key for key in keyed if key not in existing], table='tenders_archive')
+            
+            # מכרז מהארכיון שעדיין סגור אינו נכתב, ומכרז שנפתח מחדש חוזר לטבלה הפעילה ומתעדכן
+            cutoff = archive_cutoff()
+            to_restore = []
+            for key, current in archived.items():
+                row = keyed[key][0]
+                if not is_archivable(row[STATUS_INDEX], row[SUBMISSION_TS_INDEX], cutoff):
+                    to_restore.append(current['id'])
+                    existing[key] = current
+            move_tenders(self.db, to_restore, to_archive=False)
             
-            category_model = CategoryModel(self.db)
-            for category_name in categories:
-                category_id = category_model.get_or_create(category_name)
-                self.add_category(tender_id, category_id)
-        
-        # טיפול באנשי קשר
-        if 'contact' in tender_data and tender_data['contact']:
-            contact_data = tender_data['contact']
-            if isinstance(contact_data, str):
-                try:
-                    contact_data = json.loads(contact_data)
-                except:
-                    contact_data = {'name': contact_data}
+            to_insert = []
+            to_update = []
+            unchanged = 0
+            for key, (row, tender_data) in keyed.items():
+                current = existing.get(key)
+                if current is None and key in archived:
+                    unchanged += 1
+                elif current is None:
+                    to_insert.append((row, tender_data))
+                elif current['content_hash'] != row[-1]:
+                    to_update.append((current['id'], row, tender_data))
+                else:
+                    unchanged += 1
             
-            contact_model = ContactModel(self.db)
-            contact_model.create(
-                tender_id=tender_id,
-                name=contact_data.get('name', ''),
-                email=contact_data.get('email', ''),
-                phone=contact_data.get('phone', '')
+            # הכנסת מכרזים חדשים וקבלת המזהים שנוצרו להם
+            columns = TENDER_COLUMNS + ('content_hash',)
+            last_id = self.db.execute("SELECT COALESCE(MAX(id), 0) FROM tenders")[0][0]
+            self.db.execute_many(
+                f"INSERT INTO tenders ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                [row for row, _ in to_insert]
             )
+            new_ids = [row['id'] for row in self.db.execute(
+                "SELECT id FROM tenders WHERE id > ? ORDER BY id", (last_id,)
+            )]
+            
+            # עדכון מכרזים שהשתנו בלבד והחלפת הרשומות הקשורות אליהם
+            assignments = ', '.join(f"{column} = ?" for column in columns)
+            self.db.execute_many(
+                f"UPDATE tenders SET {assignments}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                [row + (tender_id,) for tender_id, row, _ in to_update]
+            )
+            updated_ids = [(tender_id,) for tender_id, _, _ in to_update]
+            for table in ('tender_categories', 'contacts', 'documents'):
+                self.db.execute_many(f"DELETE FROM {table} WHERE tender_id = ?", updated_ids)
+            
+            written = list(zip(new_ids, (tender_data for _, tender_data in to_insert)))
+            written.extend((tender_id, tender_data) for tender_id, _, tender_data in to_update)
+            self._write_relations(written)
+            
+            # קידום דור הנתונים רק כשמשהו נכתב, כדי שהמטמון יישאר תקף בריצה ללא שינויים
+            if written or to_restore:
+                bump_generation(self.db)
+        
+        elapsed = time.perf_counter() - started
+        return {
+            'batch': batch_number,
+            'rows': len(batch),
+            'inserted': len(to_insert),
+            'updated': len(to_update),
+            'unchanged': unchanged,
+            'seconds': elapsed,
+            'rows_per_sec': len(batch) / elapsed if elapsed > 0 else 0.0
+        }
+    
+    def _fetch_existing(self, keys, table='tenders'):
+        """שליפת המזהה וגיבוב התוכן של מכרזים קיימים לפי (source, external_id)"""
+        existing = {}
+        by_source = {}
+        for source, external_id in keys:
+            by_source.setdefault(source, []).append(external_id)
         
-        # טיפול במסמכים
-        if 'documents' in tender_data and tender_data['documents']:
-            documents = tender_data['documents']
-            if isinstance(documents, str):
-                try:
-                    documents = json.loads(documents)
-                except:
-                    documents = []
+        for source, external_ids in by_source.items():
+            for start in range(0, len(external_ids), IN_CLAUSE_CHUNK):
+                chunk = external_ids[start:start + IN_CLAUSE_CHUNK]
+                placeholders = ', '.join('?' * len(chunk))
+                query = f"""
+                SELECT id, external_id, content_hash FROM {table}
+                WHERE source = ? AND external_id IN ({placeholders}) AND external_id != ''
+                """
+                for row in self.db.execute(query, [source] + chunk):
+                    existing[(source, row['external_id'])] = row
+        
+        return existing
+    
+    def _write_relations(self, written):
+        """כתיבת הקטגוריות, אנשי הקשר והמסמכים של אצוות מכרזים"""
+        parsed_categories = [(tender_id, _parse_categories(tender_data)) for tender_id, tender_data in written]
+        category_ids = CategoryModel(self.db).get_or_create_many(
+            name for _, names in parsed_categories for name in names
+        )
+        category_links = [
+            (tender_id, category_ids[name]) for tender_id, names in parsed_categories for name in names
+        ]
+        
+        contacts = []
+        documents = []
+        for tender_id, tender_data in written:
+            contact_data = _parse_contact(tender_data)
+            if contact_data:
+                contacts.append((
+                    tender_id,
+                    contact_data.get('name', ''),
+                    contact_data.get('email', ''),
+                    contact_data.get('phone', '')
+                ))
             
-            document_model = DocumentModel(self.db)
-            for doc in documents:
-                if isinstance(doc, dict):
-                    document_model.create(
-                        tender_id=tender_id,
-                        name=doc.get('name', ''),
-                        url=doc.get('url', '')
-                    )
+            for doc in _parse_documents(tender_data):
+                documents.append((tender_id, doc.get('name', ''), doc.get('url', '')))
         
-        return tender_id
+        self.db.execute_many(
+            "INSERT OR IGNORE INTO tender_categories (tender_id, category_id) VALUES (?, ?)",
+            category_links
+        )
+        self.db.execute_many(
+            "INSERT INTO contacts (tender_id, name, email, phone) VALUES (?, ?, ?, ?)",
+            contacts
+        )
+        self.db.execute_many(
+            "INSERT INTO documents (tender_id, name, url) VALUES (?, ?, ?)",
+            documents
+        )
     
     def update(self, tender_id, tender_data):
         """עדכון מכרז קיים"""
@@ -158,6 +618,9 @@ class TenderModel:
             status = ?,
             url = ?,
             source = ?,
+            publish_ts = ?,
+            submission_ts = ?,
+            content_hash = NULL,
             updated_at = CURRENT_TIMESTAMP
         WHERE id = ?
         """
@@ -170,67 +633,354 @@ class TenderModel:
             tender_data.get('status', ''),
             tender_data.get('url', ''),
             tender_data.get('source', ''),
+            parse_tender_date(tender_data.get('publish_date')) or 0,
+            parse_tender_date(tender_data.get('submission_date')) or 0,
             tender_id
         )
         
-        self.db.execute(query, params)
+        with self.db.transaction():
+            self.db.execute(query, params)
+            bump_generation(self.db)
         return tender_id
     
-    def get_by_id(self, tender_id):
+    @cached_read
+    def get_by_id(self, tender_id, include_archive=False):
         """קבלת מכרז לפי מזהה"""
         query = "SELECT * FROM tenders WHERE id = ?"
         result = self.db.execute(query, (tender_id,))
+        if not result and include_archive:
+            result = self.db.execute("SELECT * FROM tenders_archive WHERE id = ?", (tender_id,))
         if result:
             return dict(result[0])
         return None
     
-    def get_by_external_id(self, external_id, source):
+    @cached_read
+    def get_by_external_id(self, external_id, source, include_archive=False):
         """קבלת מכרז לפי מזהה חיצוני ומקור"""
         query = "SELECT * FROM tenders WHERE external_id = ? AND source = ?"
         result = self.db.execute(query, (external_id, source))
+        if not result and include_archive:
+            result = self.db.execute(
+                "SELECT * FROM tenders_archive WHERE external_id = ? AND source = ?", (external_id, source)
+            )
         if result:
             return dict(result[0])
         return None
     
+    def iter_all(self, batch=500, include_archive=False, records=False):
+        """מעבר על כל המכרזים לפי סדר המזהה, מכרז אחד בכל פעם
+        
+        מיועד לייצוא ולבנייה מחדש של נתונים נגזרים: השורות נשלפות במנות של
+        batch ולכן הזיכרון אינו תלוי בגודל הטבלה. records=True מחזיר רשומות
+        Tender במקום מילונים.
+        """
+        query = "SELECT * FROM tenders ORDER BY id"
+        if include_archive:
+            query = "SELECT * FROM tenders UNION ALL SELECT * FROM tenders_archive ORDER BY id"
+        for row in self.db.iter_query(query, batch=batch):
+            yield Tender.from_row(row) if records else dict(row)
+    
+    @cached_read
     def get_all(self, limit=100, offset=0):
         """קבלת כל המכרזים"""
-        query = "SELECT * FROM tenders ORDER BY publish_date DESC LIMIT ? OFFSET ?"
+        query = "SELECT * FROM tenders ORDER BY publish_ts DESC, id DESC LIMIT ? OFFSET ?"
         result = self.db.execute(query, (limit, offset))
         return [dict(row) for row in result]
     
-    def search(self, keyword, category_id=None, status=None, limit=100, offset=0):
-        """חיפוש מכרזים"""
+    def get_page(self, cursor=None, limit=100):
+        """דפדוף במכרזים לפי cursor (keyset) במקום OFFSET, מהחדש לישן
+        
+        cursor - המחרוזת next_cursor מהעמוד הקודם, או None לעמוד הראשון.
+        מחזיר מילון עם items ו-next_cursor (None בעמוד האחרון).
+        """
+        return self.list_tenders(cursor=cursor, limit=limit)
+    
+    def search_page(self, keyword, category_id=None, status=None, cursor=None, limit=100):
+        """חיפוש מכרזים עם דפדוף לפי cursor, ממוין לפי תאריך פרסום"""
+        filters = {'keyword': keyword, 'category_id': category_id, 'status': status}
+        return self.list_tenders(filters, cursor=cursor, limit=limit)
+    
+    @cached_read
+    def list_tenders(self, filters=None, cursor=None, limit=100, explain=False, include_archive=False):
+        """רשימת מכרזים מסוננת עם דפדוף לפי cursor, מהחדש לישן
+        
+        filters - מילון סינון (ראו _filter_clause), כל שילוב של המפתחות אפשרי.
+        explain - צירוף תוכנית הביצוע של SQLite לתוצאה תחת המפתח plan,
+        לבדיקה שהשאילתה משתמשת באינדקס המשולב המתאים.
+        include_archive - צירוף מכרזים מהארכיון (ברירת המחדל: הפעילים בלבד)
+        """
+        where, params = self._filter_clause(filters)
+        query, params = self._keyset_query(f"SELECT t.* FROM tenders t WHERE {where}", params, cursor, limit)
+        
+        if include_archive:
+            # כל טבלה מחזירה את העמוד שלה לפי האינדקס שלה, והעמוד המשותף נבחר מהאיחוד
+            archive_where, archive_params = self._filter_clause(filters, archive=True)
+            archive_query, archive_params = self._keyset_query(
+                f"SELECT t.* FROM tenders_archive t WHERE {archive_where}", archive_params, cursor, limit
+            )
+            query = f"""
+            SELECT * FROM ({query}) UNION ALL SELECT * FROM ({archive_query})
+            ORDER BY publish_ts DESC, id DESC LIMIT ?
+            """
+            params = params + archive_params + [limit + 1]
+        
+        page = self._keyset_page(query, params, limit)
+        if explain:
+            page['plan'] = [row['detail'] for row in self.db.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+        return page
+    
+    def _filter_clause(self, filters, archive=False):
+        """תנאי WHERE (על הכינוי t של טבלת המכרזים) ופרמטרים לפי מילון סינון
+        
+        משותף לרשימות, לחיפוש ולספירות הפאסטות. מפתחות נתמכים:
+        keyword - חיפוש מלא; category_id / category_ids - מכרזים באחת הקטגוריות;
+        status / statuses, source / sources - ערך אחד או רשימה; publisher;
+        publish_from / publish_to, submission_from / submission_to - טווח תאריכים
+        (כולל) כחותמת זמן או כטקסט תאריך. ערכים ריקים מתעלמים מהם.
+        archive - התנאי עבור tenders_archive (אינדקס החיפוש והקטגוריות של הארכיון)
+        """
+        filters = filters or {}
+        unknown = set(filters) - FILTER_KEYS
+        if unknown:
+            raise ValueError(f"מסנן לא מוכר: {', '.join(sorted(unknown))}")
+        
+        fts_table, categories_table = ('tenders_archive_fts', 'tender_categories_archive') if archive else ('tenders_fts', 'tender_categories')
+        clauses = []
+        params = []
+        
+        match_query = build_match_query(filters.get('keyword') or '')
+        if match_query:
+            clauses.append(f"t.id IN (SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH ?)")
+            params.append(match_query)
+        
+        category_ids = _filter_values(filters, 'category_id', 'category_ids')
+        if category_ids:
+            placeholders = ', '.join('?' * len(category_ids))
+            clauses.append(
+                f"EXISTS (SELECT 1 FROM {categories_table} tc WHERE tc.tender_id = t.id AND tc.category_id IN ({placeholders}))"
+            )
+            params.extend(category_ids)
+        
+        # סינון שוויון - כל אחד מהם מתאים לאינדקס משולב (עמודה, publish_ts, id)
+        for column, single, plural in (('status', 'status', 'statuses'), ('source', 'source', 'sources')):
+            values = _filter_values(filters, single, plural)
+            if len(values) == 1:
+                clauses.append(f"t.{column} = ?")
+            elif values:
+                clauses.append(f"t.{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        
+        if filters.get('publisher'):
+            clauses.append("t.publisher = ?")
+            params.append(filters['publisher'])
+        
+        for column, prefix in (('publish_ts', 'publish'), ('submission_ts', 'submission')):
+            for suffix, operator in (('from', '>='), ('to', '<=')):
+                value = filters.get(f"{prefix}_{suffix}")
+                if value in (None, ''):
+                    continue
+                clauses.append(f"t.{column} {operator} ?")
+                params.append(_filter_timestamp(value, f"{prefix}_{suffix}"))
+        
+        return ' AND '.join(clauses) or '1 = 1', params
+    
+    def _keyset_page(self, query, params, limit):
+        """הרצת שאילתת דפדוף שנבנתה ב-_keyset_query ובניית ה-cursor לעמוד הבא"""
+        items = [dict(row) for row in self.db.execute(query, params)]
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor([items[-1]['publish_ts'], items[-1]['id']])
+        
+        return {'items': items, 'next_cursor': next_cursor}
+    
+    def _keyset_query(self, query, params, cursor, limit):
+        """הוספת תנאי ההמשך, המיון וההגבלה של הדפדוף לשאילתה
+        
+        הדפדוף הוא לפי (publish_ts, id) בסדר יורד: ההמשך מהעמוד הקודם הוא חיפוש
+        באינדקס idx_tenders_publish_ts_id, כך שזמן השליפה אינו תלוי בעומק העמוד.
+        """
+        params = list(params)
+        if cursor:
+            query += " AND (t.publish_ts, t.id) < (?, ?)"
+            params.extend(decode_cursor(cursor))
+        
+        # שורה אחת נוספת מעידה על קיום עמוד הבא
+        query += " ORDER BY t.publish_ts DESC, t.id DESC LIMIT ?"
+        params.append(limit + 1)
+        return query, params
+    
+    @cached_read
+    def get_closing_soon(self, days=7, limit=100, now=None):
+        """מכרזים שמועד ההגשה שלהם ב-days הימים הקרובים, לפי סדר הסגירה"""
+        now = now if now is not None else now_timestamp()
         query = """
-        SELECT DISTINCT t.* FROM tenders t
-        LEFT JOIN tender_categories tc ON t.id = tc.tender_id
-        WHERE (t.title LIKE ? OR t.description LIKE ?)
+        SELECT * FROM tenders
+        WHERE submission_ts BETWEEN ? AND ?
+        ORDER BY submission_ts LIMIT ?
         """
-        params = [f"%{keyword}%", f"%{keyword}%"]
+        result = self.db.execute(query, (now, now + days * 86400, limit))
+        return [dict(row) for row in result]
+    
+    @cached_read
+    def get_recently_published(self, days=7, limit=100, now=None):
+        """מכרזים שפורסמו ב-days הימים האחרונים, מהחדש לישן"""
+        now = now if now is not None else now_timestamp()
+        query = """
+        SELECT * FROM tenders
+        WHERE publish_ts >= ?
+        ORDER BY publish_ts DESC, id DESC LIMIT ?
+        """
+        result = self.db.execute(query, (now - days * 86400, limit))
+        return [dict(row) for row in result]
+    
+    @cached_read
+    def search(self, keyword, category_id=None, status=None, limit=100, offset=0):
+        """חיפוש מכרזים
+        
+        החיפוש רץ על אינדקס FTS5 עם נרמול עברית (ניקוד, אותיות סופיות ואותיות
+        שימוש), והתוצאות מדורגות לפי bm25 כשהכותרת מקבלת משקל גבוה יותר.
+        לכל תוצאה מצורף snippet - קטע מהתיאור (או מהכותרת) עם סימון ההתאמות.
+        """
+        match_query = build_match_query(keyword or '')
+        params = []
         
-        if category_id:
-            query += " AND tc.category_id = ?"
-            params.append(category_id)
+        if match_query:
+            query = """
+            SELECT t.*, bm25(tenders_fts, 10.0, 1.0, 3.0) AS score
+            FROM tenders_fts JOIN tenders t ON t.id = tenders_fts.rowid
+            WHERE tenders_fts MATCH ?
+            """
+            params.append(match_query)
+        else:
+            query = "SELECT t.*, NULL AS score FROM tenders t WHERE 1 = 1"
         
-        if status:
-            query += " AND t.status = ?"
-            params.append(status)
+        where, filter_params = self._filter_clause({'category_id': category_id, 'status': status})
+        query += f" AND {where}"
+        params.extend(filter_params)
         
-        query += " ORDER BY t.publish_date DESC LIMIT ? OFFSET ?"
+        query += " ORDER BY score, t.publish_ts DESC" if match_query else " ORDER BY t.publish_ts DESC, t.id DESC"
+        query += " LIMIT ? OFFSET ?"
         params.extend([limit, offset])
         
         result = self.db.execute(query, params)
-        return [dict(row) for row in result]
+        tenders = [dict(row) for row in result]
+        for tender in tenders:
+            tender['snippet'] = (
+                make_snippet(tender['description'], keyword or '')
+                or make_snippet(tender['title'], keyword or '')
+                or ''
+            )
+        return tenders
+    
+    @cached_read
+    def facets(self, filters=None):
+        """ספירת המכרזים לפי מקור, סטטוס וקטגוריה עבור תוצאות הסינון
+        
+        ללא סינון הספירות נקראות מהטבלה המתוחזקת tender_facets. עם סינון כל
+        הספירות מחושבות בשאילתה אחת שעוברת פעם אחת על המכרזים המסוננים.
+        מחזיר מילון {'source': [...], 'status': [...], 'category': [...]} שבו
+        כל פריט הוא {'value', 'count'} (ולקטגוריה גם 'name'), מהנפוץ לנדיר.
+        """
+        where, params = self._filter_clause(filters)
+        if not params:
+            query = """
+            SELECT f.facet, f.value, f.count, c.name FROM tender_facets f
+            LEFT JOIN categories c ON f.facet = 'category' AND c.id = f.value
+            WHERE f.count > 0 AND (f.facet != 'category' OR c.id IS NOT NULL)
+            """
+        else:
+            query = f"""
+            WITH filtered AS MATERIALIZED (
+                SELECT t.id, t.source, COALESCE(t.status, '') AS status FROM tenders t WHERE {where}
+            )
+            SELECT 'source' AS facet, source AS value, COUNT(*) AS count, NULL AS name
+            FROM filtered GROUP BY source
+            UNION ALL
+            SELECT 'status', status, COUNT(*), NULL FROM filtered GROUP BY status
+            UNION ALL
+            SELECT 'category', tc.category_id, COUNT(*), c.name FROM filtered f
+            JOIN tender_categories tc ON tc.tender_id = f.id
+            JOIN categories c ON c.id = tc.category_id
+            GROUP BY tc.category_id
+            """
+        
+        facets = {'source': [], 'status': [], 'category': []}
+        for row in self.db.execute(query, params):
+            if row['facet'] == 'category':
+                facets['category'].append({'value': int(row['value']), 'name': row['name'], 'count': row['count']})
+            else:
+                facets[row['facet']].append({'value': row['value'], 'count': row['count']})
+        
+        for items in facets.values():
+            items.sort(key=lambda item: (-item['count'], str(item['value'])))
+        return facets
+    
+    def get_many_with_relations(self, tender_ids, records=False):
+        """קבלת מכרזים רבים עם הקטגוריות, אנשי הקשר והמסמכים שלהם
+        
+        במקום ארבע שאילתות לכל מכרז, נשלפים המכרזים וכל אחד מהקשרים בשאילתת
+        IN אחת (לכל IN_CLAUSE_CHUNK מזהים). המכרזים מוחזרים לפי סדר המזהים
+        שהתקבלו, ומזהים שלא נמצאו מדולגים. מספר השאילתות נשמר ב-last_query_count.
+        records=True מחזיר רשומות Tender במבנה האחיד של הסורקים.
+        """
+        start_count = self.db.query_count
+        ids = list(dict.fromkeys(tender_ids))
+        tenders = {}
+        
+        for start in range(0, len(ids), IN_CLAUSE_CHUNK):
+            chunk = ids[start:start + IN_CLAUSE_CHUNK]
+            placeholders = ', '.join('?' * len(chunk))
+            
+            for row in self.db.execute(f"SELECT * FROM tenders WHERE id IN ({placeholders})", chunk):
+                tender = dict(row)
+                tender.update(categories=[], contacts=[], documents=[])
+                tenders[tender['id']] = tender
+            
+            category_query = f"""
+            SELECT tc.tender_id, c.* FROM tender_categories tc
+            JOIN categories c ON c.id = tc.category_id
+            WHERE tc.tender_id IN ({placeholders})
+            ORDER BY c.name
+            """
+            relation_queries = (
+                ('categories', category_query),
+                ('contacts', f"SELECT * FROM contacts WHERE tender_id IN ({placeholders}) ORDER BY id"),
+                ('documents', f"SELECT * FROM documents WHERE tender_id IN ({placeholders}) ORDER BY id")
+            )
+            for key, query in relation_queries:
+                for row in self.db.execute(query, chunk):
+                    related = dict(row)
+                    tender_id = related.pop('tender_id')
+                    if tender_id in tenders:
+                        tenders[tender_id][key].append(related)
+        
+        self.last_query_count = self.db.query_count - start_count
+        result = [tenders[tender_id] for tender_id in ids if tender_id in tenders]
+        if records:
+            return [
+                Tender.from_row(tender, tender['categories'], tender['contacts'], tender['documents'])
+                for tender in result
+            ]
+        return result
     
     def add_category(self, tender_id, category_id):
         """הוספת קטגוריה למכרז"""
         query = "INSERT OR IGNORE INTO tender_categories (tender_id, category_id) VALUES (?, ?)"
-        self.db.execute(query, (tender_id, category_id))
+        with self.db.transaction():
+            self.db.execute(query, (tender_id, category_id))
+            refresh_content_hashes(self.db, [tender_id])
+            bump_generation(self.db)
     
     def remove_category(self, tender_id, category_id):
         """הסרת קטגוריה ממכרז"""
         query = "DELETE FROM tender_categories WHERE tender_id = ? AND category_id = ?"
-        self.db.execute(query, (tender_id, category_id))
+        with self.db.transaction():
+            self.db.execute(query, (tender_id, category_id))
+            refresh_content_hashes(self.db, [tender_id])
+            bump_generation(self.db)
     
+    @cached_read
     def get_categories(self, tender_id):
         """קבלת כל הקטגוריות של מכרז"""
         query = """
@@ -241,12 +991,14 @@ class TenderModel:
         result = self.db.execute(query, (tender_id,))
         return [dict(row) for row in result]
     
+    @cached_read
     def get_contacts(self, tender_id):
         """קבלת אנשי קשר של מכרז"""
         query = "SELECT * FROM contacts WHERE tender_id = ?"
         result = self.db.execute(query, (tender_id,))
         return [dict(row) for row in result]
     
+    @cached_read
     def get_documents(self, tender_id):
         """קבלת מסמכים של מכרז"""
         query = "SELECT * FROM documents WHERE tender_id = ?"
@@ -256,26 +1008,46 @@ class TenderModel:
     def delete(self, tender_id):
         """מחיקת מכרז"""
         query = "DELETE FROM tenders WHERE id = ?"
-        self.db.execute(query, (tender_id,))
+        with self.db.transaction():
+            self.db.execute(query, (tender_id,))
+            bump_generation(self.db)
 
 class CategoryModel:
-    """מודל לניהול קטגוריות בבסיס הנתונים"""
+    """מודל לניהול קטגוריות בבסיס הנתונים
+    
+    מיפוי שם -> מזהה נשמר במטמון בתוך התהליך, משותף לכל מופעי המודל מול אותו
+    בסיס נתונים. המטמון מתעדכן ביצירה, בעדכון ובמחיקה, ומתנקה כשטרנזקציה מבוטלת.
+    """
+    
+    # מטמון שם -> מזהה לכל בסיס נתונים
+    _name_cache = {}
+    _cache_lock = threading.Lock()
     
     def __init__(self, db):
         """אתחול המודל"""
         self.db = db
+        if db.db_path == ':memory:':
+            cache_key = (db.db_path, id(db))
+        else:
+            cache_key = os.path.abspath(db.db_path)
+        
+        with self._cache_lock:
+            self._cache = self._name_cache.setdefault(cache_key, {})
+            if self._cache.clear not in db.rollback_hooks:
+                db.rollback_hooks.append(self._cache.clear)
+    
+    def invalidate_cache(self):
+        """ניקוי מטמון השמות של בסיס הנתונים"""
+        with self._cache_lock:
+            self._cache.clear()
     
     def create(self, name):
         """יצירת קטגוריה חדשה"""
         query = "INSERT INTO categories (name) VALUES (?)"
         
-        conn = self.db.connect()
-        cursor = conn.cursor()
-        cursor.execute(query, (name,))
-        category_id = cursor.lastrowid
-        conn.commit()
-        self.db.close()
-        
+        category_id = self.db.insert(query, (name,))
+        with self._cache_lock:
+            self._cache[name] = category_id
         return category_id
     
     def get_by_id(self, category_id):
@@ -296,10 +1068,36 @@ class CategoryModel:
     
     def get_or_create(self, name):
         """קבלת קטגוריה לפי שם או יצירת חדשה"""
-        category = self.get_by_name(name)
-        if category:
-            return category['id']
-        return self.create(name)
+        return self.get_or_create_many([name])[name]
+    
+    def get_or_create_many(self, names):
+        """קבלת מזהים לרשימת שמות קטגוריות, ויצירת החסרות
+        
+        שמות שאינם במטמון נפתרים יחד: INSERT OR IGNORE אחד ו-SELECT אחד
+        (לכל IN_CLAUSE_CHUNK שמות). מחזיר מילון שם -> מזהה.
+        """
+        names = list(dict.fromkeys(names))
+        with self._cache_lock:
+            resolved = {name: self._cache[name] for name in names if name in self._cache}
+        missing = [name for name in names if name not in resolved]
+        
+        if missing:
+            with self.db.transaction():
+                self.db.execute_many(
+                    "INSERT OR IGNORE INTO categories (name) VALUES (?)",
+                    [(name,) for name in missing]
+                )
+                for start in range(0, len(missing), IN_CLAUSE_CHUNK):
+                    chunk = missing[start:start + IN_CLAUSE_CHUNK]
+                    placeholders = ', '.join('?' * len(chunk))
+                    query = f"SELECT id, name FROM categories WHERE name IN ({placeholders})"
+                    for row in self.db.execute(query, chunk):
+                        resolved[row['name']] = row['id']
+            
+            with self._cache_lock:
+                self._cache.update((name, resolved[name]) for name in missing)
+        
+        return resolved
     
     def get_all(self):
         """קבלת כל הקטגוריות"""
@@ -310,12 +1108,21 @@ class CategoryModel:
     def update(self, category_id, name):
         """עדכון קטגוריה"""
         query = "UPDATE categories SET name = ? WHERE id = ?"
-        self.db.execute(query, (name, category_id))
+        with self.db.transaction():
+            self.db.execute(query, (name, category_id))
+            refresh_content_hashes(self.db, _tender_ids_of(self.db, 'tender_categories', 'category_id', category_id))
+            bump_generation(self.db)
+        self.invalidate_cache()
     
     def delete(self, category_id):
         """מחיקת קטגוריה"""
         query = "DELETE FROM categories WHERE id = ?"
-        self.db.execute(query, (category_id,))
+        with self.db.transaction():
+            tender_ids = _tender_ids_of(self.db, 'tender_categories', 'category_id', category_id)
+            self.db.execute(query, (category_id,))
+            refresh_content_hashes(self.db, tender_ids)
+            bump_generation(self.db)
+        self.invalidate_cache()
 
 class ContactModel:
     """מודל לניהול אנשי קשר בבסיס הנתונים"""
@@ -328,14 +1135,11 @@ class ContactModel:
         """יצירת איש קשר חדש"""
         query = "INSERT INTO contacts (tender_id, name, email, phone) VALUES (?, ?, ?, ?)"
         
-        conn = self.db.connect()
-        cursor = conn.cursor()
-        cursor.execute(query, (tender_id, name, email, phone))
-        contact_id = cursor.lastrowid
-        conn.commit()
-        self.db.close()
-        
-        return contact_id
+        with self.db.transaction():
+            row_id = self.db.insert(query, (tender_id, name, email, phone))
+            refresh_content_hashes(self.db, [tender_id])
+            bump_generation(self.db)
+        return row_id
     
     def get_by_id(self, contact_id):
         """קבלת איש קשר לפי מזהה"""
@@ -348,12 +1152,19 @@ class ContactModel:
     def update(self, contact_id, name='', email='', phone=''):
         """עדכון איש קשר"""
         query = "UPDATE contacts SET name = ?, email = ?, phone = ? WHERE id = ?"
-        self.db.execute(query, (name, email, phone, contact_id))
+        with self.db.transaction():
+            self.db.execute(query, (name, email, phone, contact_id))
+            refresh_content_hashes(self.db, _tender_ids_of(self.db, 'contacts', 'id', contact_id))
+            bump_generation(self.db)
     
     def delete(self, contact_id):
         """מחיקת איש קשר"""
         query = "DELETE FROM contacts WHERE id = ?"
-        self.db.execute(query, (contact_id,))
+        with self.db.transaction():
+            tender_ids = _tender_ids_of(self.db, 'contacts', 'id', contact_id)
+            self.db.execute(query, (contact_id,))
+            refresh_content_hashes(self.db, tender_ids)
+            bump_generation(self.db)
 
 class DocumentModel:
     """מודל לניהול מסמכים בבסיס הנתונים"""
@@ -366,14 +1177,11 @@ class DocumentModel:
         """יצירת מסמך חדש"""
         query = "INSERT INTO documents (tender_id, name, url) VALUES (?, ?, ?)"
         
-        conn = self.db.connect()
-        cursor = conn.cursor()
-        cursor.execute(query, (tender_id, name, url))
-        document_id = cursor.lastrowid
-        conn.commit()
-        self.db.close()
-        
-        return document_id
+        with self.db.transaction():
+            row_id = self.db.insert(query, (tender_id, name, url))
+            refresh_content_hashes(self.db, [tender_id])
+            bump_generation(self.db)
+        return row_id
     
     def get_by_id(self, document_id):
         """קבלת מסמך לפי מזהה"""
@@ -386,12 +1194,19 @@ class DocumentModel:
     def update(self, document_id, name, url=''):
         """עדכון מסמך"""
         query = "UPDATE documents SET name = ?, url = ? WHERE id = ?"
-        self.db.execute(query, (name, url, document_id))
+        with self.db.transaction():
+            self.db.execute(query, (name, url, document_id))
+            refresh_content_hashes(self.db, _tender_ids_of(self.db, 'documents', 'id', document_id))
+            bump_generation(self.db)
     
     def delete(self, document_id):
         """מחיקת מסמך"""
         query = "DELETE FROM documents WHERE id = ?"
-        self.db.execute(query, (document_id,))
+        with self.db.transaction():
+            tender_ids = _tender_ids_of(self.db, 'documents', 'id', document_id)
+            self.db.execute(query, (document_id,))
+            refresh_content_hashes(self.db, tender_ids)
+            bump_generation(self.db)
 
 class UserModel:
     """מודל לניהול משתמשים בבסיס הנתונים"""
@@ -404,14 +1219,7 @@ class UserModel:
         """יצירת משתמש חדש"""
         query = "INSERT INTO users (email, password_hash, name) VALUES (?, ?, ?)"
         
-        conn = self.db.connect()
-        cursor = conn.cursor()
-        cursor.execute(query, (email, password_hash, name))
-        user_id = cursor.lastrowid
-        conn.commit()
-        self.db.close()
-        
-        return user_id
+        return self.db.insert(query, (email, password_hash, name))
     
     def get_by_id(self, user_id):
         """קבלת משתמש לפי מזהה"""
@@ -473,16 +1281,152 @@ class UserModel:
         self.db.execute(query, (user_id, tender_id))
     
     def get_saved_tenders(self, user_id):
-        """קבלת כל המכרזים השמורים של משתמש"""
+        """קבלת כל המכרזים השמורים של משתמש, כולל מכרזים שעברו לארכיון"""
         query = """
         SELECT t.* FROM tenders t
         JOIN saved_tenders st ON t.id = st.tender_id
         WHERE st.user_id = ?
-        ORDER BY t.publish_date DESC
+        UNION ALL
+        SELECT t.* FROM tenders_archive t
+        JOIN saved_tenders st ON t.id = st.tender_id
+        WHERE st.user_id = ?
+        ORDER BY publish_ts DESC
         """
-        result = self.db.execute(query, (user_id,))
+        result = self.db.execute(query, (user_id, user_id))
         return [dict(row) for row in result]
     
     def add_notification(self, user_id, category_id=None, keyword=None):
         """הוספת התראה חדשה"""
-        query = "INSERT INTO notifications (user_id, category_id, keyword) VALUES <response clipped><NOTE>To save on context only part of this file has been shown to you. You should retry this tool after you have searched inside the file with `grep -n` in order to find the line numbers of what you are looking for.</NOTE>
\ No newline at end of file
+        query = "INSERT INTO notifications (user_id, category_id, keyword) VALUES (?, ?, ?)"
+        return self.db.insert(query, (user_id, category_id, keyword))
+    
+    def get_notifications(self, user_id):
+        """קבלת כל ההתראות של משתמש"""
+        query = "SELECT * FROM notifications WHERE user_id = ?"
+        result = self.db.execute(query, (user_id,))
+        return [dict(row) for row in result]
+    
+    def delete_notification(self, notification_id):
+        """מחיקת התראה"""
+        query = "DELETE FROM notifications WHERE id = ?"
+        self.db.execute(query, (notification_id,))
+
+def initialize_database(db_path, schema_path, stats=None):
+    """אתחול בסיס הנתונים
+    
+    schema.sql הוא גרסה 1 של הסכמה, והמיגרציות בתיקיית migrations מוחלות
+    לפי PRAGMA user_version - בסיס נתונים מעודכן אינו מריץ דבר מלבד בדיקת הגרסה.
+    """
+    db = Database(db_path, persistent=True, stats=stats)
+    migrate(db, schema_path)
+    return db
+
+def link_near_duplicates(db, tenders):
+    """מיזוג מכרזים לתוך מכרזים שמורים שהם אותו מכרז ממקור אחר
+    
+    מכרז שעוד אינו בבסיס הנתונים (לפי source ו-external_id) נשלח למכרז השמור
+    שכבר קושר אליו, ואם אין כזה - מותאם לחתימות השמורות (find_similar). אם
+    נמצא מכרז ממקור אחר, הרשומות ממוזגות (merge_tenders) ונכתבות לשורה הקיימת
+    במקום שורה חדשה לכל מקור, והקישור נשמר לריצות הבאות. גם מכרז שכבר שמור
+    בשורה שמכרזים אחרים מקושרים אליה ממוזג לתוכה, כדי שרשומה ממקור אחד לא
+    תדרוס את מה שתרמו המקורות האחרים. מחזיר את רשימת המכרזים לכתיבה ב-bulk_upsert.
+    """
+    store = SignatureStore(db)
+    store.index_pending()
+    tender_model = TenderModel(db)
+    
+    keys = [(tender.get('source') or '', _external_id(tender)) for tender in tenders]
+    existing = tender_model._fetch_existing(keys)
+    existing.update(tender_model._fetch_existing([key for key in keys if key not in existing], table='tenders_archive'))
+    merged_rows = store.linked_members(row['id'] for row in existing.values())
+    links = store.linked_tenders([key for key in keys if key not in existing])
+    
+    result = []
+    incoming = {}
+    duplicates = {}
+    for tender, key in zip(tenders, keys):
+        current = existing.get(key)
+        if current is not None and current['id'] not in merged_rows:
+            # הגרסה החדשה של מכרז שמור היא הבסיס למיזוג אם מכרזים אחרים מקושרים אליו
+            incoming[current['id']] = len(result)
+            result.append(tender)
+            continue
+        if current is not None:
+            tender_id = current['id']
+        else:
+            tender_id = links.get(key)
+            if tender_id is None:
+                tender_id = next((match for match, _ in store.find_similar(tender)), None)
+        if tender_id is None:
+            result.append(tender)
+        else:
+            duplicates.setdefault(tender_id, []).append((key, tender))
+    
+    stored_ids = [tender_id for tender_id in duplicates if tender_id not in incoming]
+    stored = {tender.tender_id: tender for tender in tender_model.get_many_with_relations(stored_ids, records=True)}
+    new_links = []
+    for tender_id, group in duplicates.items():
+        base = as_tender(result[incoming[tender_id]]) if tender_id in incoming else stored.get(tender_id)
+        if base is None:
+            # המכרז השמור נמחק או הועבר לארכיון
+            result.extend(tender for _, tender in group)
+            continue
+        
+        # מכל מקור מתווסף מכרז אחד - מכרז נוסף מאותו מקור עם מזהה אחר הוא מכרז אחר
+        base_key = (base.source or '', _external_id(base))
+        members = [base]
+        identities = {base_key[0]: base_key[1]}
+        for key, tender in group:
+            if identities.setdefault(key[0], key[1]) != key[1]:
+                result.append(tender)
+                continue
+            member = as_tender(tender)
+            # מכרז ללא מזהה מזוהה לפי המזהה החיצוני שנשמר לו (למשל הכתובת)
+            member.id = member.id or key[1]
+            members.append(member)
+            if key != base_key:
+                new_links.append(key + (tender_id,))
+        if len(members) == 1:
+            continue
+        
+        merged = merge_tenders(members)
+        merged.source, merged.id = base_key
+        if tender_id in incoming:
+            result[incoming[tender_id]] = merged
+        else:
+            result.append(merged)
+    
+    if new_links:
+        store.add_links(new_links)
+    return result
+
+def link_merged_records(db, tenders):
+    """קישור הרשומות שמוזגו לתוך מכרזים שנכתבו (merged_from) לשורות של המכרזים
+    
+    כך ייבוא של קובץ המקור של רשומה שמוזגה מגיע ישר לשורה הממוזגת, והייבוא
+    של קובץ המקור המועדף ממוזג אליה ולא דורס אותה.
+    """
+    merged = [tender for tender in tenders if tender.get('merged_from')]
+    keys = [(tender.get('source') or '', _external_id(tender)) for tender in merged]
+    existing = TenderModel(db)._fetch_existing(keys)
+    links = [
+        (record['source'], str(record['id']), existing[key]['id'])
+        for tender, key in zip(merged, keys) if key in existing
+        for record in tender.get('merged_from')
+        if record.get('source') and record.get('id') and (record['source'], str(record['id'])) != key
+    ]
+    if links:
+        SignatureStore(db).add_links(links)
+
+def import_tenders_from_json(db, json_path, batch_size=500):
+    """ייבוא מכרזים מקובץ JSON לבסיס הנתונים
+    
+    מכרזים שכבר שמורים ממקור אחר ממוזגים לתוך המכרז השמור (link_near_duplicates),
+    והרשומות שמוזגו לתוך מכרז בקובץ מקושרות אליו (link_merged_records).
+    """
+    tenders = link_near_duplicates(db, read_json(json_path))
+    
+    tender_model = TenderModel(db)
+    stats = tender_model.bulk_upsert(tenders, batch_size=batch_size)
+    link_merged_records(db, tenders)
+    return sum(batch['rows'] for batch in stats)
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Near-Duplicate Detection
+------------------------
+זיהוי מכרזים כמעט זהים בין מקורות שונים בעזרת MinHash ו-LSH
+
+אותו מכרז מופיע באתרים שונים עם הבדלי פיסוק, סדר מילים וניסוח. הכותרת
+מפורקת למילים מנורמלות (ללא ניקוד, אותיות סופיות ואותיות שימוש), ממנה
+מחושבת חתימת MinHash, והחתימה מחולקת לרצועות (LSH) כך שמכרזים דומים
+נופלים לאותו דלי בלי השוואה של כל זוג. מועמד נחשב כפילות רק אם הוא
+באותו בלוק (אותו מפרסם מנורמל או אותו יום הגשה) ואם הדמיון המשוער בין
+החתימות עובר את הסף.
+"""
+
+import struct
+import hashlib
+from functools import lru_cache
+from hebrew import tokenize, word_variants
+from tender_dates import parse_tender_date
+from tender_record import PLACEHOLDER_VALUES
+
+# מספר פונקציות הגיבוב בחתימה, וחלוקתן לרצועות - BANDS * ROWS == NUM_PERM
+NUM_PERM = 64
+BANDS = 16
+ROWS = 4
+
+# סף הדמיון המשוער (Jaccard) שמעליו שני מכרזים נחשבים אותו מכרז
+DEFAULT_THRESHOLD = 0.6
+
+# מילים שחוזרות כמעט בכל כותרת מכרז ואינן מבדילות בין מכרזים
+STOPWORDS = (
+    'של', 'את', 'על', 'עם', 'או', 'גם', 'עבור', 'מכרז', 'פומבי', 'מס', 'מספר',
+    'הזמנה', 'הזמנת', 'להציע', 'הצעות', 'לביצוע', 'ביצוע', 'אספקת', 'לאספקת'
+)
+
+# מספר המזהים המרבי בכל פסוקית IN (מיובא גם ב-models וב-static_shards)
+IN_CLAUSE_CHUNK = 500
+
+# ערכי החתימה הם 32 ביט - התנגשות מקרית (2^-32) זניחה לעומת שגיאת ההערכה של MinHash
+SIGNATURE_FORMAT = f'<{NUM_PERM}I'
+
+@lru_cache(maxsize=65536)
+def _stem(word):
+    """הצורה הקנונית של מילה - הגרסה הקצרה ביותר ללא אותיות שימוש
+    
+    ה' סופית מוחלפת ב-ת' כדי שצורת הנפרד וצורת הסמיכות (התקנה/התקנת) יהיו מילה אחת.
+    """
+    stem = word_variants(word)[-1]
+    if len(stem) > 2 and stem.endswith('ה'):
+        stem = stem[:-1] + 'ת'
+    return stem
+
+STOP_WORDS = frozenset(tokenize(' '.join(STOPWORDS)))
+
+@lru_cache(maxsize=65536)
+def _is_stopword(word):
+    """האם המילה, או המילה ללא אותיות השימוש שלה, היא מילת עצירה
+    
+    הבדיקה היא מול המילים עצמן ולא מול הגזע שלהן: הגזע של מילת עצירה
+    (מספר -> ספר) עלול להיות מילה אמיתית שאסור להשמיט.
+    """
+    return any(variant in STOP_WORDS for variant in word_variants(word))
+
+def shingles(text):
+    """קבוצת המילים המנורמלות של הטקסט - אינה תלויה בסדר המילים ובפיסוק"""
+    stems = set()
+    for word in tokenize(text or ''):
+        if _is_stopword(word):
+            continue
+        stem = _stem(word)
+        if len(stem) < 2 and not stem.isdigit():
+            continue
+        stems.add(stem)
+    return stems
+
+@lru_cache(maxsize=65536)
+def _shingle_hashes(shingle):
+    """NUM_PERM ערכי גיבוב בלתי תלויים של מילה אחת (קריאה אחת ל-shake_128)"""
+    return struct.unpack(SIGNATURE_FORMAT, hashlib.shake_128(shingle.encode('utf-8')).digest(NUM_PERM * 4))
+
+def signature(shingle_set):
+    """חתימת MinHash - המינימום של כל פונקציית גיבוב על כל המילים (None לקבוצה ריקה)"""
+    if not shingle_set:
+        return None
+    return tuple(map(min, zip(*(_shingle_hashes(shingle) for shingle in shingle_set))))
+
+def similarity(signature_a, signature_b):
+    """הדמיון המשוער (Jaccard) בין שתי חתימות"""
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / NUM_PERM
+
+def pack_signature(sig):
+    """המרת חתימה ל-bytes לשמירה בבסיס הנתונים"""
+    return struct.pack(SIGNATURE_FORMAT, *sig)
+
+def unpack_signature(data):
+    """המרת חתימה שמורה בחזרה ל-tuple"""
+    return struct.unpack(SIGNATURE_FORMAT, data)
+
+def publisher_key(publisher):
+    """המפרסם המנורמל לחלוקת הדליים (None אם לא צוין)"""
+    if (publisher or '').strip() in PLACEHOLDER_VALUES:
+        return None
+    stems = sorted(shingles(publisher))
+    return ' '.join(stems) or None
+
+def deadline_day(submission_date):
+    """יום מועד ההגשה לחלוקת הדליים (None אם אינו ידוע)"""
+    if isinstance(submission_date, int):
+        timestamp = submission_date
+    else:
+        timestamp = parse_tender_date(submission_date) if submission_date not in PLACEHOLDER_VALUES else None
+    return timestamp // 86400 if timestamp else None
+
+def band_keys(sig):
+    """מפתחות הדליים של חתימה - מפתח לכל רצועה של ROWS ערכים
+    
+    המפתח הוא מספר שלם של 64 ביט (עם סימן, כדי שיישמר כ-INTEGER ב-SQLite).
+    """
+    packed = pack_signature(sig)
+    width = ROWS * 4
+    return [
+        int.from_bytes(
+            hashlib.blake2b(bytes((band,)) + packed[band * width:(band + 1) * width], digest_size=8).digest(),
+            'little', signed=True
+        )
+        for band in range(BANDS)
+    ]
+
+def same_block(block_a, block_b):
+    """האם לשני מכרזים אותו מפרסם מנורמל או אותו יום הגשה - תנאי לכפילות"""
+    publisher_a, deadline_a = block_a
+    publisher_b, deadline_b = block_b
+    return bool((publisher_a and publisher_a == publisher_b) or (deadline_a and deadline_a == deadline_b))
+
+def tender_fingerprint(tender_data):
+    """חתימה ובלוק (מפרסם מנורמל, יום הגשה) של מכרז - מילון, רשומת Tender או שורה מבסיס הנתונים"""
+    sig = signature(shingles(tender_data.get('title') or tender_data.get('description')))
+    submission = tender_data.get('submission_ts') or tender_data.get('submission_date')
+    return sig, (publisher_key(tender_data.get('publisher')), deadline_day(submission))
+
+class NearDuplicateIndex:
+    """אינדקס LSH בזיכרון לקבוצת מכרזים (למשל תוצאות ריצת איסוף אחת)"""
+    
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        """אתחול אינדקס ריק"""
+        self.threshold = threshold
+        self._entries = {}
+        self._buckets = {}
+    
+    def add(self, key, tender_data):
+        """הוספת מכרז לאינדקס והחזרת המפתחות של מכרזים קיימים שדומים לו"""
+        sig, block = tender_fingerprint(tender_data)
+        if sig is None:
+            return []
+        
+        candidates = set()
+        for bucket in band_keys(sig):
+            members = self._buckets.setdefault(bucket, [])
+            candidates.update(members)
+            members.append(key)
+        
+        matches = []
+        for other in candidates:
+            other_sig, other_block = self._entries[other]
+            if same_block(block, other_block) and similarity(sig, other_sig) >= self.threshold:
+                matches.append(other)
+        self._entries[key] = (sig, block)
+        return matches
+
+def tender_identity(tender_data):
+    """המקור והמזהה החיצוני של מכרז - מילון, רשומת Tender או שורה מבסיס הנתונים"""
+    external_id = tender_data.get('external_id') or tender_data.get('id')
+    return tender_data.get('source') or None, str(external_id) if external_id else None
+
+def can_pair(identities_a, identities_b):
+    """האם שתי קבוצות מכרזים (מילון מקור -> מזהה) יכולות להיות אותו מכרז
+    
+    מקור לא מפרסם את אותו מכרז פעמיים, ולכן שני מכרזים מאותו מקור הם אותו
+    מכרז רק אם יש להם אותו מזהה - גם אם הכותרת, המפרסם ומועד ההגשה דומים.
+    """
+    return all(
+        identities_a[source] is not None and identities_a[source] == identities_b[source]
+        for source in identities_a.keys() & identities_b.keys()
+    )
+
+def cluster_duplicates(tenders, threshold=DEFAULT_THRESHOLD):
+    """חלוקת רשימת מכרזים לקבוצות של כפילויות
+    
+    מחזיר רשימה של רשימות אינדקסים (לפי הסדר ברשימה המקורית), קבוצה לכל
+    מכרז ייחודי. הקבוצות נבנות עם union-find, כך שכפילות של כפילות מצטרפת
+    לקבוצה, אבל שתי קבוצות לא מאוחדות אם יש בהן מכרזים שונים מאותו מקור (can_pair).
+    """
+    parent = list(range(len(tenders)))
+    identities = []
+    for tender in tenders:
+        source, external_id = tender_identity(tender)
+        identities.append({source: external_id} if source else {})
+    
+    def find(i):
+        """שורש הקבוצה עם כיווץ מסלול"""
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    def union(i, j):
+        """איחוד הקבוצות של שני מכרזים, אם אין ביניהן מכרזים שונים מאותו מקור"""
+        root_i, root_j = find(i), find(j)
+        if root_i == root_j or not can_pair(identities[root_i], identities[root_j]):
+            return
+        root, child = min(root_i, root_j), max(root_i, root_j)
+        parent[child] = root
+        identities[root].update(identities[child])
+    
+    # כותרת ומפרסם זהים הם כפילות גם ללא מפרסם או מועד הגשה לחלוקה לדליים
+    first_with_title = {}
+    for i, tender in enumerate(tenders):
+        union(first_with_title.setdefault((tender.get('title'), tender.get('publisher')), i), i)
+    
+    index = NearDuplicateIndex(threshold)
+    for i, tender in enumerate(tenders):
+        for j in sorted(index.add(i, tender)):
+            union(i, j)
+    
+    clusters = {}
+    for i in range(len(tenders)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+class SignatureStore:
+    """חתימות ודליים שמורים בבסיס הנתונים להתאמת מכרזים חדשים מול כל המכרזים הקיימים
+    
+    החתימה של כל מכרז נשמרת עם גיבוב התוכן שלו, ומחושבת מחדש רק כאשר התוכן
+    השתנה. חיפוש כפילויות של מכרז ניגש רק לדליים שלו (דרך המפתח הראשי של
+    tender_lsh_buckets) ולא סורק את כל המכרזים. מפתחות הדליים נגזרים מהחתימה,
+    כך ששורות הדליים של חתימה ישנה נמחקות לפי המפתח הראשי בלי אינדקס נוסף.
+    
+    מכרזים ממקור אחר שמוזגו לתוך מכרז שמור נרשמים ב-tender_links, כך שייבוא
+    חוזר שלהם מגיע ישר למכרז השמור ומכרז שני מאותו מקור לא מקושר אליו.
+    """
+    
+    def __init__(self, db, threshold=DEFAULT_THRESHOLD):
+        """אתחול מול בסיס נתונים"""
+        self.db = db
+        self.threshold = threshold
+    
+    def _delete_buckets(self, rows):
+        """מחיקת שורות הדליים של חתימות שמורות (שורות עם tender_id ו-signature)"""
+        self.db.execute_many(
+            "DELETE FROM tender_lsh_buckets WHERE bucket = ? AND tender_id = ?",
+            [
+                (bucket, row['tender_id'])
+                for row in rows if row['signature'] is not None
+                for bucket in band_keys(unpack_signature(row['signature']))
+            ]
+        )
+    
+    def purge_deleted(self):
+        """מחיקת החתימות של מכרזים שנמחקו או הועברו לארכיון, והחזרת מספרן"""
+        rows = self.db.execute(
+            "SELECT tender_id, signature FROM tender_signatures s "
+            "WHERE NOT EXISTS (SELECT 1 FROM tenders t WHERE t.id = s.tender_id)"
+        )
+        if rows:
+            with self.db.transaction(immediate=True):
+                self._delete_buckets(rows)
+                self.db.execute_many("DELETE FROM tender_signatures WHERE tender_id = ?", [(row['tender_id'],) for row in rows])
+        
+        # קישור נשמר גם למכרז בארכיון, ונמחק רק עם המכרז עצמו
+        self.db.execute(
+            "DELETE FROM tender_links WHERE tender_id NOT IN (SELECT id FROM tenders) "
+            "AND tender_id NOT IN (SELECT id FROM tenders_archive)"
+        )
+        return len(rows)
+    
+    def index_pending(self, batch_size=1000):
+        """חישוב ושמירת חתימות למכרזים חדשים או שהשתנו, והחזרת מספרם"""
+        self.purge_deleted()
+        indexed = 0
+        while True:
+            rows = self.db.execute(
+                """
+                SELECT t.id AS tender_id, t.title, t.description, t.publisher, t.submission_ts, t.content_hash,
+                       s.signature
+                FROM tenders t LEFT JOIN tender_signatures s ON s.tender_id = t.id
+                WHERE s.tender_id IS NULL OR s.content_hash IS NOT t.content_hash
+                LIMIT ?
+                """,
+                (batch_size,)
+            )
+            if not rows:
+                return indexed
+            
+            signatures = []
+            buckets = []
+            for row in rows:
+                sig, (publisher, deadline) = tender_fingerprint(dict(row))
+                signatures.append((row['tender_id'], row['content_hash'], publisher, deadline, pack_signature(sig) if sig else None))
+                if sig is not None:
+                    buckets.extend((bucket, row['tender_id']) for bucket in band_keys(sig))
+            
+            with self.db.transaction(immediate=True):
+                self._delete_buckets(rows)
+                self.db.execute_many(
+                    "INSERT OR REPLACE INTO tender_signatures "
+                    "(tender_id, content_hash, publisher_key, deadline_day, signature) VALUES (?, ?, ?, ?, ?)",
+                    signatures
+                )
+                self.db.execute_many("INSERT OR IGNORE INTO tender_lsh_buckets (bucket, tender_id) VALUES (?, ?)", buckets)
+            indexed += len(rows)
+    
+    def find_similar(self, tender_data, exclude_id=None):
+        """מכרזים שמורים שדומים למכרז - רשימת (מזהה, דמיון) מהדומה ביותר
+        
+        מכרז אחר מאותו מקור (מזהה חיצוני שונה) אינו מוחזר גם אם הוא דומה.
+        """
+        sig, block = tender_fingerprint(tender_data)
+        if sig is None:
+            return []
+        source, external_id = tender_identity(tender_data)
+        identities = {source: external_id} if source else {}
+        
+        keys = band_keys(sig)
+        rows = self.db.execute(
+            f"""
+            SELECT DISTINCT s.tender_id, s.publisher_key, s.deadline_day, s.signature, t.source, t.external_id
+            FROM tender_lsh_buckets b
+            JOIN tender_signatures s ON s.tender_id = b.tender_id
+            JOIN tenders t ON t.id = s.tender_id
+            WHERE b.bucket IN ({', '.join('?' * len(keys))})
+            """,
+            keys
+        )
+        
+        scores = {}
+        for row in rows:
+            if row['tender_id'] == exclude_id or not same_block(block, (row['publisher_key'], row['deadline_day'])):
+                continue
+            if not can_pair(identities, {row['source']: row['external_id']}):
+                continue
+            score = similarity(sig, unpack_signature(row['signature']))
+            if score >= self.threshold:
+                scores[row['tender_id']] = score
+        
+        # מכרז שמור שכבר קושר אליו מכרז אחר מאותו מקור אינו מתאים
+        if identities and scores:
+            linked = self.db.execute(
+                f"SELECT tender_id, external_id FROM tender_links WHERE source = ? "
+                f"AND tender_id IN ({', '.join('?' * len(scores))})",
+                [source] + list(scores)
+            )
+            for row in linked:
+                if not can_pair(identities, {source: row['external_id']}):
+                    scores.pop(row['tender_id'], None)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    
+    def linked_tenders(self, keys):
+        """המכרזים השמורים שמכרזים קושרו אליהם - מילון (מקור, מזהה חיצוני) -> מזהה מכרז"""
+        by_source = {}
+        for source, external_id in keys:
+            by_source.setdefault(source, []).append(external_id)
+        
+        linked = {}
+        for source, external_ids in by_source.items():
+            for start in range(0, len(external_ids), IN_CLAUSE_CHUNK):
+                chunk = external_ids[start:start + IN_CLAUSE_CHUNK]
+                rows = self.db.execute(
+                    f"SELECT external_id, tender_id FROM tender_links "
+                    f"WHERE source = ? AND external_id IN ({', '.join('?' * len(chunk))})",
+                    [source] + chunk
+                )
+                for row in rows:
+                    linked[(source, row['external_id'])] = row['tender_id']
+        return linked
+    
+    def linked_members(self, tender_ids):
+        """המכרזים השמורים (מתוך tender_ids) שמכרזים ממקור אחר קושרו אליהם - קבוצת מזהים"""
+        tender_ids = list(tender_ids)
+        linked = set()
+        for start in range(0, len(tender_ids), IN_CLAUSE_CHUNK):
+            chunk = tender_ids[start:start + IN_CLAUSE_CHUNK]
+            rows = self.db.execute(
+                f"SELECT DISTINCT tender_id FROM tender_links WHERE tender_id IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            linked.update(row['tender_id'] for row in rows)
+        return linked
+    
+    def add_links(self, links):
+        """קישור מכרזים שמוזגו לתוך מכרז שמור - רשימת (מקור, מזהה חיצוני, מזהה מכרז)"""
+        self.db.execute_many(
+            "INSERT OR REPLACE INTO tender_links (source, external_id, tender_id) VALUES (?, ?, ?)", links
+        )
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Query Cache
+-----------
+מטמון LRU/TTL לתוצאות שאילתות הקריאה, שמתבטל לפי מונה הדור של הנתונים
+"""
+
+import json
+import time
+import threading
+import functools
+from collections import OrderedDict
+
+# המפתח של מונה הדור בטבלת app_meta
+GENERATION_KEY = 'data_generation'
+
+def get_generation(db):
+    """הדור הנוכחי של נתוני המכרזים"""
+    rows = db.execute("SELECT value FROM app_meta WHERE key = ?", (GENERATION_KEY,))
+    return rows[0][0] if rows else 0
+
+def bump_generation(db):
+    """קידום מונה הדור אחרי כתיבה לנתוני המכרזים - מבטל את כל התוצאות שבמטמון"""
+    db.execute("UPDATE app_meta SET value = value + 1 WHERE key = ?", (GENERATION_KEY,))
+    # הקריאה הבאה דרך המטמון של בסיס הנתונים בודקת את הדור מחדש מיד
+    if db.cache is not None:
+        db.cache.expire_generation()
+
+class QueryCache:
+    """מטמון תוצאות עם פינוי LRU, תפוגה לפי זמן וביטול לפי דור הנתונים
+    
+    כל תוצאה נשמרת יחד עם הדור שבו חושבה. כאשר הדור בבסיס הנתונים משתנה
+    (ריצת רענון או כל כתיבה אחרת) המטמון מתרוקן כולו. התוצאות מוחזרות כפי
+    שנשמרו ומשותפות בין הקוראים - אין לשנות אותן.
+    
+    הדור עצמו נקרא מבסיס הנתונים לכל היותר פעם ב-recheck_interval שניות, כך
+    שפגיעה במטמון אינה ניגשת לבסיס הנתונים. כתיבה דרך אותו אובייקט Database
+    מחייבת בדיקה מיידית, וכתיבה מתהליך אחר נראית לכל המאוחר אחרי המרווח.
+    """
+    
+    def __init__(self, max_entries=256, ttl=300, recheck_interval=1.0):
+        """אתחול המטמון
+        
+        max_entries - מספר התוצאות המרבי לפני פינוי הוותיקה ביותר בשימוש
+        ttl - זמן חיים של תוצאה בשניות (None ללא תפוגה), כגיבוי לכתיבות שלא קידמו את הדור
+        recheck_interval - מרווח מינימלי בשניות בין שתי קריאות של הדור מבסיס הנתונים
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.recheck_interval = recheck_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = None
+        self._checked_at = None
+        self.reset_stats()
+    
+    def reset_stats(self):
+        """איפוס מוני הפגיעות וההחטאות"""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.expirations = 0
+            self.invalidations = 0
+    
+    def invalidate(self):
+        """ריקון המטמון"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+    
+    def current_generation(self, read_generation):
+        """הדור שמולו נבדקות התוצאות - read_generation נקראת רק כשעבר recheck_interval מהבדיקה הקודמת"""
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.recheck_interval:
+                return self._generation
+        generation = read_generation()
+        self.observe_generation(generation)
+        return generation
+    
+    def observe_generation(self, generation):
+        """עדכון הדור הידוע מקריאה שנעשתה ממילא, וריקון המטמון אם הדור השתנה"""
+        with self._lock:
+            self._check_generation(generation)
+            self._checked_at = time.monotonic()
+    
+    def expire_generation(self):
+        """חיוב קריאה מחדש של הדור בבדיקה הבאה (אחרי כתיבה מקומית)"""
+        with self._lock:
+            self._checked_at = None
+    
+    def _check_generation(self, generation):
+        """ריקון המטמון כאשר הדור שונה מזה של התוצאות השמורות (בתוך הנעילה)"""
+        if generation != self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._generation = generation
+    
+    def get_or_compute(self, key, generation, compute):
+        """החזרת התוצאה מהמטמון, או חישובה ושמירתה אם אינה קיימת, פגה או מדור קודם"""
+        now = time.monotonic()
+        with self._lock:
+            self._check_generation(generation)
+            
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+        
+        value = compute()
+        
+        with self._lock:
+            # דור חדש נצפה בזמן החישוב - התוצאה לא נשמרת
+            if generation == self._generation:
+                self._entries[key] = (now + self.ttl if self.ttl is not None else None, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+    
+    def stats(self):
+        """מוני המטמון ושיעור הפגיעות"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'generation': self._generation
+            }
+
+def cached_read(method):
+    """שמירת תוצאת מתודת קריאה של מודל במטמון של בסיס הנתונים (db.cache)
+    
+    המפתח הוא שם המתודה והפרמטרים. בתוך טרנזקציה המטמון אינו בשימוש, כדי
+    שתוצאות של כתיבה שעדיין לא נשמרה (ואולי תבוטל) לא יישמרו בו. הדור נבדק
+    דרך current_generation, כך שפגיעה במטמון אינה שולחת שאילתה.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.db.cache
+        if cache is None or self.db.in_transaction:
+            return method(self, *args, **kwargs)
+        
+        key = (method.__qualname__, json.dumps([args, kwargs], sort_keys=True, ensure_ascii=False, default=str))
+        generation = cache.current_generation(lambda: get_generation(self.db))
+        return cache.get_or_compute(key, generation, lambda: method(self, *args, **kwargs))
+    return wrapper
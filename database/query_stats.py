@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Query Statistics
+----------------
+איסוף זמני ריצה של שאילתות SQL ותיעוד שאילתות איטיות עם תוכנית הביצוע שלהן
+"""
+
+import re
+import json
+import logging
+import threading
+from functools import lru_cache
+
+logger = logging.getLogger('slow_queries')
+
+# גבולות עליונים (במילישניות) של תאי ההיסטוגרמה
+HISTOGRAM_BOUNDS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float('inf'))
+
+STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'IN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+WHITESPACE_RE = re.compile(r'\s+')
+
+@lru_cache(maxsize=1024)
+def normalize_sql(query):
+    """נרמול שאילתה למפתח צבירה: ליטרלים הופכים ל-? ורשימות IN מקוצרות"""
+    normalized = STRING_LITERAL_RE.sub('?', query)
+    normalized = NUMBER_LITERAL_RE.sub('?', normalized)
+    normalized = IN_LIST_RE.sub('IN (...)', normalized)
+    return WHITESPACE_RE.sub(' ', normalized).strip()
+
+class QueryStats:
+    """צבירת זמני ריצה לפי שאילתה מנורמלת ותיעוד שאילתות איטיות"""
+    
+    def __init__(self, slow_query_ms=100, explain_slow=True, max_slow_queries=100):
+        """אתחול הצבירה
+        
+        slow_query_ms - סף במילישניות שמעליו שאילתה נרשמת ביומן השאילתות האיטיות
+        explain_slow - צירוף פלט EXPLAIN QUERY PLAN לכל שאילתה איטית
+        max_slow_queries - מספר השאילתות האיטיות האחרונות שנשמרות בזיכרון
+        """
+        self.slow_query_ms = slow_query_ms
+        self.explain_slow = explain_slow
+        self.max_slow_queries = max_slow_queries
+        self._lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """איפוס כל הנתונים שנאספו"""
+        with self._lock:
+            self._entries = {}
+            self.slow_queries = []
+    
+    def record(self, query, elapsed, rows, conn=None, params=None):
+        """רישום ריצה של שאילתה
+        
+        elapsed - משך הריצה בשניות
+        rows - מספר השורות שהוחזרו או שהושפעו
+        conn / params - לצורך הרצת EXPLAIN QUERY PLAN כאשר השאילתה איטית
+        """
+        key = normalize_sql(query)
+        elapsed_ms = elapsed * 1000
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'rows': 0,
+                    'histogram': [0] * len(HISTOGRAM_BOUNDS_MS)
+                }
+            entry['count'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += max(rows, 0)
+            entry['histogram'][next(i for i, bound in enumerate(HISTOGRAM_BOUNDS_MS) if elapsed_ms <= bound)] += 1
+        
+        if elapsed_ms >= self.slow_query_ms:
+            self._record_slow(key, query, elapsed_ms, rows, conn, params)
+    
+    def _record_slow(self, key, query, elapsed_ms, rows, conn, params):
+        """תיעוד שאילתה איטית עם תוכנית הביצוע שלה"""
+        plan = []
+        if self.explain_slow and conn is not None:
+            try:
+                plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params or ())]
+            except Exception as e:
+                plan = [f"EXPLAIN נכשל: {e}"]
+        
+        slow_query = {'query': key, 'ms': round(elapsed_ms, 3), 'rows': rows, 'plan': plan}
+        with self._lock:
+            self.slow_queries.append(slow_query)
+            del self.slow_queries[:-self.max_slow_queries]
+        
+        logger.warning(f"שאילתה איטית ({elapsed_ms:.1f}ms, {rows} שורות): {key} | תוכנית: {' / '.join(plan)}")
+    
+    def report(self):
+        """סיכום הנתונים לפי שאילתה, ממוין לפי הזמן המצטבר"""
+        with self._lock:
+            entries = [(key, dict(entry, histogram=list(entry['histogram']))) for key, entry in self._entries.items()]
+        
+        report = []
+        for key, entry in entries:
+            report.append({
+                'query': key,
+                'count': entry['count'],
+                'total_ms': round(entry['total_ms'], 3),
+                'avg_ms': round(entry['total_ms'] / entry['count'], 3),
+                'p50_ms': self._percentile(entry, 0.5),
+                'p95_ms': self._percentile(entry, 0.95),
+                'max_ms': round(entry['max_ms'], 3),
+                'rows': entry['rows'],
+                'histogram': {
+                    ('inf' if bound == float('inf') else str(bound)): count
+                    for bound, count in zip(HISTOGRAM_BOUNDS_MS, entry['histogram'])
+                }
+            })
+        
+        report.sort(key=lambda item: item['total_ms'], reverse=True)
+        return report
+    
+    @staticmethod
+    def _percentile(entry, fraction):
+        """אומדן אחוזון לפי הגבול העליון של תא ההיסטוגרמה (המקסימום בתא האחרון)"""
+        target = entry['count'] * fraction
+        seen = 0
+        for bound, count in zip(HISTOGRAM_BOUNDS_MS, entry['histogram']):
+            seen += count
+            if seen >= target:
+                return round(min(bound, entry['max_ms']), 3)
+        return round(entry['max_ms'], 3)
+    
+    def format_summary(self, limit=10):
+        """סיכום טקסטואלי של השאילתות היקרות ביותר"""
+        report = self.report()
+        lines = [f"סטטיסטיקת שאילתות: {sum(item['count'] for item in report)} הרצות, {len(report)} שאילתות שונות, {len(self.slow_queries)} איטיות"]
+        for item in report[:limit]:
+            lines.append(
+                f"  {item['total_ms']:.1f}ms סה\"כ | {item['count']} הרצות | ממוצע {item['avg_ms']:.2f}ms | "
+                f"p95 {item['p95_ms']}ms | {item['query'][:120]}"
+            )
+        for slow_query in self.slow_queries[-limit:]:
+            lines.append(f"  איטית: {slow_query['ms']:.1f}ms | {slow_query['query'][:120]} | {' / '.join(slow_query['plan'])}")
+        return '\n'.join(lines)
+    
+    def dump(self, path):
+        """כתיבת כל הנתונים שנאספו לקובץ JSON"""
+        with self._lock:
+            slow_queries = list(self.slow_queries)
+        
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'queries': self.report(), 'slow_queries': slow_queries}, f, ensure_ascii=False, indent=2)
+        return path
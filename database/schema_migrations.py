@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Schema Migrations
+-----------------
+הרצת מיגרציות ממוספרות לפי PRAGMA user_version של בסיס הנתונים
+"""
+
+import os
+import re
+import sqlite3
+from collections import namedtuple
+
+# תיקיית קבצי המיגרציה (0002_name.sql, 0003_name.sql ...)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# גרסה 1 היא schema.sql עצמו
+INITIAL_VERSION = 1
+
+MIGRATION_FILE_RE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+# סימון למיגרציות שאינן מועתקות ל-Cloudflare D1 (למשל כאלה שתלויות בפונקציות Python)
+D1_SKIP_MARKER = '-- d1: skip'
+
+Migration = namedtuple('Migration', ['version', 'name', 'path'])
+
+def load_migrations(schema_path, migrations_dir=MIGRATIONS_DIR):
+    """רשימת המיגרציות לפי סדר הגרסאות, החל מ-schema.sql כגרסה 1"""
+    migrations = [Migration(INITIAL_VERSION, 'initial', str(schema_path))]
+    if os.path.isdir(migrations_dir):
+        for filename in sorted(os.listdir(migrations_dir)):
+            match = MIGRATION_FILE_RE.match(filename)
+            if match:
+                migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(migrations_dir, filename)))
+    
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions) or versions != sorted(versions) or versions[0] != INITIAL_VERSION:
+        raise ValueError(f"מספור המיגרציות אינו תקין: {versions}")
+    return migrations
+
+def read_migration(migration):
+    """קריאת תוכן קובץ המיגרציה"""
+    with open(migration.path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def is_d1_compatible(sql):
+    """האם המיגרציה מתאימה להרצה ב-Cloudflare D1"""
+    return D1_SKIP_MARKER not in sql
+
+def split_statements(sql):
+    """פירוק סקריפט SQL לפקודות בודדות (כולל טריגרים עם ; בתוכם)"""
+    statements = []
+    current = ''
+    for line in sql.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            statement = current.strip()
+            if statement.rstrip(';').strip():
+                statements.append(statement)
+            current = ''
+    if current.strip() and not all(line.strip().startswith('--') for line in current.strip().splitlines()):
+        raise ValueError(f"פקודת SQL לא שלמה בסוף הסקריפט: {current.strip()[:80]}")
+    return statements
+
+def get_version(db):
+    """גרסת הסכמה הנוכחית של בסיס הנתונים"""
+    return db.execute("PRAGMA user_version")[0][0]
+
+def migrate(db, schema_path, migrations_dir=MIGRATIONS_DIR):
+    """החלת המיגרציות החסרות והחזרת רשימת הגרסאות שהוחלו
+    
+    כל מיגרציה רצה בטרנזקציה משלה יחד עם עדכון user_version, כך שכישלון
+    משאיר את בסיס הנתונים בגרסה הקודמת. בסיס נתונים שנוצר לפני מנגנון
+    הגרסאות (user_version 0 עם טבלת tenders) מסומן כגרסה 1, והמיגרציות
+    שאחריה מוחלות עליו - הן כתובות כך שניתן להחיל אותן על סכמה שכבר שודרגה חלקית.
+    """
+    version = get_version(db)
+    if version == 0:
+        tables = db.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'tenders'")
+        if tables:
+            db.execute(f"PRAGMA user_version = {INITIAL_VERSION}")
+            version = INITIAL_VERSION
+    
+    applied = []
+    for migration in load_migrations(schema_path, migrations_dir):
+        if migration.version <= version:
+            continue
+        
+        with db.transaction(immediate=True):
+            for statement in split_statements(read_migration(migration)):
+                try:
+                    db.execute(statement)
+                except sqlite3.OperationalError as e:
+                    # עמודה שכבר נוספה בבסיס נתונים שקדם למנגנון הגרסאות
+                    if 'duplicate column name' not in str(e):
+                        raise
+            db.execute(f"PRAGMA user_version = {migration.version}")
+        applied.append(migration.version)
+    return applied
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Static JSON Shards
+------------------
+בניית קבצי JSON סטטיים דחוסים לאפליקציה אחרי כל ריצת רענון
+
+הקבצים נכתבים לתיקייה public של אפליקציית ה-Next.js ומוגשים כקבצים סטטיים:
+    index.json                      מספר העמודים, הקטגוריות והמקורות ונתיבי הקבצים שלהם
+    pages/<n>.json.gz               עמוד n ברשימת המכרזים (1 הוותיק ביותר, pages החדש ביותר)
+    categories/<category_id>.json.gz  כל המכרזים בקטגוריה
+    sources/<source>.json.gz        כל המכרזים ממקור
+    tenders/<id>.json.gz            מכרז בודד עם הקטגוריות, אנשי הקשר והמסמכים
+
+לכל קובץ נשמר גיבוב של הקלט שלו (המזהים וגיבובי התוכן של המכרזים שבו), וקובץ
+נכתב מחדש רק כאשר הגיבוב השתנה. קבצים שכבר אינם שייכים לאף קלט נמחקים.
+העמודים ממוספרים מהמכרז הוותיק ביותר, כך שמכרזים חדשים משנים רק את העמודים
+האחרונים ולא מזיזים את כל הרשימה. בתוך כל עמוד המכרזים מסודרים מהחדש לישן.
+"""
+
+import os
+import re
+import gzip
+import json
+import time
+import hashlib
+from datetime import datetime
+from models import TenderModel, initialize_database, IN_CLAUSE_CHUNK
+from query_cache import get_generation
+
+# מספר המכרזים בכל עמוד ברשימה
+PAGE_SIZE = 50
+
+# עמודות המכרז שנכללות ברשימות (המכרז המלא נמצא בקובץ של המכרז הבודד)
+SUMMARY_COLUMNS = (
+    'id', 'external_id', 'title', 'publisher', 'publish_date', 'submission_date',
+    'status', 'source', 'url', 'publish_ts', 'submission_ts'
+)
+
+# קובץ מצב הבנייה - גיבוב הקלט של כל קובץ ודור הנתונים של הבנייה האחרונה
+STATE_FILE = '.shards_state.json'
+
+def _slug(value):
+    """שם קובץ בטוח לערך טקסטואלי (למשל שם מקור)"""
+    return re.sub(r'[^\w.-]+', '_', value).strip('_') or '_'
+
+def _digest(parts):
+    """גיבוב קצר של רשימת ערכים"""
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+def _write_atomic(path, data):
+    """כתיבת קובץ דרך קובץ זמני, כך שקורא אף פעם לא רואה קובץ חלקי"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+def _serialize(payload, compress=True):
+    """JSON קומפקטי, דחוס ב-gzip עם חותמת זמן קבועה כדי שתוכן זהה ייתן קובץ זהה"""
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+    return gzip.compress(data, compresslevel=9, mtime=0) if compress else data
+
+class ShardBuilder:
+    """בניית קבצי ה-JSON הסטטיים ממצב בסיס הנתונים"""
+    
+    def __init__(self, db, output_dir, page_size=PAGE_SIZE):
+        """אתחול הבנייה מול בסיס נתונים ותיקיית פלט"""
+        self.db = db
+        self.output_dir = output_dir
+        self.page_size = page_size
+    
+    def _load_state(self):
+        """מצב הבנייה הקודמת"""
+        try:
+            with open(os.path.join(self.output_dir, STATE_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'generation': None, 'digests': {}}
+    
+    def plan(self):
+        """חישוב רשימת הקבצים הנדרשים: נתיב -> (גיבוב הקלט, סוג, מפתח, מזהי המכרזים)
+        
+        נשלפים רק המזהים וגיבובי התוכן של המכרזים - התוכן עצמו נשלף רק
+        עבור קבצים שצריך לכתוב.
+        """
+        tenders = []
+        stamps = {}
+        by_source = {}
+        for row in self.db.iter_query(
+            "SELECT id, source, content_hash, updated_at FROM tenders ORDER BY publish_ts DESC, id DESC"
+        ):
+            tenders.append(row['id'])
+            stamps[row['id']] = row['content_hash'] or str(row['updated_at'])
+            by_source.setdefault(row['source'], []).append(row['id'])
+        
+        categories = {row['id']: row['name'] for row in self.db.execute("SELECT id, name FROM categories")}
+        by_category = {}
+        for row in self.db.iter_query(
+            "SELECT tc.category_id, tc.tender_id FROM tender_categories tc "
+            "JOIN tenders t ON t.id = tc.tender_id ORDER BY t.publish_ts DESC, t.id DESC"
+        ):
+            by_category.setdefault(row['category_id'], []).append(row['tender_id'])
+        
+        shards = {}
+        
+        def add(path, kind, key, ids, extra=None):
+            """הוספת קובץ לתוכנית עם גיבוב של המזהים וגיבובי התוכן שלהם"""
+            shards[path] = (_digest([extra, [(tender_id, stamps[tender_id]) for tender_id in ids]]), kind, key, ids)
+        
+        # חלוקה לעמודים מהסוף (הוותיק ביותר) - העמוד האחרון, החדש ביותר, יכול להיות חלקי
+        oldest_first = tenders[::-1]
+        for number, start in enumerate(range(0, len(oldest_first), self.page_size), 1):
+            add(f"pages/{number}.json.gz", 'page', number, oldest_first[start:start + self.page_size][::-1])
+        for category_id, ids in by_category.items():
+            add(f"categories/{category_id}.json.gz", 'category', category_id, ids, categories.get(category_id))
+        for source, ids in by_source.items():
+            add(f"sources/{_slug(source)}.json.gz", 'source', source, ids, source)
+        for tender_id in tenders:
+            add(f"tenders/{tender_id}.json.gz", 'tender', tender_id, [tender_id])
+        
+        index = {
+            'page_size': self.page_size,
+            'total': len(tenders),
+            'pages': -(-len(tenders) // self.page_size),
+            'categories': sorted(
+                (
+                    {'id': category_id, 'name': categories.get(category_id), 'count': len(ids),
+                     'path': f"categories/{category_id}.json.gz"}
+                    for category_id, ids in by_category.items()
+                ),
+                key=lambda item: (-item['count'], item['name'] or '')
+            ),
+            'sources': sorted(
+                (
+                    {'name': source, 'count': len(ids), 'path': f"sources/{_slug(source)}.json.gz"}
+                    for source, ids in by_source.items()
+                ),
+                key=lambda item: -item['count']
+            )
+        }
+        return shards, index
+    
+    def _summaries(self, ids):
+        """שורות התקציר של מכרזים לפי הסדר שהתקבל"""
+        rows = {}
+        for start in range(0, len(ids), IN_CLAUSE_CHUNK):
+            chunk = ids[start:start + IN_CLAUSE_CHUNK]
+            query = f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM tenders WHERE id IN ({', '.join('?' * len(chunk))})"
+            for row in self.db.execute(query, chunk):
+                rows[row['id']] = dict(row)
+        return [rows[tender_id] for tender_id in ids if tender_id in rows]
+    
+    def _render(self, kind, key, ids, index):
+        """תוכן הקובץ לפי סוגו"""
+        if kind == 'page':
+            return {'page': key, 'items': self._summaries(ids)}
+        if kind == 'category':
+            name = next((item['name'] for item in index['categories'] if item['id'] == key), None)
+            return {'category': {'id': key, 'name': name}, 'items': self._summaries(ids)}
+        return {'source': key, 'items': self._summaries(ids)}
+    
+    def build(self, force=False):
+        """בניית הקבצים שהקלט שלהם השתנה ומחיקת קבצים שאינם נדרשים עוד
+        
+        ללא שינוי בדור הנתונים מאז הבנייה הקודמת לא נעשה דבר (אלא אם force).
+        מחזיר דוח עם מספר הקבצים שנכתבו, שלא השתנו ושנמחקו ומשך הבנייה.
+        """
+        started = time.perf_counter()
+        state = self._load_state()
+        generation = get_generation(self.db)
+        if not force and state.get('generation') == generation and os.path.exists(os.path.join(self.output_dir, 'index.json')):
+            return {'generation': generation, 'written': 0, 'unchanged': len(state['digests']), 'removed': 0,
+                    'seconds': time.perf_counter() - started}
+        
+        shards, index = self.plan()
+        previous = {} if force else state.get('digests', {})
+        changed = [
+            path for path, (digest, _, _, _) in shards.items()
+            if previous.get(path) != digest or not os.path.exists(os.path.join(self.output_dir, path))
+        ]
+        
+        # קבצי המכרזים הבודדים נשלפים יחד עם הקשרים שלהם במנות
+        tender_model = TenderModel(self.db)
+        tender_paths = [path for path in changed if shards[path][1] == 'tender']
+        for start in range(0, len(tender_paths), IN_CLAUSE_CHUNK):
+            chunk = tender_paths[start:start + IN_CLAUSE_CHUNK]
+            for tender in tender_model.get_many_with_relations([shards[path][2] for path in chunk]):
+                _write_atomic(os.path.join(self.output_dir, f"tenders/{tender['id']}.json.gz"), _serialize(tender))
+        
+        for path in changed:
+            _, kind, key, ids = shards[path]
+            if kind != 'tender':
+                _write_atomic(os.path.join(self.output_dir, path), _serialize(self._render(kind, key, ids, index)))
+        
+        removed = 0
+        for path in set(state.get('digests', {})) - set(shards):
+            try:
+                os.remove(os.path.join(self.output_dir, path))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        
+        index.update(generation=generation, built_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        _write_atomic(os.path.join(self.output_dir, 'index.json'), _serialize(index, compress=False))
+        _write_atomic(
+            os.path.join(self.output_dir, STATE_FILE),
+            _serialize({'generation': generation, 'digests': {path: shard[0] for path, shard in shards.items()}}, compress=False)
+        )
+        
+        return {
+            'generation': generation,
+            'written': len(changed),
+            'unchanged': len(shards) - len(changed),
+            'removed': removed,
+            'seconds': time.perf_counter() - started
+        }
+
+def main():
+    """בניית הקבצים הסטטיים מבסיס הנתונים הראשי"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    db_path = os.path.join(base_dir, 'database', 'tenders.db')
+    schema_path = os.path.join(base_dir, 'database', 'schema.sql')
+    output_dir = os.path.join(base_dir, 'carpentry-tenders-app', 'public', 'data')
+    
+    db = initialize_database(db_path, schema_path)
+    report = ShardBuilder(db, output_dir).build()
+    print(
+        f"נכתבו {report['written']} קבצים, {report['unchanged']} ללא שינוי, "
+        f"{report['removed']} נמחקו ({report['seconds']:.2f} שניות) בתיקייה {output_dir}"
+    )
+    db.close_all()
+    return report
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tender Date Normalization
+-------------------------
+המרת תאריכי המכרזים כפי שנאספו מהאתרים לחותמת זמן מספרית הניתנת לאינדקס
+"""
+
+import re
+import calendar
+from datetime import datetime
+
+try:
+    from zoneinfo import ZoneInfo
+    ISRAEL_TZ = ZoneInfo('Asia/Jerusalem')
+except Exception:
+    # ללא מסד אזורי זמן - שימוש בשעון המקומי של השרת
+    ISRAEL_TZ = None
+
+# תאריך בפורמט ישראלי (dd/mm/yyyy, dd.mm.yy, dd-mm-yyyy) עם שעה אופציונלית
+DMY_RE = re.compile(r'(\d{1,2})[/.\-](\d{1,2})[/.\-](\d{4}|\d{2})(?:\D+?(\d{1,2}):(\d{2}))?')
+
+# תאריך בפורמט ISO (yyyy-mm-dd) עם שעה אופציונלית
+ISO_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?:[T ](\d{1,2}):(\d{2}))?')
+
+def parse_tender_date(text):
+    """המרת טקסט תאריך לחותמת זמן (שניות מ-1970) או None אם לא זוהה תאריך
+    
+    התאריכים באתרים הם לפי שעון ישראל ונשמרים כפי שהם, כאילו היו UTC,
+    ולכן יש להשוות אותם רק מול now_timestamp().
+    """
+    if not text or not isinstance(text, str):
+        return None
+    
+    match = ISO_RE.search(text)
+    if match:
+        year, month, day, hour, minute = match.groups()
+    else:
+        match = DMY_RE.search(text)
+        if not match:
+            return None
+        day, month, year, hour, minute = match.groups()
+        if len(year) == 2:
+            year = f"20{year}"
+    
+    try:
+        moment = datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0))
+    except ValueError:
+        return None
+    return calendar.timegm(moment.timetuple())
+
+def now_timestamp():
+    """השעה הנוכחית בישראל באותו ייצוג של parse_tender_date"""
+    now = datetime.now(ISRAEL_TZ) if ISRAEL_TZ else datetime.now()
+    return calendar.timegm(now.timetuple())
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tender Record
+-------------
+רשומת מכרז קומפקטית לצינור האיסוף, העיבוד והייבוא, והמרתה מקבצי JSON ו-CSV ואליהם
+"""
+
+import sys
+import csv
+import json
+from datetime import datetime
+
+# שדות המכרז האחיד, לפי סדר הכתיבה לקבצי JSON ו-CSV
+TENDER_FIELDS = (
+    'id', 'source', 'title', 'publisher', 'publish_date', 'submission_date', 'status',
+    'url', 'description', 'contact', 'documents', 'categories', 'scrape_date'
+)
+
+# שדות שמכילים מילון או רשימה - נכתבים ב-CSV כ-JSON
+COMPLEX_FIELDS = {'contact': dict, 'documents': list, 'categories': list, 'merged_from': list}
+
+# ערכים שחוזרים במכרזים רבים - נשמרים כמחרוזת משותפת אחת בזיכרון
+INTERNED_FIELDS = frozenset(('source', 'publisher', 'status', 'publish_date', 'submission_date'))
+
+RECORD_FIELDS = frozenset(TENDER_FIELDS + ('tender_id', 'merged_from'))
+
+# סדר העדיפות של המקורות במיזוג כפילויות - המקור הרשמי קודם
+SOURCE_PRECEDENCE = ('mr.gov.il', 'govi.co.il', 'wizbiz.co.il')
+
+# שדות שמשתנים לאורך חיי המכרז (סטטוס, הארכת מועד הגשה) - במיזוג נלקחים מהסריקה העדכנית ביותר
+FRESHNESS_FIELDS = ('status', 'submission_date', 'scrape_date')
+
+# ערכים שהסורקים כותבים כאשר שדה חסר
+PLACEHOLDER_VALUES = ('', 'לא צוין')
+
+_MISSING = object()
+
+class Tender:
+    """רשומת מכרז עם __slots__ במקום מילון לכל מכרז
+    
+    שדות שאינם חלק מהמבנה האחיד (למשל details_url או tender_type של סורק
+    מסוים) נשמרים במילון extra, שנוצר רק כאשר יש בו ערכים. הרשומה תומכת
+    ב-get ובגישה בסוגריים כמו מילון, כך שהמודלים מקבלים אותה במקום מילון.
+    """
+    
+    __slots__ = TENDER_FIELDS + ('tender_id', 'merged_from', 'extra')
+    
+    def __init__(self, **fields):
+        """יצירת רשומה משדות בשם - שדות לא מוכרים נשמרים ב-extra"""
+        for field in TENDER_FIELDS:
+            setattr(self, field, None if field in COMPLEX_FIELDS else '')
+        self.tender_id = None
+        self.merged_from = None
+        self.extra = None
+        self.update(fields)
+    
+    def __setattr__(self, name, value):
+        """שמירת ערכים חוזרים כמחרוזת משותפת"""
+        if name in INTERNED_FIELDS and type(value) is str:
+            value = sys.intern(value)
+        object.__setattr__(self, name, value)
+    
+    def update(self, fields):
+        """מיזוג שדות לתוך הרשומה במקום (תחליף ל-{**tender, **details})"""
+        for key, value in fields.items():
+            if key in RECORD_FIELDS:
+                setattr(self, key, value)
+            else:
+                if self.extra is None:
+                    self.extra = {}
+                self.extra[key] = value
+        return self
+    
+    def get(self, key, default=None):
+        """ערך שדה לפי שם, כמו dict.get"""
+        if key in RECORD_FIELDS:
+            value = getattr(self, key)
+            return default if value is None else value
+        if self.extra is None:
+            return default
+        return self.extra.get(key, default)
+    
+    def __getitem__(self, key):
+        """גישה לשדה בסוגריים, כמו במילון"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __contains__(self, key):
+        """האם לשדה יש ערך"""
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def __eq__(self, other):
+        """השוואת רשומות לפי התוכן"""
+        if not isinstance(other, Tender):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+    
+    def __repr__(self):
+        """ייצוג קצר לצורכי דיבאג"""
+        return f"Tender(source={self.source!r}, id={self.id!r}, title={self.title!r})"
+    
+    def standardize(self):
+        """השלמת השדות האחידים מהשדות הייחודיים לכל סורק, במקום יצירת מכרז חדש
+        
+        כותרת ללא ערך נלקחת מהתיאור, כתובת מ-details_url ותיאור מ-full_description.
+        שדות ייחודיים לסורק מוסרים לאחר ההשלמה.
+        """
+        if not self.title:
+            self.title = self.description or ''
+        if not self.url:
+            self.url = self.get('details_url', '')
+        if not self.description:
+            self.description = self.get('full_description', '')
+        if not self.scrape_date:
+            self.scrape_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.extra = None
+        return self
+    
+    def filled_count(self):
+        """מספר השדות שיש בהם ערך"""
+        count = sum(1 for field in TENDER_FIELDS if getattr(self, field))
+        return count + sum(1 for value in (self.extra or {}).values() if value)
+    
+    def to_dict(self):
+        """המרה למילון במבנה האחיד (כמו בקבצי ה-JSON)"""
+        data = {}
+        for field in TENDER_FIELDS:
+            value = getattr(self, field)
+            data[field] = COMPLEX_FIELDS[field]() if value is None and field in COMPLEX_FIELDS else value
+        if self.tender_id is not None:
+            data['tender_id'] = self.tender_id
+        if self.merged_from:
+            data['merged_from'] = self.merged_from
+        if self.extra:
+            data.update(self.extra)
+        return data
+    
+    @classmethod
+    def from_dict(cls, data):
+        """יצירת רשומה ממילון (למשל מקובץ JSON)"""
+        return cls(**data)
+    
+    @classmethod
+    def from_row(cls, row, categories=None, contacts=None, documents=None):
+        """יצירת רשומה משורת מכרז בבסיס הנתונים ומהרשומות הקשורות אליה"""
+        tender = cls(
+            id=row['external_id'],
+            source=row['source'],
+            title=row['title'],
+            publisher=row['publisher'],
+            publish_date=row['publish_date'] or '',
+            submission_date=row['submission_date'] or '',
+            status=row['status'] or '',
+            url=row['url'] or '',
+            description=row['description'] or '',
+            tender_id=row['id']
+        )
+        if categories:
+            tender.categories = [category['name'] for category in categories]
+        if contacts:
+            tender.contact = {key: contacts[0][key] or '' for key in ('name', 'email', 'phone')}
+        if documents:
+            tender.documents = [{'name': doc['name'], 'url': doc['url'] or ''} for doc in documents]
+        return tender
+    
+    def to_csv_row(self):
+        """המרה לשורת CSV - שדות מורכבים נכתבים כ-JSON"""
+        row = self.to_dict()
+        for field, value in row.items():
+            if isinstance(value, (dict, list)):
+                row[field] = json.dumps(value, ensure_ascii=False)
+        return row
+    
+    @classmethod
+    def from_csv_row(cls, row):
+        """יצירת רשומה משורת CSV שנכתבה ב-to_csv_row"""
+        fields = {}
+        for key, value in row.items():
+            if key in COMPLEX_FIELDS and value:
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+            elif key == 'tender_id':
+                value = int(value) if value else None
+            fields[key] = value
+        return cls(**fields)
+
+def _has_value(value):
+    """האם לשדה יש ערך אמיתי (לא ריק ולא 'לא צוין')"""
+    if isinstance(value, str):
+        return value.strip() not in PLACEHOLDER_VALUES
+    return bool(value)
+
+def _source_rank(tender):
+    """מיקום המקור בסדר העדיפות (מקור לא מוכר אחרון)"""
+    try:
+        return SOURCE_PRECEDENCE.index(tender.source)
+    except ValueError:
+        return len(SOURCE_PRECEDENCE)
+
+def merge_tenders(tenders):
+    """מיזוג רשומות של אותו מכרז ממקורות שונים לרשומה אחת, שדה אחר שדה
+    
+    שדה רגיל נלקח מהרשומה הראשונה שיש בה ערך לפי עדיפות המקור ואחריה
+    עדכניות הסריקה, ושדות FRESHNESS_FIELDS לפי עדכניות הסריקה ואחריה עדיפות
+    המקור. המסמכים מאוחדים לפי כתובת, הקטגוריות לפי שם ופרטי איש הקשר לפי
+    מפתח. המזהה והמקור של הרשומה הממוזגת הם של הרשומה המועדפת, ו-merged_from
+    מתעד את כל הרשומות שנמזגו ואת השדות שכל אחת תרמה. רשומה יחידה מוחזרת כפי שהיא.
+    
+    מותר למזג רק רשומות ממקורות שונים או רשומות של אותו מכרז (אותו מקור ומזהה) -
+    שתי רשומות מאותו מקור עם מזהים שונים הן שני מכרזים, ומיזוגן זורק ValueError.
+    """
+    identities = {}
+    for tender in tenders:
+        if tender.source and identities.setdefault(tender.source, tender.id) != tender.id:
+            raise ValueError(
+                f"לא ניתן למזג מכרזים שונים מאותו מקור ({tender.source}): {identities[tender.source]}, {tender.id}"
+            )
+    
+    if len(tenders) == 1:
+        return tenders[0]
+    
+    # מיון יציב: עדיפות מקור ואז סריקה עדכנית קודם, ולהפך לשדות המשתנים
+    by_precedence = sorted(tenders, key=lambda tender: tender.scrape_date or '', reverse=True)
+    by_precedence.sort(key=_source_rank)
+    by_freshness = sorted(tenders, key=_source_rank)
+    by_freshness.sort(key=lambda tender: tender.scrape_date or '', reverse=True)
+    
+    primary = by_precedence[0]
+    merged = Tender(id=primary.id, source=primary.source)
+    contributed = {id(tender): [] for tender in tenders}
+    
+    for field in TENDER_FIELDS:
+        if field in ('id', 'source') or field in COMPLEX_FIELDS:
+            continue
+        candidates = by_freshness if field in FRESHNESS_FIELDS else by_precedence
+        donor = next((tender for tender in candidates if _has_value(getattr(tender, field))), None)
+        if donor is not None:
+            setattr(merged, field, getattr(donor, field))
+            contributed[id(donor)].append(field)
+        else:
+            setattr(merged, field, getattr(primary, field))
+    
+    # איש קשר - כל פרט מהרשומה המועדפת שיש בה אותו
+    contact = {}
+    for tender in by_precedence:
+        for key, value in (tender.contact or {}).items():
+            if key not in contact and _has_value(value):
+                contact[key] = value
+                if 'contact' not in contributed[id(tender)]:
+                    contributed[id(tender)].append('contact')
+    merged.contact = contact or None
+    
+    # מסמכים לפי כתובת (מסמך ללא כתובת לפי שם) וקטגוריות לפי שם, לפי סדר העדיפות
+    documents = {}
+    categories = {}
+    for tender in by_precedence:
+        for document in tender.documents or []:
+            key = document.get('url') or document.get('name')
+            if key not in documents:
+                documents[key] = document
+                if 'documents' not in contributed[id(tender)]:
+                    contributed[id(tender)].append('documents')
+        for category in tender.categories or []:
+            if category not in categories:
+                categories[category] = True
+                if 'categories' not in contributed[id(tender)]:
+                    contributed[id(tender)].append('categories')
+    merged.documents = list(documents.values()) or None
+    merged.categories = list(categories) or None
+    
+    merged.merged_from = [
+        {'source': tender.source, 'id': tender.id, 'fields': contributed[id(tender)]}
+        for tender in by_precedence
+    ]
+    return merged
+
+def as_tender(tender):
+    """המרת מילון לרשומת מכרז (רשומה קיימת מוחזרת כפי שהיא)"""
+    return tender if isinstance(tender, Tender) else Tender.from_dict(tender)
+
+def read_json(path):
+    """קריאת רשימת מכרזים מקובץ JSON"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [Tender.from_dict(data) for data in json.load(f)]
+
+def write_json(tenders, path):
+    """כתיבת רשימת מכרזים לקובץ JSON"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump([as_tender(tender).to_dict() for tender in tenders], f, ensure_ascii=False, indent=2)
+    return path
+
+def read_csv(path):
+    """קריאת רשימת מכרזים מקובץ CSV"""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        return [Tender.from_csv_row(row) for row in csv.DictReader(f)]
+
+def write_csv(tenders, path):
+    """כתיבת רשימת מכרזים לקובץ CSV (UTF-8 עם BOM לפתיחה תקינה באקסל)"""
+    rows = [as_tender(tender).to_csv_row() for tender in tenders]
+    
+    # השדות האחידים ואחריהם שדות נוספים לפי סדר הופעתם
+    fieldnames = list(TENDER_FIELDS)
+    for row in rows:
+        fieldnames.extend(key for key in row if key not in fieldnames)
+    
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
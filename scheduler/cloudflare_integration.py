@@ -17,6 +17,11 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent
 NEXTJS_APP_DIR = BASE_DIR / "carpentry-tenders-app"
 MIGRATIONS_DIR = NEXTJS_APP_DIR / "migrations"
+DATABASE_DIR = BASE_DIR / "database"
+
+# מיגרציות הסכמה המשותפות לבסיס הנתונים המקומי
+sys.path.append(str(DATABASE_DIR))
+from schema_migrations import load_migrations, read_migration, is_d1_compatible
 
 # הגדרת לוגר
 logging.basicConfig(
@@ -30,31 +35,38 @@ logging.basicConfig(
 logger = logging.getLogger("cloudflare_integration")
 
 def create_migration_file():
-    """יצירת קובץ מיגרציה לבסיס הנתונים של Cloudflare D1"""
-    logger.info("יוצר קובץ מיגרציה לבסיס הנתונים של Cloudflare D1")
+    """יצירת קבצי המיגרציה לבסיס הנתונים של Cloudflare D1
+    
+    schema.sql נכתב כ-0001_initial.sql, ואחריו מיגרציות הסכמה הממוספרות של
+    בסיס הנתונים המקומי באותם שמות - פרט לאלה שמסומנות כלא מתאימות ל-D1.
+    """
+    logger.info("יוצר קבצי מיגרציה לבסיס הנתונים של Cloudflare D1")
     
     # קריאת סכמת בסיס הנתונים המקורית
-    schema_path = BASE_DIR / "database" / "schema.sql"
+    schema_path = DATABASE_DIR / "schema.sql"
     if not schema_path.exists():
         logger.error(f"קובץ הסכמה {schema_path} לא נמצא")
         return False
     
     try:
-        with open(schema_path, 'r') as f:
-            schema_sql = f.read()
-        
         # יצירת תיקיית המיגרציות אם לא קיימת
         MIGRATIONS_DIR.mkdir(exist_ok=True)
         
-        # כתיבת קובץ המיגרציה
-        migration_path = MIGRATIONS_DIR / "0001_initial.sql"
-        with open(migration_path, 'w') as f:
-            f.write(schema_sql)
+        for migration in load_migrations(schema_path):
+            migration_sql = read_migration(migration)
+            if not is_d1_compatible(migration_sql):
+                logger.info(f"מדלג על מיגרציה {migration.version:04d}_{migration.name} שאינה נתמכת ב-D1")
+                continue
+            
+            # כתיבת קובץ המיגרציה
+            migration_path = MIGRATIONS_DIR / f"{migration.version:04d}_{migration.name}.sql"
+            with open(migration_path, 'w') as f:
+                f.write(migration_sql)
+            logger.info(f"קובץ המיגרציה נוצר בהצלחה: {migration_path}")
         
-        logger.info(f"קובץ המיגרציה נוצר בהצלחה: {migration_path}")
         return True
     except Exception as e:
-        logger.error(f"שגיאה ביצירת קובץ המיגרציה: {e}")
+        logger.error(f"שגיאה ביצירת קבצי המיגרציה: {e}")
         return False
 
 def create_refresh_worker():
@@ -105,6 +105,52 @@ def update_database():
         logger.error(f"פלט שגיאה: {e.stderr}")
         return False
 
+def archive_expired_tenders():
+    """העברת מכרזים שהסתיימו לארכיון ודיווח על גודל הטבלה הפעילה"""
+    archive_path = DATABASE_DIR / "archive.py"
+    
+    if not archive_path.exists():
+        logger.error(f"סקריפט הארכיון {archive_path} לא נמצא")
+        return False
+    
+    logger.info("מעביר מכרזים שהסתיימו לארכיון")
+    try:
+        result = subprocess.run(
+            [sys.executable, str(archive_path)],
+            check=True,
+            capture_output=True,
+            text=True
+        )
+        logger.info(f"העברה לארכיון הסתיימה בהצלחה: {result.stdout.strip()}")
+        return True
+    except subprocess.CalledProcessError as e:
+        logger.error(f"שגיאה בהעברה לארכיון: {e}")
+        logger.error(f"פלט שגיאה: {e.stderr}")
+        return False
+
+def build_static_shards():
+    """בניית קבצי ה-JSON הסטטיים של האפליקציה עבור הנתונים שהשתנו"""
+    shards_path = DATABASE_DIR / "static_shards.py"
+    
+    if not shards_path.exists():
+        logger.error(f"סקריפט בניית הקבצים הסטטיים {shards_path} לא נמצא")
+        return False
+    
+    logger.info("בונה קבצי JSON סטטיים לאפליקציה")
+    try:
+        result = subprocess.run(
+            [sys.executable, str(shards_path)],
+            check=True,
+            capture_output=True,
+            text=True
+        )
+        logger.info(f"בניית הקבצים הסטטיים הסתיימה בהצלחה: {result.stdout.strip()}")
+        return True
+    except subprocess.CalledProcessError as e:
+        logger.error(f"שגיאה בבניית הקבצים הסטטיים: {e}")
+        logger.error(f"פלט שגיאה: {e.stderr}")
+        return False
+
 def refresh_all_tenders():
     """פונקציה ראשית לרענון כל המכרזים"""
     logger.info("מתחיל תהליך רענון מכרזים")
@@ -120,8 +166,10 @@ def refresh_all_tenders():
     # הפעלת המעבד המאוחד רק אם לפחות סקריפט אחד הצליח
     if success_count > 0:
         if run_processor():
-            # עדכון בסיס הנתונים
-            update_database()
+            # עדכון בסיס הנתונים, העברת מכרזים שהסתיימו לארכיון ובניית הקבצים הסטטיים
+            if update_database():
+                archive_expired_tenders()
+                build_static_shards()
     
     logger.info("תהליך רענון המכרזים הסתיים")
     logger.info(f"זמן הרענון הבא: {get_next_run_time()}")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Async Scrape Engine
+-------------------
+מנוע asyncio שאוסף את רשימות המכרזים ואת דפי הפרטים של כל המקורות בלולאת אירועים אחת
+
+הסורקים עצמם לא משתנים: המנוע משתמש ב-listing_url, parse_search_page,
+detail_url ו-parse_tender_details של כל סורק, והבקשות עוברות דרך לקוח
+ה-HTTP המשותף (חיבורים קבועים, מגבלות קצב ומונים) ב-executor ייעודי.
+
+- עמודי הרשימה של מקור נשלפים מראש (prefetch_pages עמודים קדימה), והעמוד
+  האחרון - או עמוד שכל המכרזים בו כבר נאספו (crawl_state של הסורק) - מבטל
+  את הבקשות לעמודים שאחריו.
+- דפי הפרטים של כל מקור נשלפים במקביל והתוצאות נשמרות לפי הסדר המקורי.
+- מספר הבקשות המקבילות לכל אתר מוגבל בסמפור של asyncio.
+- timeout מבטל את כל מה שלא הסתיים; מקור שלא הושלם מחזיר רשימה ריקה.
+"""
+
+import asyncio
+import logging
+import functools
+import requests
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from http_client import DEFAULT_HOST_CONCURRENCY
+
+# מספר עמודי הרשימה שנשלפים מראש מעבר לעמוד שמעובד
+DEFAULT_PREFETCH_PAGES = 2
+
+logger = logging.getLogger('async_engine')
+
+class AsyncScrapeEngine:
+    """איסוף מכרזים מכמה מקורות במקביל בלולאת asyncio אחת"""
+    
+    def __init__(self, http_client, host_concurrency=DEFAULT_HOST_CONCURRENCY,
+                 prefetch_pages=DEFAULT_PREFETCH_PAGES, timeout=None, max_threads=16):
+        """אתחול המנוע
+        
+        http_client - לקוח ה-HTTP המשותף של הסורקים
+        host_concurrency - מספר הבקשות המקבילות המרבי לכל אתר
+        prefetch_pages - מספר עמודי הרשימה שנשלפים מראש
+        timeout - זמן מרבי בשניות לכל האיסוף (None ללא הגבלה)
+        max_threads - מספר ה-threads שמבצעים את הבקשות עצמן
+        """
+        self.http = http_client
+        self.host_concurrency = host_concurrency
+        self.prefetch_pages = prefetch_pages
+        self.timeout = timeout
+        self.max_threads = max_threads
+        self._executor = None
+        self._semaphores = {}
+    
+    async def fetch(self, scraper, url):
+        """אחזור דף וחזרת ה-HTML שלו, במגבלת המקביליות של האתר"""
+        host = urlsplit(url).hostname
+        semaphore = self._semaphores.get(host)
+        if semaphore is None:
+            semaphore = self._semaphores[host] = asyncio.Semaphore(self.host_concurrency)
+        
+        async with semaphore:
+            request = self._executor.submit(functools.partial(self.http.get, url, headers=scraper.headers))
+            try:
+                response = await asyncio.wrap_future(request)
+            except asyncio.CancelledError:
+                # בקשה שכבר יצאה לא נעצרת - המקום באתר מתפנה רק כשהיא מסתיימת
+                if not request.cancel():
+                    await asyncio.wait([asyncio.wrap_future(request)])
+                raise
+        response.raise_for_status()
+        return response.text
+    
+    async def crawl_listing(self, scraper, max_pages):
+        """איסוף עמודי הרשימה של מקור, עם שליפה מראש וביטול עמודים מיותרים"""
+        tasks = {}
+        tenders = []
+        
+        def schedule(page):
+            """שליחת הבקשה לעמוד אם עוד לא נשלחה"""
+            if page <= max_pages and page not in tasks:
+                tasks[page] = asyncio.create_task(self.fetch(scraper, scraper.listing_url(page)))
+        
+        try:
+            page = 1
+            while page <= max_pages:
+                for ahead in range(page, page + self.prefetch_pages + 1):
+                    schedule(ahead)
+                
+                try:
+                    html = await tasks[page]
+                except requests.exceptions.RequestException as e:
+                    logger.error(f"שגיאה באחזור עמוד {page} של {type(scraper).__name__}: {str(e)}")
+                    break
+                
+                page_tenders, has_next = scraper.parse_search_page(html, page)
+                tenders.extend(page_tenders)
+                if (scraper.crawl_state is not None and scraper.crawl_state.reached_known_page(page_tenders, page)) or not has_next:
+                    break
+                page += 1
+        finally:
+            # עמודים שנשלפו מראש ואינם נדרשים עוד מבוטלים
+            pending = [task for task in tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+        
+        return tenders
+    
+    async def enrich(self, scraper, tenders):
+        """העשרת המכרזים בפרטים מדפי הפרטים, במקביל ולפי הסדר המקורי"""
+        async def enrich_one(tender):
+            """העשרת מכרז אחד"""
+            url = scraper.detail_url(tender)
+            if url:
+                try:
+                    tender.update(scraper.parse_tender_details(await self.fetch(scraper, url)))
+                except requests.exceptions.RequestException as e:
+                    logger.error(f"שגיאה באחזור פרטי מכרז {url}: {str(e)}")
+            return tender
+        
+        return await asyncio.gather(*(enrich_one(tender) for tender in tenders))
+    
+    async def collect_source(self, scraper, max_pages, max_details):
+        """איסוף והעשרה של מקור אחד (כמו fetch_search_results ואחריו enrich_tenders_with_details)"""
+        tenders = await self.crawl_listing(scraper, max_pages)
+        return await self.enrich(scraper, tenders[:max_details] if max_details else tenders)
+    
+    async def collect(self, scrapers, max_pages, max_details):
+        """איסוף מכל המקורות במקביל - מחזיר רשימת מכרזים לכל סורק, לפי הסדר"""
+        tasks = [asyncio.create_task(self.collect_source(scraper, max_pages, max_details)) for scraper in scrapers]
+        done, pending = await asyncio.wait(tasks, timeout=self.timeout)
+        
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        
+        results = []
+        for scraper, task in zip(scrapers, tasks):
+            if task in pending:
+                logger.error(f"האיסוף מ-{type(scraper).__name__} בוטל אחרי {self.timeout} שניות")
+                results.append([])
+            elif task.exception() is not None:
+                logger.error(f"שגיאה באיסוף מ-{type(scraper).__name__}: {task.exception()}", exc_info=task.exception())
+                results.append([])
+            else:
+                results.append(task.result())
+        return results
+    
+    def run(self, scrapers, max_pages, max_details):
+        """הרצת האיסוף מקוד סינכרוני"""
+        self._semaphores = {}
+        with ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix='async-fetch') as executor:
+            self._executor = executor
+            try:
+                return asyncio.run(self.collect(scrapers, max_pages, max_details))
+            finally:
+                self._executor = None
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Crawl State
+-----------
+מצב האיסוף של כל מקור, לעצירת הדפדוף בעמודים שכבר נאספו
+
+לכל מקור נשמרים סימן מים (watermark) - תאריך הפרסום והמזהה של המכרז החדש
+ביותר שנאסף - וקבוצת המזהים שכבר נראו, כ-hash של 8 בתים לכל מזהה. עמוד
+ברשימה נחשב מוכר כשכל המכרזים בו כבר נראו או שפורסמו לפני סימן המים, ואז
+הסורק מפסיק לדפדף: ריענון עם מעט מכרזים חדשים מגיע לעמוד אחד או שניים
+במקום כל מכסת העמודים.
+
+המכרזים שנאספו נרשמים בזיכרון ונשמרים רק ב-commit, אחרי שהתוצאות נשמרו,
+כך שריצה שנכשלה באמצע לא מסמנת מכרזים שלא הגיעו לבסיס הנתונים.
+"""
+
+import os
+import sys
+import time
+import logging
+import sqlite3
+import hashlib
+import threading
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database'))
+from tender_dates import parse_tender_date
+
+# שם קובץ המצב בתיקיית הפלט של הסורקים
+CRAWL_STATE_FILE = 'crawl_state.db'
+
+# מכרז שפורסם לפחות כך לפני סימן המים נחשב מוכר גם אם המזהה שלו לא נשמר
+WATERMARK_SLACK_SECONDS = 2 * 24 * 60 * 60
+
+# מזהים שלא נראו זמן כזה נמחקים מהקבוצה (סימן המים מכסה אותם)
+SEEN_RETENTION_SECONDS = 365 * 24 * 60 * 60
+
+logger = logging.getLogger('crawl_state')
+
+def id_hash(tender_id):
+    """hash של 64 ביט (עם סימן, כמו INTEGER של SQLite) למזהה מכרז"""
+    digest = hashlib.blake2b(str(tender_id).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+class CrawlState:
+    """סימני המים ומזהי המכרזים שנראו לכל מקור, בקובץ SQLite"""
+    
+    def __init__(self, directory):
+        """פתיחת המצב בקובץ CRAWL_STATE_FILE שבתיקייה (נוצרת אם לא קיימת)"""
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, CRAWL_STATE_FILE)
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS watermarks (
+                source TEXT PRIMARY KEY,
+                publish_ts INTEGER,
+                external_id TEXT,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS seen_ids (
+                source TEXT NOT NULL,
+                id_hash INTEGER NOT NULL,
+                seen_at REAL NOT NULL,
+                PRIMARY KEY (source, id_hash)
+            ) WITHOUT ROWID;
+        """)
+        self._watermarks = {
+            source: publish_ts
+            for source, publish_ts in self._conn.execute("SELECT source, publish_ts FROM watermarks")
+        }
+    
+    def watermark(self, source):
+        """תאריך הפרסום (חותמת זמן) של המכרז החדש ביותר שנאסף מהמקור, או None"""
+        return self._watermarks.get(source)
+    
+    def is_known(self, tender):
+        """האם המכרז כבר נאסף בריצה קודמת"""
+        source = tender.get('source')
+        tender_id = tender.get('id')
+        if tender_id:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT 1 FROM seen_ids WHERE source = ? AND id_hash = ?", (source, id_hash(tender_id))
+                ).fetchone()
+            if row is not None:
+                return True
+        
+        watermark = self._watermarks.get(source)
+        publish_ts = parse_tender_date(tender.get('publish_date'))
+        return watermark is not None and publish_ts is not None and publish_ts < watermark - WATERMARK_SLACK_SECONDS
+    
+    def is_known_page(self, tenders):
+        """האם כל המכרזים בעמוד כבר נאספו (עמוד ריק אינו נחשב מוכר)"""
+        return bool(tenders) and all(self.is_known(tender) for tender in tenders)
+    
+    def reached_known_page(self, tenders, page):
+        """האם הדפדוף נעצר בעמוד - כל המכרזים בו כבר נאספו בריצה קודמת"""
+        if not self.is_known_page(tenders):
+            return False
+        logger.info(f"כל המכרזים בעמוד {page} של {tenders[0].get('source')} כבר נאספו בריצה קודמת - עוצר את הדפדוף")
+        return True
+    
+    def observe(self, tenders):
+        """רישום מכרזים שנאספו בריצה הנוכחית (נשמרים ב-commit)"""
+        with self._lock:
+            for tender in tenders:
+                self._pending.setdefault(tender.get('source'), []).append(tender)
+    
+    def commit(self):
+        """שמירת המכרזים שנרשמו ועדכון סימני המים - מחזיר את מספר המזהים שנשמרו"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            now = time.time()
+            count = 0
+            with self._conn:
+                for source, tenders in pending.items():
+                    ids = {id_hash(tender.get('id')) for tender in tenders if tender.get('id')}
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO seen_ids (source, id_hash, seen_at) VALUES (?, ?, ?)",
+                        [(source, value, now) for value in ids]
+                    )
+                    count += len(ids)
+                    
+                    # סימן המים מתקדם רק קדימה
+                    newest = None
+                    for tender in tenders:
+                        publish_ts = parse_tender_date(tender.get('publish_date'))
+                        if publish_ts is not None and (newest is None or publish_ts > newest[0]):
+                            newest = (publish_ts, tender.get('id') or '')
+                    if newest is not None and newest[0] > (self._watermarks.get(source) or 0):
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO watermarks (source, publish_ts, external_id, updated_at) "
+                            "VALUES (?, ?, ?, ?)",
+                            (source, newest[0], newest[1], now)
+                        )
+                        self._watermarks[source] = newest[0]
+                
+                self._conn.execute("DELETE FROM seen_ids WHERE seen_at < ?", (now - SEEN_RETENTION_SECONDS,))
+            return count
+    
+    def finish(self, tenders):
+        """רישום המכרזים שנשמרו בסוף ריצה ושמירתם - מחזיר את מספר המזהים שנשמרו"""
+        self.observe(tenders)
+        return self.commit()
+    
+    def close(self):
+        """סגירת קובץ המצב"""
+        with self._lock:
+            self._conn.close()
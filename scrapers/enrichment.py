@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Concurrent Enrichment
+---------------------
+העשרת מכרזים בפרטים מלאים במקביל, עם מספר חסום של threads
+
+הקצב והמקביליות מול כל אתר נקבעים בלקוח ה-HTTP (TokenBucket וסמפור לכל
+אתר, ראו http_client), ולא בהמתנה קבועה בין בקשות. התוצאות מוחזרות לפי
+הסדר המקורי של המכרזים.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+# מספר ה-threads שמאחזרים דפי פרטים במקביל
+DEFAULT_WORKERS = 4
+
+def enrich_concurrently(tenders, fetch_details, url_of, max_workers=DEFAULT_WORKERS, logger=None):
+    """העשרת כל מכרז בפרטים מדף הפרטים שלו, במקביל
+    
+    tenders - רשומות המכרזים (מתעדכנות במקום)
+    fetch_details - פונקציה שמקבלת כתובת ומחזירה מילון פרטים
+    url_of - פונקציה שמחזירה את כתובת דף הפרטים של מכרז (מכרז ללא כתובת אינו מועשר)
+    max_workers - מספר ה-threads המרבי
+    """
+    total = len(tenders)
+    
+    def enrich(item):
+        """העשרת מכרז אחד"""
+        i, tender = item
+        url = url_of(tender)
+        if url:
+            if logger is not None:
+                logger.info(f"מעשיר מכרז {i + 1}/{total}: {tender.id or 'unknown'}")
+            tender.update(fetch_details(url))
+        return tender
+    
+    if max_workers <= 1 or total <= 1:
+        return [enrich(item) for item in enumerate(tenders)]
+    with ThreadPoolExecutor(max_workers=min(max_workers, total), thread_name_prefix='enrich') as pool:
+        return list(pool.map(enrich, enumerate(tenders)))
+
+def enrich_tenders(scraper, tenders, max_tenders=None, max_workers=None, logger=None):
+    """העשרת רשימת המכרזים של סורק עם פרטים מלאים
+    
+    דפי הפרטים מאוחזרים ב-fetch_tender_details של הסורק לפי detail_url שלו,
+    במקביל (max_workers, ברירת המחדל scraper.detail_workers). max_tenders מגביל
+    את מספר המכרזים שמועשרים ומוחזרים.
+    """
+    # הגבלת מספר המכרזים לעיבוד אם צוין
+    tenders_to_process = tenders[:max_tenders] if max_tenders else tenders
+    
+    return enrich_concurrently(
+        tenders_to_process, scraper.fetch_tender_details, url_of=scraper.detail_url,
+        max_workers=max_workers or scraper.detail_workers, logger=logger
+    )
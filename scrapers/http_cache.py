@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTTP Cache
+----------
+מטמון HTTP קבוע על הדיסק לסורקים, עם בקשות מותנות
+
+לכל כתובת נשמרים התוכן (דחוס ב-zlib) וה-validators שהאתר החזיר (ETag,
+Last-Modified). בבקשה הבאה לאותה כתובת הלקוח שולח If-None-Match או
+If-Modified-Since, ואם האתר עונה 304 התוכן נלקח מהמטמון במקום להוריד אותו
+שוב. נשמרות רק תשובות 200 עם validator; הגודל הכולל מוגבל, וכשהוא עובר את
+הגבול נמחקות הכתובות שלא נעשה בהן שימוש הכי הרבה זמן.
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+import threading
+
+# שם קובץ המטמון בתיקיית הפלט של הסורקים
+HTTP_CACHE_FILE = 'http_cache.db'
+
+# גודל מרבי של התוכן הדחוס במטמון, ושיעור המילוי אחרי פינוי
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+EVICT_TO_FRACTION = 0.9
+
+class CacheEntry:
+    """תשובה שמורה: validators, קידוד ותוכן"""
+    
+    __slots__ = ('url', 'etag', 'last_modified', 'encoding', 'content', 'wire_size')
+    
+    def __init__(self, url, etag, last_modified, encoding, content, wire_size):
+        """יצירת רשומה מתוכן לא דחוס"""
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.encoding = encoding
+        self.content = content
+        self.wire_size = wire_size
+    
+    def conditional_headers(self):
+        """כותרות הבקשה המותנית לפי ה-validators השמורים"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class HttpCache:
+    """מטמון תשובות HTTP בקובץ SQLite, משותף לכל ה-threads של הלקוח"""
+    
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        """פתיחת המטמון בקובץ HTTP_CACHE_FILE שבתיקייה (נוצרת אם לא קיימת)"""
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, HTTP_CACHE_FILE)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                encoding TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                wire_size INTEGER NOT NULL,
+                used_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_used_at ON responses(used_at)")
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    
+    def lookup(self, url):
+        """הרשומה השמורה של הכתובת, או None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, encoding, body, wire_size FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, encoding, body, wire_size = row
+        return CacheEntry(url, etag, last_modified, encoding, zlib.decompress(body), wire_size)
+    
+    def store(self, url, response, wire_size):
+        """שמירת תשובת 200 - רק אם יש לה validator ואין no-store"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not (etag or last_modified) or 'no-store' in response.headers.get('Cache-Control', ''):
+            return False
+        
+        body = zlib.compress(response.content)
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM responses WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, etag, last_modified, encoding, body, size, wire_size, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, response.encoding, body, len(body), wire_size, time.time())
+            )
+            self._size += len(body) - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+        return True
+    
+    def revalidated(self, url, response):
+        """עדכון זמן השימוש (וה-validators אם האתר שלח חדשים) אחרי תשובת 304"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET used_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (time.time(), response.headers.get('ETag'), response.headers.get('Last-Modified'), url)
+            )
+    
+    def _evict(self):
+        """מחיקת הכתובות הישנות ביותר עד EVICT_TO_FRACTION מהגבול - יש להחזיק את המנעול"""
+        target = self.max_bytes * EVICT_TO_FRACTION
+        victims = []
+        for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY used_at"):
+            if self._size <= target:
+                break
+            victims.append((url,))
+            self._size -= size
+        self._conn.executemany("DELETE FROM responses WHERE url = ?", victims)
+    
+    def size(self):
+        """הגודל הדחוס הכולל של התוכן במטמון בבתים"""
+        with self._lock:
+            return self._size
+    
+    def __len__(self):
+        """מספר הכתובות במטמון"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    
+    def close(self):
+        """סגירת קובץ המטמון"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTTP Client
+-----------
+שכבת אחזור משותפת לסורקים: Session אחד עם מאגר חיבורים לכל אתר
+
+כל הסורקים עוברים דרך HttpClient במקום requests.get, כך שחיבור TCP/TLS
+לאתר נפתח פעם אחת ומשמש את כל דפי הרשימה והפרטים. ללקוח יש זמני המתנה
+לחיבור ולקריאה, הוא מבקש תשובות דחוסות (gzip), וסופר לכל אתר את מספר
+הבקשות, החיבורים החדשים והבתים שהתקבלו - ההפרש בין הבקשות לחיבורים הוא
+מספר הבקשות שעברו בחיבור קיים.
+
+קצב הבקשות לכל אתר מוגבל ב-token bucket ומספר הבקשות המקבילות לאתר מוגבל
+בסמפור, כך שאפשר לאחזר דפים במקביל בלי להעמיס על האתר.
+
+עם מטמון (HttpCache) הלקוח שולח בקשות מותנות לכתובות שכבר נשמרו, ותשובת 304
+מוחזרת כתשובת 200 עם התוכן השמור (response.from_cache). המונים של כל אתר
+כוללים את מספר הפגיעות במטמון ואת הבתים שלא הורדו בזכותן.
+"""
+
+import time
+import threading
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter, DEFAULT_POOLBLOCK
+from urllib3.poolmanager import PoolManager
+from http_cache import HttpCache
+
+# זמני המתנה בשניות: (פתיחת חיבור, קריאת תשובה)
+DEFAULT_TIMEOUT = (5, 30)
+
+# מספר האתרים שמאגר החיבורים שלהם נשמר, ומספר החיבורים הפתוחים לכל אתר
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+# נימוס כלפי האתרים: בקשות לשנייה, מספר הבקשות ברצף לפני ההגבלה, ובקשות מקבילות לכל אתר
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 2
+DEFAULT_HOST_CONCURRENCY = 4
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'he-IL,he;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+}
+
+class TokenBucket:
+    """מגביל קצב: rate אסימונים לשנייה, עד burst אסימונים שמורים
+    
+    כל בקשה שומרת אסימון מראש (המונה יכול לרדת מתחת לאפס), כך שבקשות
+    שממתינות יחד יוצאות אחת אחרי השנייה במרווחים של 1/rate ולפי סדר הגעתן.
+    """
+    
+    def __init__(self, rate, burst=1):
+        """אתחול עם מלאי מלא"""
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """המתנה לאסימון - מחזיר את זמן ההמתנה בשניות"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate) - 1
+            self._updated = now
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+class _CountingPoolManager(PoolManager):
+    """PoolManager שמדווח על כל חיבור חדש שנפתח לאתר"""
+    
+    def __init__(self, *args, on_new_connection=None, **kwargs):
+        """אתחול עם פונקציה שנקראת עם שם האתר בכל חיבור חדש"""
+        super().__init__(*args, **kwargs)
+        self.on_new_connection = on_new_connection
+    
+    def _new_pool(self, scheme, host, port, request_context=None):
+        """יצירת מאגר חיבורים לאתר שסופר את החיבורים החדשים שלו"""
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        new_conn = pool._new_conn
+        
+        def counting_new_conn():
+            """פתיחת חיבור חדש ודיווח עליו"""
+            if self.on_new_connection is not None:
+                self.on_new_connection(host)
+            return new_conn()
+        
+        pool._new_conn = counting_new_conn
+        return pool
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter עם מאגר חיבורים שסופר חיבורים חדשים"""
+    
+    def __init__(self, on_new_connection, **kwargs):
+        """אתחול ה-adapter"""
+        self._on_new_connection = on_new_connection
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, connections, maxsize, block=DEFAULT_POOLBLOCK, **pool_kwargs):
+        """יצירת ה-PoolManager הסופר (כמו ב-HTTPAdapter)"""
+        self._pool_connections = connections
+        self._pool_maxsize = maxsize
+        self._pool_block = block
+        self.poolmanager = _CountingPoolManager(
+            num_pools=connections, maxsize=maxsize, block=block,
+            on_new_connection=self._on_new_connection, **pool_kwargs
+        )
+
+class HttpClient:
+    """לקוח HTTP משותף לסורקים עם חיבורים קבועים לכל אתר ומוני שימוש חוזר"""
+    
+    def __init__(self, headers=None, timeout=DEFAULT_TIMEOUT, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, max_retries=0, rate=DEFAULT_RATE, burst=DEFAULT_BURST,
+                 concurrency=DEFAULT_HOST_CONCURRENCY, cache=None):
+        """אתחול הלקוח
+        
+        headers - כותרות שנשלחות בכל בקשה (בנוסף ל-DEFAULT_HEADERS)
+        timeout - זמן המתנה בשניות, מספר אחד או (חיבור, קריאה)
+        pool_connections - מספר האתרים שהחיבורים שלהם נשמרים
+        pool_maxsize - מספר החיבורים הפתוחים המרבי לכל אתר
+        max_retries - מספר הניסיונות החוזרים בכישלון חיבור
+        rate, burst - קצב הבקשות לשנייה לכל אתר ומספר הבקשות ברצף (rate=None ללא הגבלה)
+        concurrency - מספר הבקשות המקבילות המרבי לכל אתר (None ללא הגבלה)
+        cache - מטמון HttpCache לבקשות מותנות (None ללא מטמון)
+        """
+        self.timeout = timeout
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._default_limits = {'rate': rate, 'burst': burst, 'concurrency': concurrency}
+        self._host_config = {}
+        self._host_limits = {}
+        
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.session.headers.update(headers)
+        
+        adapter = _CountingAdapter(
+            self._record_connection, pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize, max_retries=max_retries
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def configure_host(self, host, **limits):
+        """קביעת rate, burst או concurrency לאתר מסוים (במקום ברירות המחדל של הלקוח)"""
+        unknown = set(limits) - set(self._default_limits)
+        if unknown:
+            raise ValueError(f"הגדרות לא מוכרות: {', '.join(sorted(unknown))}")
+        with self._lock:
+            self._host_config.setdefault(host, {}).update(limits)
+            self._host_limits.pop(host, None)
+    
+    def _limits(self, host):
+        """מגביל הקצב והסמפור של האתר (נוצרים בבקשה הראשונה)"""
+        with self._lock:
+            limits = self._host_limits.get(host)
+            if limits is None:
+                config = dict(self._default_limits, **self._host_config.get(host, {}))
+                bucket = TokenBucket(config['rate'], config['burst']) if config['rate'] else None
+                slots = threading.BoundedSemaphore(config['concurrency']) if config['concurrency'] else None
+                limits = self._host_limits[host] = (bucket, slots)
+            return limits
+    
+    def _host_stats(self, host):
+        """מוני האתר (נוצרים בבקשה הראשונה) - יש להחזיק את המנעול"""
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats[host] = {
+                'requests': 0, 'connections': 0, 'bytes_received': 0, 'bytes_decoded': 0, 'throttled_seconds': 0.0,
+                'cache_hits': 0, 'bytes_saved': 0
+            }
+        return stats
+    
+    def _record_connection(self, host):
+        """ספירת חיבור חדש לאתר"""
+        with self._lock:
+            self._host_stats(host)['connections'] += 1
+    
+    def get(self, url, **kwargs):
+        """בקשת GET דרך מאגר החיבורים, במגבלות הקצב והמקביליות של האתר
+        
+        ברירת המחדל של timeout היא של הלקוח. אם יש מטמון ויש בו הכתובת, נשלחת
+        בקשה מותנית ותשובת 304 מוחלפת בתוכן השמור.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).hostname
+        bucket, slots = self._limits(host)
+        
+        entry = self.cache.lookup(url) if self.cache is not None else None
+        if entry is not None:
+            kwargs['headers'] = dict(kwargs.get('headers') or {}, **entry.conditional_headers())
+        
+        if slots is not None:
+            slots.acquire()
+        try:
+            waited = bucket.acquire() if bucket is not None else 0.0
+            response = self.session.get(url, **kwargs)
+        finally:
+            if slots is not None:
+                slots.release()
+        
+        # הבתים שהתקבלו בפועל (דחוסים) לעומת גודל התוכן לאחר פענוח
+        decoded = len(response.content)
+        try:
+            received = response.raw.tell() or decoded
+        except (AttributeError, OSError):
+            received = decoded
+        
+        saved = 0
+        response.from_cache = False
+        if entry is not None and response.status_code == 304:
+            self.cache.revalidated(url, response)
+            response.status_code = 200
+            response.reason = 'OK'
+            response._content = entry.content
+            response.encoding = entry.encoding
+            response.from_cache = True
+            saved = entry.wire_size
+            decoded = len(entry.content)
+        elif self.cache is not None and response.status_code == 200:
+            self.cache.store(url, response, received)
+        
+        with self._lock:
+            stats = self._host_stats(host)
+            stats['requests'] += 1
+            stats['throttled_seconds'] += waited
+            stats['bytes_received'] += received
+            stats['bytes_decoded'] += decoded
+            if response.from_cache:
+                stats['cache_hits'] += 1
+                stats['bytes_saved'] += saved
+        return response
+    
+    def stats(self):
+        """מוני השימוש לכל אתר, כולל מספר הבקשות שעברו בחיבור קיים"""
+        with self._lock:
+            return {
+                host: dict(stats, reused=max(0, stats['requests'] - stats['connections']))
+                for host, stats in self._stats.items()
+            }
+    
+    def format_stats(self):
+        """סיכום מוני השימוש לשורת לוג"""
+        return ', '.join(
+            f"{host}: {stats['requests']} בקשות ב-{stats['connections']} חיבורים "
+            f"({stats['bytes_received'] // 1024}KB מתוך {stats['bytes_decoded'] // 1024}KB, "
+            f"המתנה להגבלת קצב {stats['throttled_seconds']:.1f} שניות"
+            + (f", מטמון {stats['cache_hits'] * 100 // stats['requests']}% פגיעות "
+               f"וחיסכון של {stats['bytes_saved'] // 1024}KB" if self.cache is not None and stats['requests'] else '')
+            + ")"
+            for host, stats in sorted(self.stats().items())
+        ) or 'לא נשלחו בקשות'
+    
+    def close(self):
+        """סגירת כל החיבורים הפתוחים (והמטמון)"""
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+    
+    def __enter__(self):
+        """שימוש כ-context manager"""
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """סגירת החיבורים ביציאה"""
+        self.close()
+
+_default_client = None
+_default_lock = threading.Lock()
+
+def default_client(cache_dir=None):
+    """הלקוח המשותף של התהליך, לסורקים שלא קיבלו לקוח משלהם
+    
+    cache_dir - תיקייה למטמון ה-HTTP (נקבעת ביצירת הלקוח, כלומר בקריאה הראשונה)
+    """
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = HttpClient(cache=HttpCache(cache_dir) if cache_dir else None)
+        return _default_client
@@ -8,13 +8,18 @@
 """
 
 import os
-import json
+import sys
 import time
 import logging
 import requests
 from datetime import datetime
 from bs4 import BeautifulSoup
-import pandas as pd
+
+# רשומת המכרז המשותפת לסורקים ולבסיס הנתונים
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database'))
+from tender_record import Tender, write_json, write_csv
+from http_client import default_client
+from enrichment import enrich_tenders, DEFAULT_WORKERS
 
 # הגדרת לוגר
 logging.basicConfig(
@@ -30,8 +35,12 @@ logger = logging.getLogger('mr_gov_il_scraper')
 class MrGovILScraper:
     """סורק מכרזים מאתר מינהל הרכש הממשלתי"""
     
-    def __init__(self, output_dir='data'):
-        """אתחול הסורק"""
+    def __init__(self, output_dir='data', http_client=None, crawl_state=None):
+        """אתחול הסורק
+        
+        http_client - לקוח HTTP משותף (ברירת המחדל: הלקוח של התהליך, עם מטמון ב-output_dir)
+        crawl_state - מצב איסוף (CrawlState) לעצירת הדפדוף בעמוד שכבר נאסף (None לאיסוף מלא)
+        """
         self.base_url = "https://mr.gov.il/ilgstorefront/he/search/"
         self.search_url = "https://mr.gov.il/ilgstorefront/he/search/?s=TENDER&text=%D7%A0%D7%92%D7%A8%D7%95%D7%AA+%D7%A2%D7%A5"
         self.headers = {
@@ -39,6 +48,9 @@ class MrGovILScraper:
             'Accept-Language': 'he-IL,he;q=0.9,en-US;q=0.8,en;q=0.7',
         }
         self.output_dir = output_dir
+        self.http = http_client or default_client(cache_dir=output_dir)
+        self.detail_workers = DEFAULT_WORKERS
+        self.crawl_state = crawl_state
         
         # יצירת תיקיית פלט אם לא קיימת
         os.makedirs(output_dir, exist_ok=True)
@@ -52,33 +64,17 @@ class MrGovILScraper:
             logger.info(f"מאחזר עמוד {current_page} מתוך {max_pages}")
             
             # בניית URL עם פרמטר עמוד
-            page_url = f"{self.search_url}&page={current_page}"
+            page_url = self.listing_url(current_page)
             
             try:
-                response = requests.get(page_url, headers=self.headers)
+                response = self.http.get(page_url, headers=self.headers)
                 response.raise_for_status()
                 
                 # בדיקה אם התגובה תקינה
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # חיפוש רשימת המכרזים בדף
-                    tender_elements = soup.select('.tender-item')
-                    
-                    if not tender_elements:
-                        logger.warning(f"לא נמצאו מכרזים בעמוד {current_page}")
-                        break
-                    
-                    # עיבוד כל מכרז
-                    for tender_element in tender_elements:
-                        tender_data = self._parse_tender_element(tender_element)
-                        if tender_data:
-                            all_tenders.append(tender_data)
-                    
-                    # בדיקה אם יש עמוד הבא
-                    next_page = soup.select_one('.pagination .next')
-                    if not next_page or 'disabled' in next_page.get('class', []):
-                        logger.info(f"הגענו לעמוד האחרון ({current_page})")
+                    page_tenders, has_next = self.parse_search_page(response.text, current_page)
+                    all_tenders.extend(page_tenders)
+                    if (self.crawl_state is not None and self.crawl_state.reached_known_page(page_tenders, current_page)) or not has_next:
                         break
                     
                     current_page += 1
@@ -92,6 +88,40 @@ class MrGovILScraper:
         logger.info(f"סה\"כ נאספו {len(all_tenders)} מכרזים")
         return all_tenders
     
+    def listing_url(self, page):
+        """כתובת עמוד page ברשימת המכרזים"""
+        return f"{self.search_url}&page={page}"
+    
+    def parse_search_page(self, html, page):
+        """חילוץ המכרזים מ-HTML של עמוד ברשימה - מחזיר (מכרזים, האם יש עמוד הבא)"""
+        tenders = []
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # חיפוש רשימת המכרזים בדף
+        tender_elements = soup.select('.tender-item')
+        
+        if not tender_elements:
+            logger.warning(f"לא נמצאו מכרזים בעמוד {page}")
+            return tenders, False
+        
+        # עיבוד כל מכרז
+        for tender_element in tender_elements:
+            tender_data = self._parse_tender_element(tender_element)
+            if tender_data:
+                tenders.append(tender_data)
+        
+        # בדיקה אם יש עמוד הבא
+        next_page = soup.select_one('.pagination .next')
+        if not next_page or 'disabled' in next_page.get('class', []):
+            logger.info(f"הגענו לעמוד האחרון ({page})")
+            return tenders, False
+        
+        return tenders, True
+    
+    def detail_url(self, tender):
+        """כתובת דף הפרטים של מכרז (None אם אין)"""
+        return tender.url or None
+    
     def _parse_tender_element(self, tender_element):
         """עיבוד אלמנט HTML של מכרז בודד"""
         try:
@@ -120,18 +150,18 @@ class MrGovILScraper:
             submission_date_element = tender_element.select_one('.submission-date')
             submission_date = submission_date_element.text.strip() if submission_date_element else "לא צוין"
             
-            # יצירת מילון עם נתוני המכרז
-            tender_data = {
-                'id': tender_id,
-                'title': tender_title,
-                'url': tender_url,
-                'publisher': publisher,
-                'status': status,
-                'publish_date': publish_date,
-                'submission_date': submission_date,
-                'source': 'mr.gov.il',
-                'scrape_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
+            # יצירת רשומת מכרז
+            tender_data = Tender(
+                id=tender_id,
+                title=tender_title,
+                url=tender_url,
+                publisher=publisher,
+                status=status,
+                publish_date=publish_date,
+                submission_date=submission_date,
+                source='mr.gov.il',
+                scrape_date=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            )
             
             return tender_data
             
@@ -142,112 +172,94 @@ class MrGovILScraper:
     def fetch_tender_details(self, tender_url):
         """אחזור פרטים מלאים של מכרז בודד"""
         try:
-            response = requests.get(tender_url, headers=self.headers)
+            response = self.http.get(tender_url, headers=self.headers)
             response.raise_for_status()
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # חילוץ פרטים נוספים מדף המכרז המלא
-                tender_details = {}
-                
-                # כותרת המכרז
-                title_element = soup.select_one('h1.tender-title')
-                if title_element:
-                    tender_details['title'] = title_element.text.strip()
-                
-                # פרטי המפרסם
-                publisher_element = soup.select_one('.publisher-details')
-                if publisher_element:
-                    tender_details['publisher_details'] = publisher_element.text.strip()
-                
-                # מסמכים מצורפים
-                documents = []
-                document_elements = soup.select('.documents-list .document-item')
-                for doc in document_elements:
-                    doc_link = doc.select_one('a')
-                    if doc_link:
-                        doc_url = doc_link.get('href', '')
-                        if doc_url and not doc_url.startswith('http'):
-                            doc_url = f"https://mr.gov.il{doc_url}"
-                        
-                        doc_name = doc_link.text.strip()
-                        documents.append({
-                            'name': doc_name,
-                            'url': doc_url
-                        })
-                
-                if documents:
-                    tender_details['documents'] = documents
-                
-                # נושאים/קטגוריות
-                categories = []
-                category_elements = soup.select('.categories-list .category-item')
-                for cat in category_elements:
-                    cat_name = cat.text.strip()
-                    if cat_name:
-                        categories.append(cat_name)
-                
-                if categories:
-                    tender_details['categories'] = categories
-                
-                # פרטי קשר
-                contact_element = soup.select_one('.contact-details')
-                if contact_element:
-                    contact_name = contact_element.select_one('.contact-name')
-                    contact_email = contact_element.select_one('.contact-email')
-                    contact_phone = contact_element.select_one('.contact-phone')
-                    
-                    contact_info = {}
-                    if contact_name:
-                        contact_info['name'] = contact_name.text.strip()
-                    if contact_email:
-                        contact_info['email'] = contact_email.text.strip()
-                    if contact_phone:
-                        contact_info['phone'] = contact_phone.text.strip()
-                    
-                    if contact_info:
-                        tender_details['contact'] = contact_info
-                
-                return tender_details
+                return self.parse_tender_details(response.text)
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"שגיאה באחזור פרטי מכרז {tender_url}: {str(e)}")
         
         return {}
     
-    def enrich_tenders_with_details(self, tenders, max_tenders=None):
-        """העשרת רשימת המכרזים עם פרטים מלאים"""
-        enriched_tenders = []
+    def parse_tender_details(self, html):
+        """חילוץ הפרטים המלאים מ-HTML של דף מכרז (משותף לאחזור הרגיל ולמנוע ה-asyncio)"""
+        soup = BeautifulSoup(html, 'html.parser')
         
-        # הגבלת מספר המכרזים לעיבוד אם צוין
-        tenders_to_process = tenders[:max_tenders] if max_tenders else tenders
+        # חילוץ פרטים נוספים מדף המכרז המלא
+        tender_details = {}
         
-        for i, tender in enumerate(tenders_to_process):
-            logger.info(f"מעשיר מכרז {i+1}/{len(tenders_to_process)}: {tender.get('id', 'unknown')}")
-            
-            if 'url' in tender and tender['url']:
-                # אחזור פרטים מלאים
-                details = self.fetch_tender_details(tender['url'])
-                
-                # מיזוג הפרטים עם נתוני המכרז הבסיסיים
-                enriched_tender = {**tender, **details}
-                enriched_tenders.append(enriched_tender)
+        # כותרת המכרז
+        title_element = soup.select_one('h1.tender-title')
+        if title_element:
+            tender_details['title'] = title_element.text.strip()
+        
+        # פרטי המפרסם
+        publisher_element = soup.select_one('.publisher-details')
+        if publisher_element:
+            tender_details['publisher_details'] = publisher_element.text.strip()
+        
+        # מסמכים מצורפים
+        documents = []
+        document_elements = soup.select('.documents-list .document-item')
+        for doc in document_elements:
+            doc_link = doc.select_one('a')
+            if doc_link:
+                doc_url = doc_link.get('href', '')
+                if doc_url and not doc_url.startswith('http'):
+                    doc_url = f"https://mr.gov.il{doc_url}"
                 
-                # המתנה קצרה בין בקשות
-                time.sleep(2)
-            else:
-                enriched_tenders.append(tender)
+                doc_name = doc_link.text.strip()
+                documents.append({
+                    'name': doc_name,
+                    'url': doc_url
+                })
         
-        return enriched_tenders
+        if documents:
+            tender_details['documents'] = documents
+        
+        # נושאים/קטגוריות
+        categories = []
+        category_elements = soup.select('.categories-list .category-item')
+        for cat in category_elements:
+            cat_name = cat.text.strip()
+            if cat_name:
+                categories.append(cat_name)
+        
+        if categories:
+            tender_details['categories'] = categories
+        
+        # פרטי קשר
+        contact_element = soup.select_one('.contact-details')
+        if contact_element:
+            contact_name = contact_element.select_one('.contact-name')
+            contact_email = contact_element.select_one('.contact-email')
+            contact_phone = contact_element.select_one('.contact-phone')
+            
+            contact_info = {}
+            if contact_name:
+                contact_info['name'] = contact_name.text.strip()
+            if contact_email:
+                contact_info['email'] = contact_email.text.strip()
+            if contact_phone:
+                contact_info['phone'] = contact_phone.text.strip()
+            
+            if contact_info:
+                tender_details['contact'] = contact_info
+        
+        return tender_details
+    
+    def enrich_tenders_with_details(self, tenders, max_tenders=None, max_workers=None):
+        """העשרת רשימת המכרזים עם פרטים מלאים, במקביל (ראו enrichment.enrich_tenders)"""
+        return enrich_tenders(self, tenders, max_tenders=max_tenders, max_workers=max_workers, logger=logger)
     
     def save_to_json(self, tenders, filename='mr_gov_il_tenders.json'):
         """שמירת המכרזים לקובץ JSON"""
         output_path = os.path.join(self.output_dir, filename)
         
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(tenders, f, ensure_ascii=False, indent=2)
+            write_json(tenders, output_path)
             
             logger.info(f"נשמרו {len(tenders)} מכרזים לקובץ {output_path}")
             return output_path
@@ -260,16 +272,8 @@ class MrGovILScraper:
         output_path = os.path.join(self.output_dir, filename)
         
         try:
-            # המרת רשימת מילונים ל-DataFrame
-            df = pd.DataFrame(tenders)
-            
-            # טיפול בעמודות מורכבות (רשימות או מילונים)
-            for col in df.columns:
-                if df[col].apply(lambda x: isinstance(x, (dict, list))).any():
-                    df[col] = df[col].apply(lambda x: json.dumps(x, ensure_ascii=False) if isinstance(x, (dict, list)) else x)
-            
-            # שמירה לקובץ CSV
-            df.to_csv(output_path, index=False, encoding='utf-8-sig')
+            # שמירה לקובץ CSV (שדות מורכבים נכתבים כ-JSON)
+            write_csv(tenders, output_path)
             
             logger.info(f"נשמרו {len(tenders)} מכרזים לקובץ {output_path}")
             return output_path
@@ -305,6 +309,10 @@ class MrGovILScraper:
             if csv_path:
                 output_files['csv'] = csv_path
         
+        # המכרזים שנשמרו מסומנים כמוכרים לריצה הבאה
+        if self.crawl_state is not None and output_files:
+            self.crawl_state.finish(enriched_tenders)
+        
         return output_files
 
 if __name__ == "__main__":
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Scrape Benchmark
+----------------
+השוואה מקומית בין האיסוף הסדרתי לבין מנוע ה-asyncio
+
+לכל מקור עולה אתר מקומי (127.0.0.1, 127.0.0.2, 127.0.0.3) שמגיש עמודי רשימה
+ודפי פרטים במבנה ה-HTML של האתר האמיתי, עם זמן תגובה מדומה. הסורקים מופנים
+לאתרים המקומיים, וכל דרך איסוף רצה עם לקוח HTTP חדש באותן מגבלות קצב.
+"""
+
+import time
+import gzip
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from mr_gov_il_scraper import MrGovILScraper
+from wizbiz_scraper import WizbizScraper
+from govi_scraper import GoviScraper
+from http_client import HttpClient, DEFAULT_RATE, DEFAULT_BURST, DEFAULT_HOST_CONCURRENCY
+from async_engine import AsyncScrapeEngine
+
+# כתובת האתר המקומי של כל מקור - כתובת נפרדת כדי שמגבלות הקצב יהיו לכל אתר בנפרד
+SOURCE_HOSTS = {
+    'mr.gov.il': '127.0.0.1',
+    'wizbiz.co.il': '127.0.0.2',
+    'govi.co.il': '127.0.0.3'
+}
+
+# נתיבי החיפוש באתרים המקומיים (אליהם מתווסף פרמטר העמוד של כל סורק)
+SEARCH_PATHS = {
+    'mr.gov.il': '/search/?s=TENDER',
+    'wizbiz.co.il': '/tenders/',
+    'govi.co.il': '/branch/36'
+}
+
+class StandInSite:
+    """אתר מקומי שמגיש דפים קבועים ב-HTTP/1.1 עם keep-alive, gzip ו-ETag"""
+    
+    def __init__(self, host='127.0.0.1', pages=None, latency=0.0):
+        """pages - מילון נתיב (כולל query) -> HTML, latency - זמן תגובה מדומה בשניות"""
+        self.pages = pages or {}
+        self.latency = latency
+        self.requests = 0
+        # נתיב וכותרות של כל בקשה, לפי סדר ההגעה
+        self.request_log = []
+        self.not_modified = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        site = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            """הגשת הדפים וספירת הבקשות"""
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+            
+            def do_GET(self):
+                """החזרת הדף, דחוס אם הלקוח ביקש"""
+                with site._lock:
+                    site.requests += 1
+                    site.request_log.append((self.path, dict(self.headers)))
+                    site.in_flight += 1
+                    site.max_in_flight = max(site.max_in_flight, site.in_flight)
+                try:
+                    time.sleep(site.latency)
+                    body = site.pages.get(self.path)
+                    if body is None:
+                        self.send_response(404)
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    
+                    data = body.encode('utf-8')
+                    etag = f'"{hashlib.sha1(data).hexdigest()}"'
+                    if self.headers.get('If-None-Match') == etag:
+                        with site._lock:
+                            site.not_modified += 1
+                        self.send_response(304)
+                        self.send_header('ETag', etag)
+                        self.end_headers()
+                        return
+                    
+                    self.send_response(200)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Type', 'text/html; charset=utf-8')
+                    if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                        data = gzip.compress(data)
+                        self.send_header('Content-Encoding', 'gzip')
+                    self.send_header('Content-Length', str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                finally:
+                    with site._lock:
+                        site.in_flight -= 1
+            
+            def log_message(self, format, *args):
+                """ללא הדפסה לכל בקשה"""
+        
+        self.server = ThreadingHTTPServer((host, 0), Handler)
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+    
+    def close(self):
+        """עצירת השרת"""
+        self.server.shutdown()
+        self.server.server_close()
+
+def _pagination(page, pages, next_html):
+    """קישור לעמוד הבא, רק אם זה לא העמוד האחרון"""
+    return next_html if page < pages else ''
+
+def build_pages(source, base_url, pages=3, per_page=10, first_id=0):
+    """עמודי הרשימה ודפי הפרטים של מקור, במבנה ה-HTML של האתר - מילון נתיב -> HTML
+    
+    first_id - מזהה המכרז הראשון ברשימה (מזהה קטן יותר מדמה מכרזים חדשים שנוספו בראש הרשימה)
+    """
+    site_pages = {}
+    search_path = SEARCH_PATHS[source]
+    for page in range(1, pages + 1):
+        items = []
+        for n in range(first_id + (page - 1) * per_page, first_id + page * per_page):
+            title = f"מכרז {n} לעבודות נגרות ואספקת ריהוט"
+            detail = f"/tender/{n}"
+            if source == 'mr.gov.il':
+                items.append(
+                    f'<div class="tender-item"><a class="tender-title" href="{base_url}{detail}">{title}</a>'
+                    f'<span class="publisher-name">משרד הבינוי</span><span class="tender-status">פתוח</span>'
+                    f'<span class="publish-date">01/01/2025</span><span class="submission-date">01/02/2025</span></div>'
+                )
+            elif source == 'wizbiz.co.il':
+                items.append(
+                    f'<tr><td>{n}</td><td>01/01/2025</td><td>מכרז פומבי</td><td>עיריית חיפה</td><td>רשות מקומית</td>'
+                    f'<td>{title}</td><td>01/02/2025</td><td><a href="{base_url}{detail}">פרטים</a></td></tr>'
+                )
+            else:
+                items.append(
+                    f'<div class="tender-item"><div class="tender-title"><a href="{detail}">{title}</a></div>'
+                    f'<span class="publish-date">01/01/2025</span><span class="publisher">עיריית חולון</span>'
+                    f'<span class="submission-date">01/02/2025</span></div>'
+                )
+            site_pages[detail] = (
+                f'<html><body><h1 class="tender-title">{title}</h1>'
+                f'<div class="tender-description">{"תיאור העבודות " * 50}{n}</div>'
+                f'<div class="contact-details contact-info"><span class="contact-name">רכש</span>'
+                f'<span class="contact-email">tenders@example.org</span></div></body></html>'
+            )
+        
+        if source == 'mr.gov.il':
+            listing = ''.join(items) + _pagination(page, pages, '<div class="pagination"><a class="next">הבא</a></div>')
+            path = f"{search_path}&page={page}"
+        elif source == 'wizbiz.co.il':
+            listing = (
+                f'<table class="tenders-table"><tbody>{"".join(items)}</tbody></table>'
+                + _pagination(page, pages, '<a class="next page-numbers">הבא</a>')
+            )
+            path = f"{search_path}page/{page}/" if page > 1 else search_path
+        else:
+            listing = ''.join(items) + _pagination(page, pages, '<div class="pagination"><a class="next">הבא</a></div>')
+            path = f"{search_path}?page={page}" if page > 1 else search_path
+        site_pages[path] = f'<html><body>{listing}</body></html>'
+    return site_pages
+
+def start_sites(pages=3, per_page=10, latency=0.05):
+    """הפעלת אתר מקומי לכל מקור - מחזיר מילון מקור -> StandInSite"""
+    sites = {}
+    for source, host in SOURCE_HOSTS.items():
+        site = StandInSite(host, latency=latency)
+        site.pages.update(build_pages(source, site.url, pages, per_page))
+        sites[source] = site
+    return sites
+
+def make_scrapers(sites, http_client, output_dir='data'):
+    """יצירת שלושת הסורקים כשהם מופנים לאתרים המקומיים"""
+    scrapers = [
+        MrGovILScraper(output_dir=output_dir, http_client=http_client),
+        WizbizScraper(output_dir=output_dir, http_client=http_client),
+        GoviScraper(output_dir=output_dir, http_client=http_client)
+    ]
+    for scraper, source in zip(scrapers, SOURCE_HOSTS):
+        scraper.base_url = f"{sites[source].url}/"
+        scraper.search_url = f"{sites[source].url}{SEARCH_PATHS[source]}"
+    return scrapers
+
+def collect_sequential(scrapers, max_pages, max_details):
+    """האיסוף הנוכחי: מקור אחרי מקור, רשימה ואחריה העשרה"""
+    return [
+        scraper.enrich_tenders_with_details(scraper.fetch_search_results(max_pages=max_pages), max_tenders=max_details)
+        for scraper in scrapers
+    ]
+
+def run_benchmark(max_pages=3, per_page=10, max_details=10, latency=0.05, rate=DEFAULT_RATE,
+                  burst=DEFAULT_BURST, concurrency=DEFAULT_HOST_CONCURRENCY, output_dir='data'):
+    """הרצת שתי דרכי האיסוף מול אותם אתרים מקומיים - מחזיר סיכום לכל דרך"""
+    sites = start_sites(max_pages, per_page, latency)
+    report = {}
+    try:
+        for mode in ('sequential', 'async'):
+            with HttpClient(rate=rate, burst=burst, concurrency=concurrency) as client:
+                scrapers = make_scrapers(sites, client, output_dir)
+                started = time.perf_counter()
+                if mode == 'async':
+                    results = AsyncScrapeEngine(client, host_concurrency=concurrency).run(scrapers, max_pages, max_details)
+                else:
+                    results = collect_sequential(scrapers, max_pages, max_details)
+                elapsed = time.perf_counter() - started
+                
+                stats = client.stats()
+                report[mode] = {
+                    'seconds': round(elapsed, 2),
+                    'tenders': sum(len(tenders) for tenders in results),
+                    'ids': [[tender.id for tender in tenders] for tenders in results],
+                    'requests': sum(host['requests'] for host in stats.values()),
+                    'connections': sum(host['connections'] for host in stats.values())
+                }
+    finally:
+        for site in sites.values():
+            site.close()
+    
+    report['same_results'] = report['sequential']['ids'] == report['async']['ids']
+    return report
+
+def main():
+    """הרצת ההשוואה והדפסת התוצאות"""
+    parser = argparse.ArgumentParser(description='השוואת האיסוף הסדרתי למנוע ה-asyncio מול אתרים מקומיים')
+    parser.add_argument('--pages', type=int, default=3, help='מספר עמודי הרשימה בכל מקור')
+    parser.add_argument('--per-page', type=int, default=10)
+    parser.add_argument('--details', type=int, default=10, help='מספר דפי הפרטים לכל מקור')
+    parser.add_argument('--latency', type=float, default=0.05, help='זמן תגובה מדומה בשניות')
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='בקשות לשנייה לכל אתר (0 ללא הגבלה)')
+    parser.add_argument('--burst', type=int, default=DEFAULT_BURST)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_HOST_CONCURRENCY)
+    parser.add_argument('--output-dir', default='data')
+    args = parser.parse_args()
+    
+    report = run_benchmark(
+        args.pages, args.per_page, args.details, args.latency, rate=args.rate or None,
+        burst=args.burst, concurrency=args.concurrency, output_dir=args.output_dir
+    )
+    for mode in ('sequential', 'async'):
+        result = report[mode]
+        print(f"{mode}: {result['tenders']} מכרזים ב-{result['seconds']} שניות "
+              f"({result['requests']} בקשות ב-{result['connections']} חיבורים)")
+    print(f"תוצאות זהות: {'כן' if report['same_results'] else 'לא'}")
+    return report
+
+if __name__ == "__main__":
+    main()
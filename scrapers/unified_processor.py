@@ -8,13 +8,20 @@ Unified Tender Processor
 """
 
 import os
-import json
+import sys
 import logging
-import pandas as pd
-from datetime import datetime
 from mr_gov_il_scraper import MrGovILScraper
 from wizbiz_scraper import WizbizScraper
 from govi_scraper import GoviScraper
+from http_client import HttpClient
+from http_cache import HttpCache
+from crawl_state import CrawlState
+from async_engine import AsyncScrapeEngine
+
+# רשומת המכרז המשותפת לסורקים ולבסיס הנתונים
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database'))
+from tender_record import as_tender, merge_tenders, write_json, write_csv
+from near_duplicates import cluster_duplicates
 
 # הגדרת לוגר
 logging.basicConfig(
@@ -27,23 +34,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger('unified_processor')
 
+# משתנה סביבה להפעלת מנוע ה-asyncio במקום האיסוף הסדרתי
+ASYNC_SCRAPE_ENV = 'TENDERS_ASYNC_SCRAPE'
+
 class UnifiedTenderProcessor:
     """מעבד מאוחד למכרזי נגרות מכל המקורות"""
     
-    def __init__(self, output_dir='data'):
-        """אתחול המעבד המאוחד"""
+    def __init__(self, output_dir='data', http_client=None, use_async=None, incremental=True):
+        """אתחול המעבד המאוחד
+        
+        use_async - איסוף כל המקורות במנוע ה-asyncio (ברירת המחדל לפי TENDERS_ASYNC_SCRAPE)
+        incremental - עצירת הדפדוף בכל מקור בעמוד שכל המכרזים בו כבר נאספו בריצה קודמת
+        """
         self.output_dir = output_dir
+        if use_async is None:
+            use_async = os.environ.get(ASYNC_SCRAPE_ENV, '') not in ('', '0')
+        self.use_async = use_async
         
         # יצירת תיקיית פלט אם לא קיימת
         os.makedirs(output_dir, exist_ok=True)
         
+        # לקוח HTTP אחד לכל הסורקים - החיבורים לכל אתר נשמרים לאורך כל הריצה,
+        # ודפים שלא השתנו מאז הריצה הקודמת נלקחים מהמטמון שבתיקיית הפלט
+        self.http_client = http_client or HttpClient(cache=HttpCache(output_dir))
+        
+        # סימני המים והמכרזים שכבר נאספו מכל מקור
+        self.crawl_state = CrawlState(output_dir) if incremental else None
+        
         # יצירת סורקים לכל מקור
-        self.mr_gov_il_scraper = MrGovILScraper(output_dir=output_dir)
-        self.wizbiz_scraper = WizbizScraper(output_dir=output_dir)
-        self.govi_scraper = GoviScraper(output_dir=output_dir)
+        scraper_options = {'output_dir': output_dir, 'http_client': self.http_client, 'crawl_state': self.crawl_state}
+        self.mr_gov_il_scraper = MrGovILScraper(**scraper_options)
+        self.wizbiz_scraper = WizbizScraper(**scraper_options)
+        self.govi_scraper = GoviScraper(**scraper_options)
     
     def collect_all_tenders(self, max_pages=3, max_details=10):
         """איסוף מכרזים מכל המקורות"""
+        if self.use_async:
+            return self._collect_async(max_pages, max_details)
+        
         all_tenders = []
         
         # איסוף מכרזים ממינהל הרכש הממשלתי
@@ -68,6 +96,22 @@ class UnifiedTenderProcessor:
             logger.info(f"נאספו {len(govi_tenders)} מכרזים מגובי")
         
         logger.info(f"סה\"כ נאספו {len(all_tenders)} מכרזים מכל המקורות")
+        logger.info(f"חיבורי HTTP: {self.http_client.format_stats()}")
+        return all_tenders
+    
+    def _collect_async(self, max_pages, max_details):
+        """איסוף מכל המקורות במקביל בלולאת asyncio אחת"""
+        logger.info("מתחיל איסוף מכרזים מכל המקורות במנוע asyncio")
+        scrapers = [self.mr_gov_il_scraper, self.wizbiz_scraper, self.govi_scraper]
+        results = AsyncScrapeEngine(self.http_client).run(scrapers, max_pages, max_details)
+        
+        all_tenders = []
+        for scraper, tenders in zip(scrapers, results):
+            logger.info(f"נאספו {len(tenders)} מכרזים מ-{type(scraper).__name__}")
+            all_tenders.extend(tenders)
+        
+        logger.info(f"סה\"כ נאספו {len(all_tenders)} מכרזים מכל המקורות")
+        logger.info(f"חיבורי HTTP: {self.http_client.format_stats()}")
         return all_tenders
     
     def _collect_from_mr_gov_il(self, max_pages, max_details):
@@ -125,58 +169,28 @@ class UnifiedTenderProcessor:
             return []
     
     def standardize_tenders(self, tenders):
-        """המרת כל המכרזים למבנה אחיד"""
-        standardized_tenders = []
-        
-        for tender in tenders:
-            # יצירת מכרז במבנה אחיד
-            standardized_tender = {
-                'id': tender.get('id', ''),
-                'source': tender.get('source', ''),
-                'title': tender.get('title', tender.get('description', '')),
-                'publisher': tender.get('publisher', ''),
-                'publish_date': tender.get('publish_date', ''),
-                'submission_date': tender.get('submission_date', ''),
-                'status': tender.get('status', ''),
-                'url': tender.get('url', tender.get('details_url', '')),
-                'description': tender.get('description', tender.get('full_description', '')),
-                'contact': tender.get('contact', {}),
-                'documents': tender.get('documents', []),
-                'categories': tender.get('categories', []),
-                'scrape_date': tender.get('scrape_date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-            }
-            
-            standardized_tenders.append(standardized_tender)
+        """המרת כל המכרזים למבנה אחיד - הרשומות מעודכנות במקום ולא מועתקות"""
+        standardized_tenders = [as_tender(tender).standardize() for tender in tenders]
         
         logger.info(f"הומרו {len(standardized_tenders)} מכרזים למבנה אחיד")
         return standardized_tenders
     
     def remove_duplicates(self, tenders):
-        """הסרת כפילויות מרשימת המכרזים"""
-        # יצירת מילון עם מפתחות ייחודיים
-        unique_tenders = {}
+        """מיזוג כפילויות ברשימת המכרזים
         
-        for tender in tenders:
-            # יצירת מפתח ייחודי מכותרת המכרז והמפרסם
-            key = f"{tender['title']}_{tender['publisher']}"
-            
-            # אם המכרז כבר קיים, נשמור את המכרז עם המידע המפורט יותר
-            if key in unique_tenders:
-                existing_tender = unique_tenders[key]
-                
-                # בדיקה איזה מכרז מכיל יותר מידע
-                existing_info_count = sum(1 for v in existing_tender.values() if v)
-                new_info_count = sum(1 for v in tender.values() if v)
-                
-                if new_info_count > existing_info_count:
-                    unique_tenders[key] = tender
-            else:
-                unique_tenders[key] = tender
+        אותו מכרז מופיע במקורות שונים עם הבדלי ניסוח, פיסוק וסדר מילים, ולכן
+        הכפילויות מזוהות לפי דמיון (MinHash/LSH, ראו near_duplicates) ולא לפי
+        התאמה מדויקת. כל קבוצת כפילויות ממוזגת לרשומה אחת שדה אחר שדה
+        (merge_tenders), כך שמסמכים, קטגוריות ופרטי קשר של אף מקור לא הולכים לאיבוד.
+        שני מכרזים מאותו מקור עם מזהים שונים אינם ממוזגים לעולם.
+        """
+        result = [merge_tenders([tenders[i] for i in cluster]) for cluster in cluster_duplicates(tenders)]
         
-        # המרה בחזרה לרשימה
-        result = list(unique_tenders.values())
-        
-        logger.info(f"הוסרו {len(tenders) - len(result)} כפילויות, נותרו {len(result)} מכרזים ייחודיים")
+        merged_count = sum(1 for tender in result if tender.merged_from)
+        logger.info(
+            f"מוזגו {len(tenders) - len(result)} כפילויות לתוך {merged_count} מכרזים, "
+            f"נותרו {len(result)} מכרזים ייחודיים"
+        )
         return result
     
     def save_to_json(self, tenders, filename='all_tenders.json'):
@@ -184,8 +198,7 @@ class UnifiedTenderProcessor:
         output_path = os.path.join(self.output_dir, filename)
         
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(tenders, f, ensure_ascii=False, indent=2)
+            write_json(tenders, output_path)
             
             logger.info(f"נשמרו {len(tenders)} מכרזים לקובץ {output_path}")
             return output_path
@@ -198,16 +211,8 @@ class UnifiedTenderProcessor:
         output_path = os.path.join(self.output_dir, filename)
         
         try:
-            # המרת רשימת מילונים ל-DataFrame
-            df = pd.DataFrame(tenders)
-            
-            # טיפול בעמודות מורכבות (רשימות או מילונים)
-            for col in df.columns:
-                if df[col].apply(lambda x: isinstance(x, (dict, list))).any():
-                    df[col] = df[col].apply(lambda x: json.dumps(x, ensure_ascii=False) if isinstance(x, (dict, list)) else x)
-            
-            # שמירה לקובץ CSV
-            df.to_csv(output_path, index=False, encoding='utf-8-sig')
+            # שמירה לקובץ CSV (שדות מורכבים נכתבים כ-JSON)
+            write_csv(tenders, output_path)
             
             logger.info(f"נשמרו {len(tenders)} מכרזים לקובץ {output_path}")
             return output_path
@@ -246,6 +251,12 @@ class UnifiedTenderProcessor:
             if csv_path:
                 output_files['csv'] = csv_path
         
+        # המכרזים שנשמרו מסומנים כמוכרים, כדי שהריצה הבאה תעצור בעמוד שכולו מוכר -
+        # כל רשומה שנכתבה והרשומות שמוזגו לתוכה (merged_from), ולא כל מה שנאסף
+        if self.crawl_state is not None and output_files:
+            merged = [record for tender in unique_tenders for record in tender.merged_from or []]
+            logger.info(f"נרשמו {self.crawl_state.finish(unique_tenders + merged)} מכרזים במצב האיסוף")
+        
         return output_files
 
 if __name__ == "__main__":
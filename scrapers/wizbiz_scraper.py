@@ -8,13 +8,18 @@ Wizbiz Scraper
 """
 
 import os
-import json
+import sys
 import time
 import logging
 import requests
 from datetime import datetime
 from bs4 import BeautifulSoup
-import pandas as pd
+
+# רשומת המכרז המשותפת לסורקים ולבסיס הנתונים
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database'))
+from tender_record import Tender, write_json, write_csv
+from http_client import default_client
+from enrichment import enrich_tenders, DEFAULT_WORKERS
 
 # הגדרת לוגר
 logging.basicConfig(
@@ -30,8 +35,12 @@ logger = logging.getLogger('wizbiz_scraper')
 class WizbizScraper:
     """סורק מכרזים מאתר Wizbiz"""
     
-    def __init__(self, output_dir='data'):
-        """אתחול הסורק"""
+    def __init__(self, output_dir='data', http_client=None, crawl_state=None):
+        """אתחול הסורק
+        
+        http_client - לקוח HTTP משותף (ברירת המחדל: הלקוח של התהליך, עם מטמון ב-output_dir)
+        crawl_state - מצב איסוף (CrawlState) לעצירת הדפדוף בעמוד שכבר נאסף (None לאיסוף מלא)
+        """
         self.base_url = "https://wizbiz.co.il/"
         self.search_url = "https://wizbiz.co.il/%D7%9E%D7%9B%D7%A8%D7%96%D7%99-%D7%A2%D7%91%D7%95%D7%93%D7%95%D7%AA-%D7%A0%D7%92%D7%A8%D7%95%D7%AA/"
         self.headers = {
@@ -39,6 +48,9 @@ class WizbizScraper:
             'Accept-Language': 'he-IL,he;q=0.9,en-US;q=0.8,en;q=0.7',
         }
         self.output_dir = output_dir
+        self.http = http_client or default_client(cache_dir=output_dir)
+        self.detail_workers = DEFAULT_WORKERS
+        self.crawl_state = crawl_state
         
         # יצירת תיקיית פלט אם לא קיימת
         os.makedirs(output_dir, exist_ok=True)
@@ -52,39 +64,17 @@ class WizbizScraper:
             logger.info(f"מאחזר עמוד {current_page} מתוך {max_pages}")
             
             # בניית URL עם פרמטר עמוד
-            page_url = f"{self.search_url}page/{current_page}/" if current_page > 1 else self.search_url
+            page_url = self.listing_url(current_page)
             
             try:
-                response = requests.get(page_url, headers=self.headers)
+                response = self.http.get(page_url, headers=self.headers)
                 response.raise_for_status()
                 
                 # בדיקה אם התגובה תקינה
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # חיפוש טבלת המכרזים בדף
-                    tender_table = soup.select_one('table.tenders-table')
-                    if not tender_table:
-                        logger.warning(f"לא נמצאה טבלת מכרזים בעמוד {current_page}")
-                        break
-                    
-                    # חיפוש שורות הטבלה (כל שורה היא מכרז)
-                    tender_rows = tender_table.select('tbody tr')
-                    
-                    if not tender_rows:
-                        logger.warning(f"לא נמצאו מכרזים בעמוד {current_page}")
-                        break
-                    
-                    # עיבוד כל שורת מכרז
-                    for row in tender_rows:
-                        tender_data = self._parse_tender_row(row)
-                        if tender_data:
-                            all_tenders.append(tender_data)
-                    
-                    # בדיקה אם יש עמוד הבא
-                    next_page_link = soup.select_one('a.next.page-numbers')
-                    if not next_page_link:
-                        logger.info(f"הגענו לעמוד האחרון ({current_page})")
+                    page_tenders, has_next = self.parse_search_page(response.text, current_page)
+                    all_tenders.extend(page_tenders)
+                    if (self.crawl_state is not None and self.crawl_state.reached_known_page(page_tenders, current_page)) or not has_next:
                         break
                     
                     current_page += 1
@@ -98,6 +88,46 @@ class WizbizScraper:
         logger.info(f"סה\"כ נאספו {len(all_tenders)} מכרזים")
         return all_tenders
     
+    def listing_url(self, page):
+        """כתובת עמוד page ברשימת המכרזים"""
+        return f"{self.search_url}page/{page}/" if page > 1 else self.search_url
+    
+    def parse_search_page(self, html, page):
+        """חילוץ המכרזים מ-HTML של עמוד ברשימה - מחזיר (מכרזים, האם יש עמוד הבא)"""
+        tenders = []
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # חיפוש טבלת המכרזים בדף
+        tender_table = soup.select_one('table.tenders-table')
+        if not tender_table:
+            logger.warning(f"לא נמצאה טבלת מכרזים בעמוד {page}")
+            return tenders, False
+        
+        # חיפוש שורות הטבלה (כל שורה היא מכרז)
+        tender_rows = tender_table.select('tbody tr')
+        
+        if not tender_rows:
+            logger.warning(f"לא נמצאו מכרזים בעמוד {page}")
+            return tenders, False
+        
+        # עיבוד כל שורת מכרז
+        for row in tender_rows:
+            tender_data = self._parse_tender_row(row)
+            if tender_data:
+                tenders.append(tender_data)
+        
+        # בדיקה אם יש עמוד הבא
+        next_page_link = soup.select_one('a.next.page-numbers')
+        if not next_page_link:
+            logger.info(f"הגענו לעמוד האחרון ({page})")
+            return tenders, False
+        
+        return tenders, True
+    
+    def detail_url(self, tender):
+        """כתובת דף הפרטים של מכרז (None אם אין)"""
+        return tender.get('details_url')
+    
     def _parse_tender_row(self, row):
         """עיבוד שורת טבלה של מכרז בודד"""
         try:
@@ -131,19 +161,19 @@ class WizbizScraper:
             details_link = cells[7].select_one('a') if len(cells) > 7 else None
             details_url = details_link.get('href', '') if details_link else ""
             
-            # יצירת מילון עם נתוני המכרז
-            tender_data = {
-                'id': tender_id,
-                'publish_date': publish_date,
-                'tender_type': tender_type,
-                'publisher': publisher,
-                'publisher_type': publisher_type,
-                'description': description,
-                'submission_date': submission_date,
-                'details_url': details_url,
-                'source': 'wizbiz.co.il',
-                'scrape_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
+            # יצירת רשומת מכרז
+            tender_data = Tender(
+                id=tender_id,
+                publish_date=publish_date,
+                tender_type=tender_type,
+                publisher=publisher,
+                publisher_type=publisher_type,
+                description=description,
+                submission_date=submission_date,
+                details_url=details_url,
+                source='wizbiz.co.il',
+                scrape_date=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            )
             
             return tender_data
             
@@ -157,100 +187,82 @@ class WizbizScraper:
             return {}
             
         try:
-            response = requests.get(details_url, headers=self.headers)
+            response = self.http.get(details_url, headers=self.headers)
             response.raise_for_status()
             
             if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # חילוץ פרטים נוספים מדף המכרז המלא
-                tender_details = {}
-                
-                # כותרת המכרז
-                title_element = soup.select_one('h1.tender-title')
-                if title_element:
-                    tender_details['title'] = title_element.text.strip()
-                
-                # תיאור מלא
-                description_element = soup.select_one('.tender-description')
-                if description_element:
-                    tender_details['full_description'] = description_element.text.strip()
-                
-                # פרטי קשר
-                contact_element = soup.select_one('.contact-details')
-                if contact_element:
-                    contact_info = {}
-                    
-                    contact_name = contact_element.select_one('.contact-name')
-                    if contact_name:
-                        contact_info['name'] = contact_name.text.strip()
-                    
-                    contact_phone = contact_element.select_one('.contact-phone')
-                    if contact_phone:
-                        contact_info['phone'] = contact_phone.text.strip()
-                    
-                    contact_email = contact_element.select_one('.contact-email')
-                    if contact_email:
-                        contact_info['email'] = contact_email.text.strip()
-                    
-                    if contact_info:
-                        tender_details['contact'] = contact_info
-                
-                # מסמכים מצורפים
-                documents = []
-                document_elements = soup.select('.documents-list .document-item')
-                for doc in document_elements:
-                    doc_link = doc.select_one('a')
-                    if doc_link:
-                        doc_url = doc_link.get('href', '')
-                        doc_name = doc_link.text.strip()
-                        documents.append({
-                            'name': doc_name,
-                            'url': doc_url
-                        })
-                
-                if documents:
-                    tender_details['documents'] = documents
-                
-                return tender_details
+                return self.parse_tender_details(response.text)
                 
         except requests.exceptions.RequestException as e:
             logger.error(f"שגיאה באחזור פרטי מכרז {details_url}: {str(e)}")
         
         return {}
     
-    def enrich_tenders_with_details(self, tenders, max_tenders=None):
-        """העשרת רשימת המכרזים עם פרטים מלאים"""
-        enriched_tenders = []
+    def parse_tender_details(self, html):
+        """חילוץ הפרטים המלאים מ-HTML של דף מכרז (משותף לאחזור הרגיל ולמנוע ה-asyncio)"""
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # חילוץ פרטים נוספים מדף המכרז המלא
+        tender_details = {}
         
-        # הגבלת מספר המכרזים לעיבוד אם צוין
-        tenders_to_process = tenders[:max_tenders] if max_tenders else tenders
+        # כותרת המכרז
+        title_element = soup.select_one('h1.tender-title')
+        if title_element:
+            tender_details['title'] = title_element.text.strip()
         
-        for i, tender in enumerate(tenders_to_process):
-            logger.info(f"מעשיר מכרז {i+1}/{len(tenders_to_process)}: {tender.get('id', 'unknown')}")
+        # תיאור מלא
+        description_element = soup.select_one('.tender-description')
+        if description_element:
+            tender_details['full_description'] = description_element.text.strip()
+        
+        # פרטי קשר
+        contact_element = soup.select_one('.contact-details')
+        if contact_element:
+            contact_info = {}
             
-            if 'details_url' in tender and tender['details_url']:
-                # אחזור פרטים מלאים
-                details = self.fetch_tender_details(tender['details_url'])
-                
-                # מיזוג הפרטים עם נתוני המכרז הבסיסיים
-                enriched_tender = {**tender, **details}
-                enriched_tenders.append(enriched_tender)
-                
-                # המתנה קצרה בין בקשות
-                time.sleep(2)
-            else:
-                enriched_tenders.append(tender)
+            contact_name = contact_element.select_one('.contact-name')
+            if contact_name:
+                contact_info['name'] = contact_name.text.strip()
+            
+            contact_phone = contact_element.select_one('.contact-phone')
+            if contact_phone:
+                contact_info['phone'] = contact_phone.text.strip()
+            
+            contact_email = contact_element.select_one('.contact-email')
+            if contact_email:
+                contact_info['email'] = contact_email.text.strip()
+            
+            if contact_info:
+                tender_details['contact'] = contact_info
+        
+        # מסמכים מצורפים
+        documents = []
+        document_elements = soup.select('.documents-list .document-item')
+        for doc in document_elements:
+            doc_link = doc.select_one('a')
+            if doc_link:
+                doc_url = doc_link.get('href', '')
+                doc_name = doc_link.text.strip()
+                documents.append({
+                    'name': doc_name,
+                    'url': doc_url
+                })
         
-        return enriched_tenders
+        if documents:
+            tender_details['documents'] = documents
+        
+        return tender_details
+    
+    def enrich_tenders_with_details(self, tenders, max_tenders=None, max_workers=None):
+        """העשרת רשימת המכרזים עם פרטים מלאים, במקביל (ראו enrichment.enrich_tenders)"""
+        return enrich_tenders(self, tenders, max_tenders=max_tenders, max_workers=max_workers, logger=logger)
     
     def save_to_json(self, tenders, filename='wizbiz_tenders.json'):
         """שמירת המכרזים לקובץ JSON"""
         output_path = os.path.join(self.output_dir, filename)
         
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(tenders, f, ensure_ascii=False, indent=2)
+            write_json(tenders, output_path)
             
             logger.info(f"נשמרו {len(tenders)} מכרזים לקובץ {output_path}")
             return output_path
@@ -263,16 +275,8 @@ class WizbizScraper:
         output_path = os.path.join(self.output_dir, filename)
         
         try:
-            # המרת רשימת מילונים ל-DataFrame
-            df = pd.DataFrame(tenders)
-            
-            # טיפול בעמודות מורכבות (רשימות או מילונים)
-            for col in df.columns:
-                if df[col].apply(lambda x: isinstance(x, (dict, list))).any():
-                    df[col] = df[col].apply(lambda x: json.dumps(x, ensure_ascii=False) if isinstance(x, (dict, list)) else x)
-            
-            # שמירה לקובץ CSV
-            df.to_csv(output_path, index=False, encoding='utf-8-sig')
+            # שמירה לקובץ CSV (שדות מורכבים נכתבים כ-JSON)
+            write_csv(tenders, output_path)
             
             logger.info(f"נשמרו {len(tenders)} מכרזים לקובץ {output_path}")
             return output_path
@@ -308,6 +312,10 @@ class WizbizScraper:
             if csv_path:
                 output_files['csv'] = csv_path
         
+        # המכרזים שנשמרו מסומנים כמוכרים לריצה הבאה
+        if self.crawl_state is not None and output_files:
+            self.crawl_state.finish(enriched_tenders)
+        
         return output_files
 
 if __name__ == "__main__":
@@ -11,6 +11,8 @@ import os
 import sys
 import json
 import logging
+import time
+import tempfile
 import unittest
 from pathlib import Path
 
@@ -195,12 +197,365 @@ class TenderScraperTest(unittest.TestCase):
             logger.error(f"שגיאה בבדיקת המעבד המאוחד: {e}")
             self.fail(f"שגיאה בבדיקת המעבד המאוחד: {e}")
 
+def close_processors(processors):
+    """סגירת מטמון ה-HTTP ומצב האיסוף של מעבדים מאוחדים שנוצרו בבדיקה"""
+    for processor in processors:
+        processor.http_client.close()
+        if processor.crawl_state is not None:
+            processor.crawl_state.close()
+
+class HttpClientTest(unittest.TestCase):
+    """בדיקות לשכבת האחזור המשותפת של הסורקים"""
+    
+    def setUp(self):
+        """הפעלת אתר מקומי ותיקיית פלט זמנית"""
+        sys.path.append(str(SCRAPERS_DIR))
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.processors = []
+        from scrape_benchmark import StandInSite
+        self.site = StandInSite(pages={f'/page/{i}': f'<html><body>{"מכרז נגרות " * 200}{i}</body></html>' for i in range(10)})
+    
+    def tearDown(self):
+        """עצירת האתר המקומי, סגירת המעבדים ומחיקת התיקייה"""
+        self.site.close()
+        close_processors(self.processors)
+        self.temp_dir.cleanup()
+        if str(SCRAPERS_DIR) in sys.path:
+            sys.path.remove(str(SCRAPERS_DIR))
+    
+    def test_connections_reused_per_host(self):
+        """בדיקה שכל הבקשות לאתר עוברות בחיבור אחד, דחוסות ועם זמן המתנה"""
+        from http_client import HttpClient
+        with HttpClient(timeout=(1, 5), pool_maxsize=2, rate=None) as client:
+            for i in range(10):
+                response = client.get(f"{self.site.url}/page/{i}")
+                self.assertTrue(response.text.endswith(f'{i}</body></html>'))
+            
+            stats = client.stats()['127.0.0.1']
+        self.assertEqual((stats['requests'], stats['connections'], stats['reused']), (10, 1, 9))
+        self.assertLess(stats['bytes_received'], stats['bytes_decoded'])
+        self.assertIn('gzip', self.site.request_log[0][1]['Accept-Encoding'])
+    
+    def test_concurrent_enrichment_keeps_order_and_limits(self):
+        """בדיקה שההעשרה מקבילית, שומרת על הסדר ומכבדת את הקצב והמקביליות של האתר"""
+        import mr_gov_il_scraper
+        from http_client import HttpClient
+        from scrape_benchmark import StandInSite
+        self.site.close()
+        self.site = StandInSite(
+            pages={f'/tender/{i}': f'<html><h1 class="tender-title">מכרז {i}</h1></html>' for i in range(12)},
+            latency=0.05
+        )
+        tenders = [mr_gov_il_scraper.Tender(id=str(i), url=f"{self.site.url}/tender/{i}") for i in range(12)]
+        tenders.append(mr_gov_il_scraper.Tender(id='no-url'))
+        with HttpClient(rate=None) as client:
+            client.configure_host('127.0.0.1', rate=30, burst=3, concurrency=3)
+            scraper = mr_gov_il_scraper.MrGovILScraper(output_dir=self.temp_dir.name, http_client=client)
+            started = time.perf_counter()
+            enriched = scraper.enrich_tenders_with_details(tenders, max_workers=6)
+            elapsed = time.perf_counter() - started
+        
+        self.assertEqual([tender.title for tender in enriched], [f'מכרז {i}' for i in range(12)] + [''])
+        # בקשה אחת לכל דף פרטים, עד 3 במקביל
+        self.assertEqual(sorted(path for path, _ in self.site.request_log), sorted(f'/tender/{i}' for i in range(12)))
+        self.assertEqual(self.site.max_in_flight, 3)
+        # 3 בקשות ברצף ואחריהן 9 בקשות בקצב של 30 לשנייה - חסם תחתון בלבד, שאינו תלוי במהירות המכונה
+        self.assertGreaterEqual(elapsed, 9 / 30)
+        self.assertGreater(client.stats()['127.0.0.1']['throttled_seconds'], 0)
+    
+    def test_scrapers_share_client(self):
+        """בדיקה שהמעבד המאוחד מעביר לקוח אחד לכל הסורקים"""
+        import unified_processor
+        processor = unified_processor.UnifiedTenderProcessor(output_dir=self.temp_dir.name)
+        self.processors.append(processor)
+        self.assertIs(processor.mr_gov_il_scraper.http, processor.http_client)
+        self.assertIs(processor.wizbiz_scraper.http, processor.http_client)
+        self.assertIs(processor.govi_scraper.http, processor.http_client)
+
+class AsyncScrapeEngineTest(unittest.TestCase):
+    """בדיקות למנוע האיסוף ב-asyncio מול אתרים מקומיים"""
+    
+    def setUp(self):
+        """הפעלת אתר מקומי לכל מקור ותיקיית פלט זמנית"""
+        sys.path.append(str(SCRAPERS_DIR))
+        import scrape_benchmark
+        self.benchmark = scrape_benchmark
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.processors = []
+        self.sites = scrape_benchmark.start_sites(pages=3, per_page=5, latency=0.05)
+    
+    def tearDown(self):
+        """עצירת האתרים המקומיים, סגירת המעבדים ומחיקת התיקייה"""
+        for site in self.sites.values():
+            site.close()
+        close_processors(self.processors)
+        self.temp_dir.cleanup()
+        if str(SCRAPERS_DIR) in sys.path:
+            sys.path.remove(str(SCRAPERS_DIR))
+    
+    def test_engine_matches_parsers_and_limits_hosts(self):
+        """בדיקה שהמנוע מחזיר את המכרזים לפי הסדר, מועשרים, ובמגבלת המקביליות של כל אתר"""
+        from http_client import HttpClient
+        from async_engine import AsyncScrapeEngine
+        with HttpClient(rate=None) as client:
+            scrapers = self.benchmark.make_scrapers(self.sites, client, self.temp_dir.name)
+            results = AsyncScrapeEngine(client, host_concurrency=2).run(scrapers, max_pages=5, max_details=8)
+        
+        expected_ids = [str(n) for n in range(8)]
+        self.assertEqual([[tender.id for tender in tenders] for tenders in results], [expected_ids] * 3)
+        self.assertEqual(results[0][7].title, 'מכרז 7 לעבודות נגרות ואספקת ריהוט')
+        self.assertTrue(results[1][0].get('full_description').endswith('0'))
+        self.assertTrue(results[2][3].description.endswith('3'))
+        for site in self.sites.values():
+            # דפי הפרטים נשלפים במקביל, עד 2 בקשות לכל אתר
+            self.assertEqual(site.max_in_flight, 2)
+            # 3 עמודים, 8 דפי פרטים ולכל היותר 2 עמודים שנשלפו מראש אחרי העמוד האחרון
+            self.assertGreaterEqual(site.requests, 3 + 8)
+            self.assertLessEqual(site.requests, 3 + 8 + 2)
+    
+    def test_timeout_cancels_sources(self):
+        """בדיקה שמקור שלא הסתיים בזמן מבוטל ומחזיר רשימה ריקה"""
+        from http_client import HttpClient
+        from async_engine import AsyncScrapeEngine
+        for site in self.sites.values():
+            site.latency = 0.5
+        with HttpClient(rate=None) as client:
+            scrapers = self.benchmark.make_scrapers(self.sites, client, self.temp_dir.name)
+            results = AsyncScrapeEngine(client, timeout=0.2).run(scrapers, max_pages=3, max_details=5)
+        
+        self.assertEqual(results, [[], [], []])
+        # האיסוף בוטל לפני שעמוד הרשימה הראשון חזר - אף דף פרטים לא התבקש
+        for site in self.sites.values():
+            self.assertLessEqual(site.requests, 3)
+    
+    def test_parser_error_logged_with_traceback(self):
+        """בדיקה ששגיאה בסורק מחזירה רשימה ריקה למקור שלו ונרשמת ללוג עם ה-traceback"""
+        from http_client import HttpClient
+        from async_engine import AsyncScrapeEngine
+        
+        def broken_parser(html, page):
+            """מפענח עמודים שנכשל"""
+            raise ValueError('מבנה עמוד לא צפוי')
+        
+        with HttpClient(rate=None) as client:
+            scrapers = self.benchmark.make_scrapers(self.sites, client, self.temp_dir.name)
+            scrapers[1].parse_search_page = broken_parser
+            with self.assertLogs('async_engine', level='ERROR') as logs:
+                results = AsyncScrapeEngine(client).run(scrapers, max_pages=1, max_details=2)
+        
+        self.assertEqual([len(tenders) for tenders in results], [2, 0, 2])
+        record, = logs.records
+        self.assertIs(record.exc_info[0], ValueError)
+        self.assertIn('broken_parser', logs.output[0])
+    
+    def test_processor_flag(self):
+        """בדיקה שמשתנה הסביבה מפעיל את מנוע ה-asyncio במעבד המאוחד"""
+        import unified_processor
+        os.environ[unified_processor.ASYNC_SCRAPE_ENV] = '1'
+        try:
+            self.processors.append(unified_processor.UnifiedTenderProcessor(output_dir=self.temp_dir.name))
+        finally:
+            del os.environ[unified_processor.ASYNC_SCRAPE_ENV]
+        self.processors.append(unified_processor.UnifiedTenderProcessor(output_dir=self.temp_dir.name))
+        self.assertEqual([processor.use_async for processor in self.processors], [True, False])
+
+class HttpCacheTest(unittest.TestCase):
+    """בדיקות למטמון ה-HTTP ולבקשות המותנות"""
+    
+    def setUp(self):
+        """הפעלת אתר מקומי שמחזיר ETag ותיקיית מטמון זמנית"""
+        sys.path.append(str(SCRAPERS_DIR))
+        from scrape_benchmark import StandInSite
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.site = StandInSite(pages={f'/tender/{i}': f'<html>{"פרטי מכרז " * 100}{i}</html>' for i in range(20)})
+    
+    def tearDown(self):
+        """עצירת האתר ומחיקת המטמון"""
+        self.site.close()
+        self.temp_dir.cleanup()
+        if str(SCRAPERS_DIR) in sys.path:
+            sys.path.remove(str(SCRAPERS_DIR))
+    
+    def test_not_modified_served_from_cache(self):
+        """בדיקה שדף שלא השתנה מוחזר מהמטמון אחרי 304, גם בריצה הבאה, ודף ששונה מתעדכן"""
+        from http_client import HttpClient
+        from http_cache import HttpCache
+        url = f"{self.site.url}/tender/1"
+        with HttpClient(rate=None, cache=HttpCache(self.temp_dir.name)) as client:
+            first = client.get(url)
+            self.assertFalse(first.from_cache)
+        
+        # ריצה חדשה עם אותה תיקייה
+        with HttpClient(rate=None, cache=HttpCache(self.temp_dir.name)) as client:
+            second = client.get(url)
+            self.assertTrue(second.from_cache)
+            self.assertEqual((second.status_code, second.text), (200, first.text))
+            self.assertEqual(self.site.not_modified, 1)
+            
+            self.site.pages['/tender/1'] += 'עודכן'
+            third = client.get(url)
+            self.assertFalse(third.from_cache)
+            self.assertTrue(third.text.endswith('עודכן'))
+            self.assertTrue(client.get(url).from_cache)
+            
+            stats = client.stats()['127.0.0.1']
+        self.assertEqual((stats['requests'], stats['cache_hits']), (3, 2))
+        self.assertGreater(stats['bytes_saved'], 0)
+    
+    def test_eviction_keeps_recent_pages(self):
+        """בדיקה שהמטמון לא עובר את הגודל המרבי ומפנה קודם את הדפים הישנים"""
+        from http_client import HttpClient
+        from http_cache import HttpCache
+        cache = HttpCache(self.temp_dir.name, max_bytes=200)
+        with HttpClient(rate=None, cache=cache) as client:
+            for i in range(20):
+                client.get(f"{self.site.url}/tender/{i}")
+                self.assertLessEqual(cache.size(), 200)
+            
+            self.assertIsNone(cache.lookup(f"{self.site.url}/tender/0"))
+            self.assertIsNotNone(cache.lookup(f"{self.site.url}/tender/19"))
+            self.assertLess(len(cache), 20)
+
+class CrawlStateTest(unittest.TestCase):
+    """בדיקות לאיסוף המצטבר - עצירת הדפדוף בעמוד שכבר נאסף"""
+    
+    def setUp(self):
+        """הפעלת אתרים מקומיים ותיקיית מצב זמנית"""
+        sys.path.append(str(SCRAPERS_DIR))
+        import scrape_benchmark
+        self.benchmark = scrape_benchmark
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.sites = scrape_benchmark.start_sites(pages=5, per_page=5, latency=0.0)
+    
+    def tearDown(self):
+        """עצירת האתרים ומחיקת המצב"""
+        for site in self.sites.values():
+            site.close()
+        self.temp_dir.cleanup()
+        if str(SCRAPERS_DIR) in sys.path:
+            sys.path.remove(str(SCRAPERS_DIR))
+    
+    def make_scrapers(self, client):
+        """סורקים מופנים לאתרים המקומיים עם מצב איסוף משותף"""
+        from crawl_state import CrawlState
+        state = CrawlState(self.temp_dir.name)
+        scrapers = self.benchmark.make_scrapers(self.sites, client, self.temp_dir.name)
+        for scraper in scrapers:
+            scraper.crawl_state = state
+        return state, scrapers
+    
+    def test_refresh_stops_at_known_page(self):
+        """בדיקה שאחרי ריצה מלאה, ריענון עם 3 מכרזים חדשים מגיע לשני עמודים בלבד"""
+        from http_client import HttpClient
+        from async_engine import AsyncScrapeEngine
+        with HttpClient(rate=None) as client:
+            state, scrapers = self.make_scrapers(client)
+            results = AsyncScrapeEngine(client, prefetch_pages=0).run(scrapers, max_pages=5, max_details=None)
+            self.assertEqual([len(tenders) for tenders in results], [25, 25, 25])
+            self.assertEqual(state.finish([tender for tenders in results for tender in tenders]), 75)
+            self.assertIsNotNone(state.watermark('govi.co.il'))
+            state.close()
+            
+            # 3 מכרזים חדשים בראש הרשימה של כל מקור
+            for source, site in self.sites.items():
+                site.pages.update(self.benchmark.build_pages(source, site.url, 5, 5, first_id=-3))
+                site.requests = 0
+            state, scrapers = self.make_scrapers(client)
+            results = AsyncScrapeEngine(client, prefetch_pages=0).run(scrapers, max_pages=5, max_details=None)
+        
+        for tenders, site in zip(results, self.sites.values()):
+            self.assertEqual([tender.id for tender in tenders], [str(n) for n in range(-3, 7)])
+            # 2 עמודי רשימה ו-10 דפי פרטים
+            self.assertEqual(site.requests, 2 + 10)
+    
+    def test_unchanged_listing_fetches_one_page(self):
+        """בדיקה שמכרזים נרשמים רק ב-commit, ושאחריו הדפדוף הרגיל עוצר בעמוד הראשון"""
+        from http_client import HttpClient
+        site = self.sites['wizbiz.co.il']
+        with HttpClient(rate=None) as client:
+            state, scrapers = self.make_scrapers(client)
+            listing, _ = scrapers[1].parse_search_page(site.pages['/tenders/'], 1)
+            state.observe(listing)
+            state.close()
+            
+            # ריצה שלא הגיעה ל-commit לא מסמנת את המכרזים
+            state, scrapers = self.make_scrapers(client)
+            self.assertFalse(state.is_known_page(listing))
+            state.observe(listing)
+            state.commit()
+            
+            site.requests = 0
+            tenders = scrapers[1].fetch_search_results(max_pages=5)
+        
+        self.assertEqual([tender.id for tender in tenders], [str(n) for n in range(5)])
+        self.assertEqual(site.requests, 1)
+
+class DuplicateRemovalTest(unittest.TestCase):
+    """בדיקות למיזוג הכפילויות במעבד המאוחד"""
+    
+    def setUp(self):
+        """מעבד מאוחד עם תיקיית פלט זמנית"""
+        sys.path.append(str(SCRAPERS_DIR))
+        import unified_processor
+        self.unified_processor = unified_processor
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.processor = unified_processor.UnifiedTenderProcessor(output_dir=self.temp_dir.name)
+    
+    def tearDown(self):
+        """סגירת המטמון ומצב האיסוף ומחיקת התיקייה"""
+        close_processors([self.processor])
+        self.temp_dir.cleanup()
+        if str(SCRAPERS_DIR) in sys.path:
+            sys.path.remove(str(SCRAPERS_DIR))
+    
+    def test_same_source_tenders_kept_apart(self):
+        """בדיקה ששני מכרזים דומים מאותו מקור נשמרים בנפרד, ואותו מכרז ממקור אחר ממוזג"""
+        from tender_record import Tender
+        tenders = [
+            Tender(id='101', source='mr.gov.il', title='עבודות נגרות בבית ספר יסודי אלון',
+                   publisher='עיריית חיפה', submission_date='01/12/2026'),
+            Tender(id='102', source='mr.gov.il', title='עבודות נגרות בבית ספר יסודי ארז',
+                   publisher='עיריית חיפה', submission_date='15/12/2026'),
+            Tender(id='g-7', source='govi.co.il', title='עבודות נגרות בבית ספר יסודי ארז',
+                   publisher='עיריית חיפה', submission_date='15/12/2026', description='פירוט העבודות')
+        ]
+        result = self.processor.remove_duplicates(tenders)
+        self.assertEqual([tender.id for tender in result], ['101', '102'])
+        self.assertEqual(result[1].description, 'פירוט העבודות')
+        self.assertEqual([record['id'] for record in result[1].merged_from], ['102', 'g-7'])
+    
+    def test_run_observes_saved_tenders(self):
+        """בדיקה שמצב האיסוף מסמן את המכרזים שנשמרו ואת אלה שמוזגו לתוכם, ורק אחרי שמירה"""
+        from tender_record import Tender
+        tenders = [
+            Tender(id='101', source='mr.gov.il', title='עבודות נגרות בבית ספר יסודי אלון',
+                   publisher='עיריית חיפה', publish_date='01/10/2026'),
+            Tender(id='g-7', source='govi.co.il', title='נגרות בבית הספר היסודי אלון (עבודות)',
+                   publisher='עיריית חיפה', publish_date='01/10/2026')
+        ]
+        self.processor.collect_all_tenders = lambda max_pages, max_details: tenders
+        self.assertEqual(self.processor.run(save_formats=[]), {})
+        self.assertFalse(self.processor.crawl_state.is_known(tenders[0]))
+        
+        output_files = self.processor.run(save_formats=['json'])
+        self.assertEqual(list(output_files), ['json'])
+        self.assertTrue(all(self.processor.crawl_state.is_known(tender) for tender in tenders))
+        self.assertFalse(self.processor.crawl_state.is_known({'source': 'mr.gov.il', 'id': '102'}))
+
 def run_tests():
     """הפעלת כל הבדיקות"""
     logger.info("מתחיל בדיקות למערכת איסוף נתוני מכרזים")
     
     # הפעלת הבדיקות
-    test_suite = unittest.TestLoader().loadTestsFromTestCase(TenderScraperTest)
+    loader = unittest.TestLoader()
+    test_suite = unittest.TestSuite([
+        loader.loadTestsFromTestCase(TenderScraperTest),
+        loader.loadTestsFromTestCase(HttpClientTest),
+        loader.loadTestsFromTestCase(AsyncScrapeEngineTest),
+        loader.loadTestsFromTestCase(HttpCacheTest),
+        loader.loadTestsFromTestCase(CrawlStateTest),
+        loader.loadTestsFromTestCase(DuplicateRemovalTest)
+    ])
     test_result = unittest.TextTestRunner(verbosity=2).run(test_suite)
     
     # סיכום תוצאות הבדיקות
@@ -14,6 +14,9 @@ import logging
 import unittest
 import tempfile
 import sqlite3
+import gzip
+import threading
+import http.client
 from pathlib import Path
 
 # הגדרת נתיבים
@@ -262,12 +265,1105 @@ class TenderDatabaseTest(unittest.TestCase):
             logger.error(f"שגיאה בבדיקת חיפוש מכרזים: {e}")
             self.fail(f"שגיאה בבדיקת חיפוש מכרזים: {e}")
 
+class ModelsTestCase(unittest.TestCase):
+    """מחלקת בסיס לבדיקות מודלים מול בסיס נתונים זמני"""
+    
+    def setUp(self):
+        """הכנה לפני כל בדיקה"""
+        sys.path.append(str(DATABASE_DIR))
+        import models
+        self.models = models
+        
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_db_path = os.path.join(self.temp_dir.name, 'tenders.db')
+        self.db = models.initialize_database(self.temp_db_path, DATABASE_DIR / "schema.sql")
+    
+    def tearDown(self):
+        """ניקוי לאחר כל בדיקה"""
+        self.db.close_all()
+        self.temp_dir.cleanup()
+        if str(DATABASE_DIR) in sys.path:
+            sys.path.remove(str(DATABASE_DIR))
+    
+    def make_tender(self, external_id, **fields):
+        """יצירת נתוני מכרז לבדיקה"""
+        tender_data = {
+            'id': external_id,
+            'title': f'מכרז לעבודות נגרות {external_id}',
+            'description': 'אספקה והתקנה של ארונות עץ',
+            'publisher': 'משרד החינוך',
+            'publish_date': '01/01/2025',
+            'submission_date': '01/02/2025',
+            'status': 'פתוח',
+            'url': f'https://mr.gov.il/tender/{external_id}',
+            'source': 'mr.gov.il',
+            'categories': ['נגרות', 'ריהוט'],
+            'contact': {'name': 'ישראל ישראלי', 'email': 'a@example.com'},
+            'documents': [{'name': 'מפרט', 'url': f'https://mr.gov.il/doc/{external_id}'}]
+        }
+        tender_data.update(fields)
+        return tender_data
+
+class DatabaseConnectionTest(ModelsTestCase):
+    """בדיקות למנהל החיבורים של Database"""
+    
+    def test_persistent_connection_reused(self):
+        """בדיקה שבמצב persistent נעשה שימוש חוזר באותו חיבור"""
+        conn = self.db.connect()
+        self.db.execute("SELECT 1")
+        self.db.close()
+        self.assertIs(self.db.connect(), conn)
+        
+        journal_mode = self.db.execute("PRAGMA journal_mode")[0][0]
+        self.assertEqual(journal_mode.lower(), 'wal')
+    
+    def test_transaction_spans_model_calls(self):
+        """בדיקה שטרנזקציה תחומה מבוטלת כולה כשנזרקת חריגה"""
+        tender_model = self.models.TenderModel(self.db)
+        tender_data = {
+            'id': '1001',
+            'title': 'מכרז לעבודות נגרות',
+            'publisher': 'משרד החינוך',
+            'source': 'mr.gov.il',
+            'categories': ['נגרות'],
+            'contact': {'name': 'ישראל ישראלי'}
+        }
+        
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                tender_model.create(tender_data)
+                raise RuntimeError("ביטול")
+        self.assertEqual(self.db.execute("SELECT COUNT(*) FROM tenders")[0][0], 0)
+        
+        with self.db.transaction():
+            tender_id = tender_model.create(tender_data)
+        self.assertEqual(len(tender_model.get_categories(tender_id)), 1)
+        self.assertEqual(len(tender_model.get_contacts(tender_id)), 1)
+    
+    def test_non_persistent_mode_closes_connection(self):
+        """בדיקה שבמצב ברירת המחדל החיבור נסגר לאחר כל שאילתה"""
+        db = self.models.Database(self.temp_db_path)
+        db.execute("SELECT 1")
+        self.assertIsNone(db.connection)
+
+class TenderIngestTest(ModelsTestCase):
+    """בדיקות לייבוא מכרזים באצוות"""
+    
+    def test_bulk_upsert_stats(self):
+        """בדיקת הכנסה, עדכון וזיהוי מכרזים שלא השתנו"""
+        tender_model = self.models.TenderModel(self.db)
+        tenders = [self.make_tender(str(i)) for i in range(25)]
+        
+        stats = tender_model.bulk_upsert(tenders, batch_size=10)
+        self.assertEqual([batch['rows'] for batch in stats], [10, 10, 5])
+        self.assertEqual(sum(batch['inserted'] for batch in stats), 25)
+        self.assertTrue(all(batch['rows_per_sec'] > 0 for batch in stats))
+        
+        tenders[3]['status'] = 'סגור'
+        stats = tender_model.bulk_upsert(tenders, batch_size=100)
+        self.assertEqual((stats[0]['inserted'], stats[0]['updated'], stats[0]['unchanged']), (0, 1, 24))
+        
+        tender = tender_model.get_by_external_id('3', 'mr.gov.il')
+        self.assertEqual(tender['status'], 'סגור')
+        self.assertEqual(len(tender_model.get_categories(tender['id'])), 2)
+        self.assertEqual(len(tender_model.get_contacts(tender['id'])), 1)
+        self.assertEqual(len(tender_model.get_documents(tender['id'])), 1)
+        self.assertEqual(self.db.execute("SELECT COUNT(*) FROM tenders")[0][0], 25)
+    def test_reingest_skips_unchanged(self):
+        """בדיקה שייבוא חוזר לא כותב מכרזים שלא השתנו"""
+        tender_model = self.models.TenderModel(self.db)
+        tenders = [self.make_tender(str(i)) for i in range(3)]
+        tender_model.bulk_upsert(tenders)
+        self.db.execute("UPDATE tenders SET updated_at = '2000-01-01 00:00:00'")
+        
+        # שינוי במסמכים בלבד נחשב שינוי במכרז
+        tenders[1]['documents'].append({'name': 'נספח', 'url': 'https://mr.gov.il/doc/extra'})
+        stats = tender_model.bulk_upsert(tenders)
+        self.assertEqual((stats[0]['updated'], stats[0]['unchanged']), (1, 2))
+        
+        rows = self.db.execute("SELECT external_id, updated_at FROM tenders ORDER BY external_id")
+        touched = [row['external_id'] for row in rows if row['updated_at'] != '2000-01-01 00:00:00']
+        self.assertEqual(touched, ['1'])
+    
+    def test_initialize_existing_database(self):
+        """בדיקה שאתחול חוזר של בסיס נתונים קיים אינו נכשל ואינו מוחק נתונים"""
+        self.models.TenderModel(self.db).bulk_upsert([self.make_tender('1')])
+        self.db.close_all()
+        
+        self.db = self.models.initialize_database(self.temp_db_path, DATABASE_DIR / "schema.sql")
+        self.assertEqual(self.db.execute("SELECT COUNT(*) FROM tenders")[0][0], 1)
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.execute(
+                "INSERT INTO tenders (external_id, title, publisher, source) VALUES ('1', 'x', 'y', 'mr.gov.il')"
+            )
+
+class TenderSearchTest(ModelsTestCase):
+    """בדיקות לחיפוש המלא במכרזים"""
+    
+    def test_hebrew_normalization(self):
+        """בדיקת התאמה למרות ניקוד, אותיות סופיות ואותיות שימוש"""
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([
+            self.make_tender('1', title='אספקת אֲרוֹן ספרים לבית הספר', description='עבודות נגרות'),
+            self.make_tender('2', title='שיפוץ מבנה', description='והמטבחים בבניין העירייה'),
+            self.make_tender('3', title='ניקיון משרדים', description='שירותי ניקיון')
+        ])
+        
+        # ניקוד והשלמת תחילית עם אות סופית מקופלת
+        results = tender_model.search('ארונ')
+        self.assertEqual([r['external_id'] for r in results], ['1'])
+        self.assertIn('<mark>אֲרוֹן</mark>', results[0]['snippet'])
+        
+        # אותיות שימוש בטקסט ובחיפוש
+        self.assertEqual([r['external_id'] for r in tender_model.search('מטבחים')], ['2'])
+        self.assertEqual([r['external_id'] for r in tender_model.search('בבית')], ['1'])
+        self.assertEqual(tender_model.search('נגרות', status='סגור'), [])
+    
+    def test_index_follows_updates_and_deletes(self):
+        """בדיקה שהטריגרים מסנכרנים את האינדקס בעדכון ובמחיקה"""
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([self.make_tender('1', title='אספקת דלתות עץ')])
+        tender_id = tender_model.get_by_external_id('1', 'mr.gov.il')['id']
+        
+        tender_model.update(tender_id, self.make_tender('1', title='אספקת חלונות'))
+        self.assertEqual(tender_model.search('דלתות'), [])
+        self.assertEqual(len(tender_model.search('חלונות')), 1)
+        
+        tender_model.delete(tender_id)
+        self.assertEqual(tender_model.search('חלונות'), [])
+
+class TenderPaginationTest(ModelsTestCase):
+    """בדיקות לדפדוף לפי cursor"""
+    
+    def test_cursor_pages_are_stable(self):
+        """בדיקה שהדפדוף עובר על כל המכרזים פעם אחת גם כשנוספים מכרזים חדשים"""
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([
+            self.make_tender(str(i), publish_date=f'2025-01-{i % 5 + 1:02d}') for i in range(23)
+        ])
+        
+        seen = []
+        page = tender_model.get_page(limit=10)
+        seen.extend(item['external_id'] for item in page['items'])
+        
+        # מכרז חדש שמתפרסם באמצע הדפדוף אינו מזיז את העמודים הבאים
+        tender_model.bulk_upsert([self.make_tender('new', publish_date='2025-02-01')])
+        while page['next_cursor']:
+            page = tender_model.get_page(cursor=page['next_cursor'], limit=10)
+            seen.extend(item['external_id'] for item in page['items'])
+        
+        self.assertEqual(sorted(seen), sorted(str(i) for i in range(23)))
+        
+        plan = self.db.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM tenders t WHERE (t.publish_ts, t.id) < (?, ?) "
+            "ORDER BY t.publish_ts DESC, t.id DESC LIMIT 10",
+            (1735862400, 5)
+        )
+        self.assertIn('idx_tenders_publish_ts_id', plan[0]['detail'])
+    
+    def test_search_page_and_invalid_cursor(self):
+        """בדיקת דפדוף בתוצאות חיפוש ודחיית cursor לא תקין"""
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([self.make_tender(str(i)) for i in range(5)])
+        
+        page = tender_model.search_page('נגרות', limit=3)
+        self.assertEqual(len(page['items']), 3)
+        page = tender_model.search_page('נגרות', cursor=page['next_cursor'], limit=3)
+        self.assertEqual((len(page['items']), page['next_cursor']), (2, None))
+        
+        with self.assertRaises(ValueError):
+            tender_model.get_page(cursor='not-a-cursor')
+
+class TenderDatesTest(ModelsTestCase):
+    """בדיקות לעמודות התאריך המנורמלות"""
+    
+    def test_date_range_queries(self):
+        """בדיקת שאילתות טווח על מועד ההגשה ותאריך הפרסום"""
+        import tender_dates
+        now = tender_dates.parse_tender_date('10/03/2025 08:00')
+        
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([
+            self.make_tender('1', publish_date='09/03/2025', submission_date='12/03/2025 12:00'),
+            self.make_tender('2', publish_date='2025-02-01', submission_date='20.03.25'),
+            self.make_tender('3', publish_date='לא צוין', submission_date='לא צוין')
+        ])
+        
+        closing = tender_model.get_closing_soon(days=7, now=now)
+        self.assertEqual([t['external_id'] for t in closing], ['1'])
+        recent = tender_model.get_recently_published(days=7, now=now)
+        self.assertEqual([t['external_id'] for t in recent], ['1'])
+        
+        # מכרז ללא תאריך מזוהה ממוין אחרון
+        self.assertEqual([t['external_id'] for t in tender_model.get_all()], ['1', '2', '3'])
+        
+        plan = self.db.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM tenders WHERE submission_ts BETWEEN ? AND ? ORDER BY submission_ts",
+            (now, now + 7 * 86400)
+        )
+        self.assertIn('idx_tenders_submission_ts (submission_ts>? AND submission_ts<?)', plan[0]['detail'])
+    
+    def test_backfill_existing_rows(self):
+        """בדיקה שמיגרציית המילוי ממלאת את עמודות התאריך עבור מכרזים שנוספו לפניה"""
+        self.db.execute("UPDATE tenders SET publish_ts = 0, submission_ts = 0")
+        self.db.execute(
+            "INSERT INTO tenders (external_id, title, publisher, source, publish_date) "
+            "VALUES ('old', 'מכרז ישן', 'משרד', 'govi.co.il', '05/01/2025')"
+        )
+        self.db.execute("PRAGMA user_version = 5")
+        self.assertEqual(self.models.migrate(self.db, DATABASE_DIR / "schema.sql")[0], 6)
+        
+        row = self.db.execute("SELECT publish_ts FROM tenders WHERE external_id = 'old'")[0]
+        self.assertEqual(row['publish_ts'], 1736035200)
+
+class TenderRelationsTest(ModelsTestCase):
+    """בדיקות לטעינת מכרזים עם הקשרים שלהם"""
+    
+    def test_get_many_with_relations(self):
+        """בדיקה שמספר השאילתות קבוע ושהקשרים משויכים למכרז הנכון"""
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([self.make_tender(str(i)) for i in range(100)])
+        tender_model.bulk_upsert([self.make_tender('bare', categories=[], contact=None, documents=[])])
+        ids = [row['id'] for row in self.db.execute("SELECT id FROM tenders ORDER BY id DESC")]
+        
+        tenders = tender_model.get_many_with_relations(ids + [999999])
+        self.assertEqual([t['id'] for t in tenders], ids)
+        self.assertEqual(tender_model.last_query_count, 4)
+        
+        by_external_id = {t['external_id']: t for t in tenders}
+        self.assertEqual([c['name'] for c in by_external_id['7']['categories']], ['נגרות', 'ריהוט'])
+        self.assertEqual(by_external_id['7']['documents'][0]['url'], 'https://mr.gov.il/doc/7')
+        self.assertEqual(by_external_id['7']['contacts'][0]['name'], 'ישראל ישראלי')
+        self.assertEqual(
+            (by_external_id['bare']['categories'], by_external_id['bare']['contacts'], by_external_id['bare']['documents']),
+            ([], [], [])
+        )
+    
+    def test_create_writes_relations_in_bulk(self):
+        """בדיקה שיצירת מכרז כותבת את הקשרים בכתיבה מקובצת ומקדמת את דור הנתונים פעם אחת"""
+        from query_cache import get_generation
+        tender_model = self.models.TenderModel(self.db)
+        tender_data = self.make_tender(
+            '1', categories=[f'קטגוריה {i}' for i in range(5)],
+            documents=[{'name': f'מסמך {i}', 'url': f'https://mr.gov.il/doc/1/{i}'} for i in range(5)]
+        )
+        generation = get_generation(self.db)
+        start_count = self.db.query_count
+        tender_id = tender_model.create(tender_data)
+        self.assertLessEqual(self.db.query_count - start_count, 8)
+        self.assertEqual(get_generation(self.db), generation + 1)
+        
+        tender = tender_model.get_many_with_relations([tender_id])[0]
+        self.assertEqual((len(tender['categories']), len(tender['contacts']), len(tender['documents'])), (5, 1, 5))
+        # גיבוב התוכן זהה לזה של הייבוא, כך שייבוא אותו מכרז אינו כותב דבר
+        self.assertEqual(tender_model.bulk_upsert([tender_data])[0]['unchanged'], 1)
+
+class CategoryCacheTest(ModelsTestCase):
+    """בדיקות למטמון הקטגוריות"""
+    
+    def test_get_or_create_many_uses_cache(self):
+        """בדיקה שקטגוריות נפתרות באצווה ושקריאה חוזרת אינה פונה לבסיס הנתונים"""
+        category_model = self.models.CategoryModel(self.db)
+        
+        start_count = self.db.query_count
+        ids = category_model.get_or_create_many(['נגרות', 'ריהוט', 'נגרות', 'דלתות'])
+        self.assertEqual(sorted(ids), ['דלתות', 'נגרות', 'ריהוט'])
+        self.assertEqual(self.db.query_count - start_count, 2)
+        
+        start_count = self.db.query_count
+        other_model = self.models.CategoryModel(self.db)
+        self.assertEqual(other_model.get_or_create('ריהוט'), ids['ריהוט'])
+        self.assertEqual(self.db.query_count, start_count)
+        
+        # מחיקה מנקה את המטמון והשם נוצר מחדש
+        category_model.delete(ids['ריהוט'])
+        self.assertNotEqual(other_model.get_or_create('ריהוט'), ids['ריהוט'])
+    
+    def test_rollback_clears_cache(self):
+        """בדיקה שמזהים שנוצרו בטרנזקציה שבוטלה אינם נשארים במטמון"""
+        category_model = self.models.CategoryModel(self.db)
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                category_model.get_or_create('זמנית')
+                raise RuntimeError("ביטול")
+        
+        category_id = category_model.get_or_create('זמנית')
+        self.assertIsNotNone(category_model.get_by_id(category_id))
+    
+    def test_savepoint_rollback_clears_cache(self):
+        """בדיקה שמזהים שנוצרו ב-SAVEPOINT שבוטל אינם נשארים במטמון כשהטרנזקציה החיצונית נשמרת"""
+        category_model = self.models.CategoryModel(self.db)
+        with self.db.transaction():
+            kept = category_model.get_or_create('נשמרת')
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction():
+                    category_model.get_or_create('זמנית')
+                    raise RuntimeError("ביטול")
+            category_id = category_model.get_or_create('זמנית')
+        
+        self.assertIsNotNone(category_model.get_by_id(category_id))
+        self.assertEqual(category_model.get_or_create('נשמרת'), kept)
+
+class TenderListingTest(ModelsTestCase):
+    """בדיקות לרשימת המכרזים עם סינון משולב"""
+    
+    def setUp(self):
+        """הכנה לפני כל בדיקה"""
+        super().setUp()
+        self.tender_model = self.models.TenderModel(self.db)
+        self.tender_model.bulk_upsert([
+            self.make_tender('1', publish_date='01/03/2025', submission_date='01/04/2025'),
+            self.make_tender('2', publish_date='02/03/2025', status='סגור', categories=['דלתות']),
+            self.make_tender('3', publish_date='03/03/2025', source='govi.co.il', publisher='עיריית חיפה'),
+            self.make_tender('4', publish_date='04/03/2025', source='wizbiz', categories=['מטבחים'],
+                             submission_date='10/04/2025'),
+            self.make_tender('5', publish_date='05/02/2025', publisher='עיריית חיפה', categories=['דלתות'])
+        ])
+        categories = self.models.CategoryModel(self.db)
+        self.doors_id = categories.get_by_name('דלתות')['id']
+        self.kitchens_id = categories.get_by_name('מטבחים')['id']
+    
+    def list_ids(self, filters, **kwargs):
+        """מזהי המקור של התוצאות לפי סדר הרשימה"""
+        return [tender['external_id'] for tender in self.tender_model.list_tenders(filters, **kwargs)['items']]
+    
+    def test_combined_filters(self):
+        """בדיקה שכל שילוב של מסננים מחזיר את המכרזים הנכונים מהחדש לישן"""
+        self.assertEqual(self.list_ids({'sources': ['govi.co.il', 'wizbiz']}), ['4', '3'])
+        self.assertEqual(self.list_ids({'category_ids': [self.doors_id, self.kitchens_id]}), ['4', '2', '5'])
+        self.assertEqual(self.list_ids({'category_id': self.doors_id, 'status': 'פתוח'}), ['5'])
+        self.assertEqual(self.list_ids({'publisher': 'עיריית חיפה', 'publish_from': '01/03/2025'}), ['3'])
+        self.assertEqual(self.list_ids({'submission_from': '05/04/2025', 'submission_to': '30/04/2025'}), ['4'])
+        self.assertEqual(self.list_ids({'keyword': 'נגרות', 'statuses': ['סגור']}), ['2'])
+        
+        first = self.tender_model.list_tenders({'source': 'mr.gov.il'}, limit=2)
+        second = self.tender_model.list_tenders({'source': 'mr.gov.il'}, cursor=first['next_cursor'], limit=2)
+        self.assertEqual([t['external_id'] for t in first['items'] + second['items']], ['2', '1', '5'])
+        self.assertIsNone(second['next_cursor'])
+    
+    def test_plan_uses_composite_index(self):
+        """בדיקה שסינון לפי מקור הוא חיפוש באינדקס המשולב ללא מיון נוסף"""
+        page = self.tender_model.list_tenders({'source': 'wizbiz'}, explain=True)
+        self.assertIn('idx_tenders_source_publish_ts', ' '.join(page['plan']))
+        self.assertNotIn('TEMP B-TREE', ' '.join(page['plan']))
+        
+        with self.assertRaises(ValueError):
+            self.tender_model.list_tenders({'publish_from': 'אתמול'})
+
+class TenderArchiveTest(ModelsTestCase):
+    """בדיקות להעברת מכרזים שהסתיימו לארכיון"""
+    
+    def setUp(self):
+        """הכנה לפני כל בדיקה"""
+        super().setUp()
+        sys.path.append(str(DATABASE_DIR))
+        import archive
+        self.archive = archive
+        self.now = self.models.parse_tender_date('15/03/2025')
+        
+        self.tender_model = self.models.TenderModel(self.db)
+        self.tender_model.bulk_upsert([
+            self.make_tender('1', publish_date='01/03/2025', submission_date='01/04/2025'),
+            self.make_tender('2', publish_date='02/03/2025', submission_date='10/03/2025', title='מכרז פרגולות לגן'),
+            self.make_tender('3', publish_date='03/03/2025', submission_date='', status='סגור'),
+            self.make_tender('4', publish_date='04/03/2025', submission_date='')
+        ])
+        self.report = archive.archive_expired(self.db, now=self.now)
+    
+    def test_expired_tenders_move_to_archive(self):
+        """בדיקה שמכרזים שפג מועדם או שנסגרו עוברים עם הקשרים שלהם"""
+        self.assertEqual(self.report['hot_before'], 4)
+        self.assertEqual(self.report['hot_after'], 2)
+        self.assertEqual(self.report['archived'], 2)
+        
+        listed = self.tender_model.list_tenders()['items']
+        self.assertEqual([t['external_id'] for t in listed], ['4', '1'])
+        self.assertEqual(self.models.TenderModel(self.db).facets()['source'], [{'value': 'mr.gov.il', 'count': 2}])
+        self.assertEqual(self.tender_model.search('פרגולות'), [])
+        
+        archived = self.tender_model.get_by_external_id('2', 'mr.gov.il', include_archive=True)
+        self.assertIsNone(self.tender_model.get_by_id(archived['id']))
+        self.assertEqual(self.db.execute(
+            "SELECT COUNT(*) FROM tender_categories_archive WHERE tender_id = ?", (archived['id'],)
+        )[0][0], 2)
+    
+    def test_include_archive_opt_in(self):
+        """בדיקה שרשימה עם הארכיון ממזגת את שתי הטבלאות לפי הסדר ובדפדוף"""
+        first = self.tender_model.list_tenders(limit=3, include_archive=True)
+        self.assertEqual([t['external_id'] for t in first['items']], ['4', '3', '2'])
+        second = self.tender_model.list_tenders(cursor=first['next_cursor'], limit=3, include_archive=True)
+        self.assertEqual([t['external_id'] for t in second['items']], ['1'])
+        
+        found = self.tender_model.list_tenders({'keyword': 'פרגולות'}, include_archive=True)['items']
+        self.assertEqual([t['external_id'] for t in found], ['2'])
+    
+    def test_reingest_skips_or_restores_archived(self):
+        """בדיקה שמכרז סגור מהארכיון אינו נכתב שוב ומכרז שנפתח מחדש חוזר עם אותו מזהה"""
+        archived_id = self.tender_model.get_by_external_id('3', 'mr.gov.il', include_archive=True)['id']
+        stats = self.tender_model.bulk_upsert([self.make_tender('3', submission_date='', status='סגור')])
+        self.assertEqual(stats[0]['unchanged'], 1)
+        self.assertIsNone(self.tender_model.get_by_external_id('3', 'mr.gov.il'))
+        
+        stats = self.tender_model.bulk_upsert([self.make_tender('3', submission_date='', status='פתוח')])
+        self.assertEqual(stats[0]['updated'], 1)
+        restored = self.tender_model.get_many_with_relations([archived_id])[0]
+        self.assertEqual(restored['status'], 'פתוח')
+        self.assertEqual(len(restored['categories']), 2)
+        self.assertEqual(self.db.execute("SELECT COUNT(*) FROM tenders_archive WHERE id = ?", (archived_id,))[0][0], 0)
+
+class StreamingQueryTest(ModelsTestCase):
+    """בדיקות למעבר על שורות בזרימה"""
+    
+    def test_iter_all_streams_in_batches(self):
+        """בדיקה שהמעבר מחזיר את כל המכרזים לפי הסדר גם כשהמנה קטנה מהטבלה"""
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([self.make_tender(str(i)) for i in range(25)])
+        
+        tenders = tender_model.iter_all(batch=4)
+        first = next(tenders)
+        self.assertIsInstance(first, dict)
+        ids = [first['id']] + [tender['id'] for tender in tenders]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(ids), 25)
+    
+    def test_other_queries_during_iteration(self):
+        """בדיקה שבמצב ללא חיבור קבוע אפשר להריץ שאילתות בזמן המעבר והחיבור נסגר בסופו"""
+        self.models.TenderModel(self.db).bulk_upsert([self.make_tender(str(i)) for i in range(10)])
+        db = self.models.Database(self.temp_db_path)
+        tender_model = self.models.TenderModel(db)
+        
+        categories = 0
+        for row in db.iter_query("SELECT id FROM tenders", batch=3):
+            categories += len(tender_model.get_categories(row['id']))
+        self.assertEqual(categories, 20)
+        self.assertIsNone(db.connection)
+        
+        rows = db.iter_query("SELECT id FROM tenders", batch=3)
+        next(rows)
+        rows.close()
+        self.assertIsNone(db.connection)
+
+class TenderFacetsTest(ModelsTestCase):
+    """בדיקות לספירות הפאסטות של המכרזים"""
+    
+    def expected_facets(self):
+        """ספירות מחושבות ישירות מהטבלאות להשוואה"""
+        return {
+            'source': dict(self.db.execute("SELECT source, COUNT(*) FROM tenders GROUP BY source")),
+            'status': dict(self.db.execute("SELECT status, COUNT(*) FROM tenders GROUP BY status")),
+            'category': dict(self.db.execute(
+                "SELECT category_id, COUNT(*) FROM tender_categories GROUP BY category_id"
+            ))
+        }
+    
+    def as_counts(self, facets):
+        """המרת תוצאת facets למילוני ערך -> ספירה"""
+        return {facet: {item['value']: item['count'] for item in items} for facet, items in facets.items()}
+    
+    def test_counts_maintained_by_triggers(self):
+        """בדיקה שהטבלה המתוחזקת נשארת מסונכרנת בהוספה, עדכון ומחיקה"""
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([self.make_tender(str(i)) for i in range(6)])
+        tender_model.bulk_upsert([
+            self.make_tender('1', status='סגור', categories=['נגרות']),
+            self.make_tender('7', source='govi.co.il', categories=['דלתות'])
+        ])
+        tender_model.delete(tender_model.get_by_external_id('2', 'mr.gov.il')['id'])
+        
+        facets = tender_model.facets()
+        self.assertEqual(self.as_counts(facets), self.expected_facets())
+        self.assertEqual(facets['source'][0], {'value': 'mr.gov.il', 'count': 5})
+        self.assertEqual(facets['category'][0]['name'], 'נגרות')
+    
+    def test_filtered_facets(self):
+        """בדיקה שספירות עם סינון מחושבות על תוצאות הסינון בלבד"""
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([
+            self.make_tender('1'),
+            self.make_tender('2', status='סגור', categories=['דלתות']),
+            self.make_tender('3', source='govi.co.il', title='מכרז שיפוץ מבנה')
+        ])
+        
+        facets = self.as_counts(tender_model.facets({'keyword': 'נגרות'}))
+        self.assertEqual(facets['source'], {'mr.gov.il': 2})
+        self.assertEqual(facets['status'], {'פתוח': 1, 'סגור': 1})
+        self.assertEqual(sum(facets['category'].values()), 3)
+        
+        with self.assertRaises(ValueError):
+            tender_model.facets({'colour': 'אדום'})
+
+class TenderRecordTest(ModelsTestCase):
+    """בדיקות לרשומת המכרז הקומפקטית"""
+    
+    def test_standardize_in_place(self):
+        """בדיקה שההשלמה למבנה האחיד נעשית על הרשומה עצמה ומסירה שדות ייחודיים לסורק"""
+        tender = self.models.Tender(
+            id='w1', description='ארונות מטבח', details_url='https://wizbiz.co.il/t/1',
+            tender_type='פומבי', source='wizbiz.co.il'
+        )
+        tender.update({'full_description': 'תיאור מלא', 'categories': ['נגרות']})
+        
+        self.assertIs(tender.standardize(), tender)
+        self.assertEqual((tender.title, tender.url), ('ארונות מטבח', 'https://wizbiz.co.il/t/1'))
+        self.assertIsNone(tender.get('tender_type'))
+        self.assertTrue(tender.scrape_date)
+        self.assertEqual(tender.to_dict()['contact'], {})
+        self.assertFalse(hasattr(tender, '__dict__'))
+    
+    def test_json_and_csv_round_trip(self):
+        """בדיקה שרשומה נשמרת ונקראת מ-JSON ומ-CSV ללא שינוי"""
+        import tender_record
+        tenders = [self.models.Tender.from_dict(self.make_tender(str(i), tender_type='פומבי')) for i in range(3)]
+        
+        json_path = os.path.join(self.temp_dir.name, 'tenders.json')
+        csv_path = os.path.join(self.temp_dir.name, 'tenders.csv')
+        tender_record.write_json(tenders, json_path)
+        tender_record.write_csv(tenders, csv_path)
+        
+        self.assertEqual(tender_record.read_json(json_path), tenders)
+        self.assertEqual(tender_record.read_csv(csv_path), tenders)
+        with open(json_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f)[0]['categories'], ['נגרות', 'ריהוט'])
+    
+    def test_ingest_records(self):
+        """בדיקה שרשומות נקלטות כמו מילונים ושהמודל מחזיר אותן בחזרה"""
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([self.models.Tender.from_dict(self.make_tender(str(i))) for i in range(5)])
+        
+        # אותו תוכן כמילון אינו נחשב לשינוי
+        stats = tender_model.bulk_upsert([self.make_tender(str(i)) for i in range(5)])
+        self.assertEqual(sum(batch['unchanged'] for batch in stats), 5)
+        
+        ids = [row['id'] for row in self.db.execute("SELECT id FROM tenders ORDER BY id")]
+        tenders = tender_model.get_many_with_relations(ids, records=True)
+        self.assertEqual([tender.tender_id for tender in tenders], ids)
+        self.assertEqual(tenders[0].categories, ['נגרות', 'ריהוט'])
+        self.assertEqual(tenders[0].contact['name'], 'ישראל ישראלי')
+        self.assertEqual(tenders[0].documents[0]['url'], 'https://mr.gov.il/doc/0')
+        self.assertEqual([tender.id for tender in tender_model.iter_all(records=True)], [str(i) for i in range(5)])
+    
+    def test_merge_duplicates_field_by_field(self):
+        """בדיקה שמיזוג כפילויות מאחד מסמכים וקטגוריות ובוחר כל שדה לפי עדיפות המקור ועדכניות"""
+        import tender_record
+        Tender = self.models.Tender
+        official = Tender(
+            id='m1', source='mr.gov.il', title='ארונות מטבח', publisher='לא צוין', status='פתוח',
+            submission_date='01/02/2026', url='https://mr.gov.il/t/1', contact={'email': 'a@gov.il'},
+            documents=[{'name': 'מפרט', 'url': 'https://mr.gov.il/d/1'}], categories=['נגרות'],
+            scrape_date='2026-01-01 08:00:00'
+        )
+        aggregator = Tender(
+            id='g1', source='govi.co.il', title='אספקת ארונות מטבח', publisher='עיריית חיפה', status='סגור',
+            submission_date='05/02/2026', contact={'name': 'דנה', 'email': 'b@govi.co.il'},
+            documents=[{'name': 'מפרט', 'url': 'https://mr.gov.il/d/1'}, {'name': 'חוזה', 'url': 'https://govi.co.il/d/2'}],
+            categories=['מטבחים', 'נגרות'], scrape_date='2026-01-02 08:00:00'
+        )
+        
+        merged = tender_record.merge_tenders([aggregator, official])
+        self.assertEqual((merged.id, merged.source, merged.title), ('m1', 'mr.gov.il', 'ארונות מטבח'))
+        # ערך חסר נלקח מהמקור הבא, ושדות משתנים מהסריקה העדכנית
+        self.assertEqual(merged.publisher, 'עיריית חיפה')
+        self.assertEqual((merged.status, merged.submission_date), ('סגור', '05/02/2026'))
+        self.assertEqual(merged.contact, {'email': 'a@gov.il', 'name': 'דנה'})
+        self.assertEqual([doc['name'] for doc in merged.documents], ['מפרט', 'חוזה'])
+        self.assertEqual(merged.categories, ['נגרות', 'מטבחים'])
+        self.assertEqual(
+            [(item['source'], 'publisher' in item['fields']) for item in merged.merged_from],
+            [('mr.gov.il', False), ('govi.co.il', True)]
+        )
+        # המקורות שנמזגו נשמרים גם בקבצי הפלט
+        json_path = os.path.join(self.temp_dir.name, 'merged.json')
+        tender_record.write_json([merged, official], json_path)
+        self.assertEqual(tender_record.read_json(json_path), [merged, official])
+        self.assertIs(tender_record.merge_tenders([official]), official)
+        
+        # שתי רשומות מאותו מקור ממוזגות רק אם יש להן אותו מזהה
+        self.assertEqual(tender_record.merge_tenders([official, tender_record.Tender(id='m1', source='mr.gov.il')]).id, 'm1')
+        with self.assertRaises(ValueError):
+            tender_record.merge_tenders([official, tender_record.Tender(id='m2', source='mr.gov.il')])
+
+class QueryCacheTest(ModelsTestCase):
+    """בדיקות למטמון תוצאות הקריאה"""
+    
+    def test_reads_cached_until_generation_changes(self):
+        """בדיקה שקריאה חוזרת אינה ניגשת לבסיס הנתונים ושכתיבה מבטלת את המטמון"""
+        cache = self.db.enable_cache()
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([self.make_tender(str(i)) for i in range(5)])
+        
+        first = tender_model.list_tenders({'status': 'פתוח'}, limit=3)
+        start_count = self.db.query_count
+        self.assertIs(tender_model.list_tenders({'status': 'פתוח'}, limit=3), first)
+        self.assertEqual(self.db.query_count - start_count, 0)
+        
+        # ריצת רענון ללא שינויים אינה מקדמת את הדור
+        tender_model.bulk_upsert([self.make_tender(str(i)) for i in range(5)])
+        self.assertIs(tender_model.list_tenders({'status': 'פתוח'}, limit=3), first)
+        
+        tender_model.bulk_upsert([self.make_tender('new', status='סגור')])
+        self.assertEqual(len(tender_model.facets()['status']), 2)
+        self.assertIsNot(tender_model.list_tenders({'status': 'פתוח'}, limit=3), first)
+        
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['invalidations']), (2, 3, 1))
+        self.assertAlmostEqual(stats['hit_rate'], 0.4)
+    
+    def test_generation_rechecked_after_interval(self):
+        """בדיקה שפגיעות במטמון אינן שולחות שאילתות ושכתיבה מחיבור אחר נראית אחרי מרווח הבדיקה"""
+        cache = self.db.enable_cache()
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([self.make_tender(str(i)) for i in range(3)])
+        first = tender_model.get_all()
+        
+        start_count = self.db.query_count
+        for _ in range(5):
+            self.assertIs(tender_model.get_all(), first)
+        self.assertEqual(self.db.query_count - start_count, 0)
+        
+        # כתיבה דרך אובייקט Database אחר אינה מוכרת למטמון עד שהמרווח עובר
+        other_db = self.models.Database(self.temp_db_path)
+        self.models.TenderModel(other_db).bulk_upsert([self.make_tender('other')])
+        self.assertIs(tender_model.get_all(), first)
+        
+        cache.recheck_interval = 0
+        self.assertEqual(len(tender_model.get_all()), 4)
+        self.assertEqual(cache.stats()['invalidations'], 1)
+    
+    def test_lru_eviction_and_ttl(self):
+        """בדיקה שהתוצאה הוותיקה בשימוש מפונה ושתוצאה שפגה מחושבת מחדש"""
+        cache = self.db.enable_cache(max_entries=2)
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([self.make_tender(str(i)) for i in range(3)])
+        
+        for limit in (1, 2, 1, 3):
+            tender_model.get_all(limit=limit)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        tender_model.get_all(limit=1)
+        tender_model.get_all(limit=2)
+        self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (2, 4))
+        
+        # זמן החיים נקבע בשמירת התוצאה
+        cache.ttl = 0
+        cache.reset_stats()
+        tender_model.get_all(limit=5)
+        tender_model.get_all(limit=5)
+        self.assertEqual((cache.stats()['misses'], cache.stats()['expirations']), (2, 1))
+    
+    def test_no_caching_inside_transaction(self):
+        """בדיקה שתוצאה שחושבה בתוך טרנזקציה שבוטלה לא נשמרת במטמון"""
+        cache = self.db.enable_cache()
+        tender_model = self.models.TenderModel(self.db)
+        
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                tender_model.bulk_upsert([self.make_tender('1')])
+                self.assertEqual(len(tender_model.get_all()), 1)
+                raise RuntimeError('rollback')
+        
+        self.assertEqual(tender_model.get_all(), [])
+        self.assertEqual(cache.stats()['hits'], 0)
+
+class ApiServerTest(ModelsTestCase):
+    """בדיקות לשרת ה-API המקומי"""
+    
+    def setUp(self):
+        """הפעלת השרת על פורט פנוי מול בסיס הנתונים הזמני"""
+        super().setUp()
+        import api_server
+        self.tender_model = self.models.TenderModel(self.db)
+        self.tender_model.bulk_upsert([self.make_tender(str(i)) for i in range(30)])
+        
+        self.server = api_server.create_server(self.temp_db_path, DATABASE_DIR / "schema.sql", port=0, workers=2)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def tearDown(self):
+        """עצירת השרת"""
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+    
+    def request(self, path, headers=None):
+        """שליחת בקשת GET והחזרת הקוד, הכותרות והגוף"""
+        conn = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=10)
+        conn.request('GET', path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        conn.close()
+        if response.getheader('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return response.status, response, json.loads(body) if body else None
+    
+    def test_list_detail_and_facets(self):
+        """בדיקה שהרשימה, המכרז הבודד והפאסטות מחזירים את נתוני המודלים"""
+        status, _, page = self.request('/api/tenders?limit=10&source=mr.gov.il')
+        self.assertEqual(status, 200)
+        self.assertEqual(len(page['items']), 10)
+        status, _, next_page = self.request(f"/api/tenders?limit=10&source=mr.gov.il&cursor={page['next_cursor']}")
+        self.assertFalse({t['id'] for t in page['items']} & {t['id'] for t in next_page['items']})
+        
+        tender_id = page['items'][0]['id']
+        status, _, tender = self.request(f'/api/tenders/{tender_id}')
+        self.assertEqual([c['name'] for c in tender['categories']], ['נגרות', 'ריהוט'])
+        self.assertEqual(self.request('/api/tenders/999999')[0], 404)
+        
+        status, _, facets = self.request('/api/facets?status=%D7%A4%D7%AA%D7%95%D7%97')
+        self.assertEqual(facets['source'], [{'value': 'mr.gov.il', 'count': 30}])
+        self.assertEqual(self.request('/api/tenders?colour=red')[0], 400)
+    
+    def test_etag_gzip_and_not_modified(self):
+        """בדיקה שבקשה מותנית נענית ב-304 עד שהנתונים משתנים, ושהתשובה נדחסת"""
+        status, response, _ = self.request('/api/tenders?limit=30', {'Accept-Encoding': 'gzip'})
+        etag = response.getheader('ETag')
+        self.assertEqual(response.getheader('Content-Encoding'), 'gzip')
+        self.assertTrue(etag.startswith('"') and etag.endswith('-gz"'))
+        
+        status, response, body = self.request('/api/tenders?limit=30', {'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual((status, body), (304, None))
+        
+        # ETag שונה לתשובה ללא דחיסה
+        status, response, _ = self.request('/api/tenders?limit=30', {'If-None-Match': etag})
+        self.assertEqual(status, 200)
+        self.assertIsNone(response.getheader('Content-Encoding'))
+        
+        self.tender_model.bulk_upsert([self.make_tender('new')])
+        status, response, page = self.request('/api/tenders?limit=30', {'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(response.getheader('ETag'), etag)
+        self.assertIn('new', [t['external_id'] for t in page['items']])
+
+class StaticShardsTest(ModelsTestCase):
+    """בדיקות לבניית קבצי ה-JSON הסטטיים"""
+    
+    def read_shard(self, path):
+        """קריאת קובץ דחוס מתיקיית הפלט"""
+        with gzip.open(os.path.join(self.output_dir, path), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def test_incremental_build(self):
+        """בדיקה שבנייה חוזרת כותבת רק את הקבצים שהקלט שלהם השתנה"""
+        import static_shards
+        self.output_dir = os.path.join(self.temp_dir.name, 'public')
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([
+            self.make_tender(str(i), publish_date=f'{i + 1:02d}/01/2025', categories=['נגרות'] if i % 2 else ['ריהוט'])
+            for i in range(25)
+        ])
+        builder = static_shards.ShardBuilder(self.db, self.output_dir, page_size=10)
+        
+        # 3 עמודים, 2 קטגוריות, מקור אחד ו-25 מכרזים
+        self.assertEqual(builder.build()['written'], 31)
+        with open(os.path.join(self.output_dir, 'index.json'), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        self.assertEqual((index['total'], index['pages']), (25, 3))
+        self.assertEqual(len(self.read_shard('pages/1.json.gz')['items']), 10)
+        self.assertEqual(self.read_shard('pages/3.json.gz')['items'][0]['external_id'], '24')
+        self.assertEqual(self.read_shard('tenders/1.json.gz')['documents'][0]['name'], 'מפרט')
+        
+        # ללא שינוי בנתונים לא נכתב דבר
+        self.assertEqual(builder.build()['written'], 0)
+        
+        # מכרז חדש משנה רק את העמוד האחרון, את הקטגוריה והמקור שלו ואת הקובץ שלו
+        tender_model.bulk_upsert([self.make_tender('new', publish_date='01/03/2025', categories=['נגרות'])])
+        report = builder.build()
+        self.assertEqual((report['written'], report['removed']), (4, 0))
+        self.assertEqual(self.read_shard('pages/3.json.gz')['items'][0]['external_id'], 'new')
+        
+        tender_model.delete(tender_model.get_by_external_id('new', 'mr.gov.il')['id'])
+        self.assertEqual(builder.build()['removed'], 1)
+    
+    def test_relation_changes_rebuild_tender_shard(self):
+        """בדיקה ששינוי בקטגוריות או במסמכים של מכרז משנה את גיבוב התוכן וכותב מחדש את הקובץ שלו"""
+        import static_shards
+        self.output_dir = os.path.join(self.temp_dir.name, 'public')
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([self.make_tender('1', categories=['נגרות'])])
+        tender_id = tender_model.get_by_external_id('1', 'mr.gov.il')['id']
+        builder = static_shards.ShardBuilder(self.db, self.output_dir, page_size=10)
+        builder.build()
+        
+        category_id = self.models.CategoryModel(self.db).get_or_create('מטבחים')
+        tender_model.add_category(tender_id, category_id)
+        self.assertGreater(builder.build()['written'], 0)
+        categories = self.read_shard(f'tenders/{tender_id}.json.gz')['categories']
+        self.assertEqual(sorted(category['name'] for category in categories), ['מטבחים', 'נגרות'])
+        
+        # הגיבוב זהה לגיבוב של אותו מכרז בייבוא, כך שייבוא חוזר של הנתונים המעודכנים אינו כותב דבר
+        stats = tender_model.bulk_upsert([self.make_tender('1', categories=['נגרות', 'מטבחים'])])
+        self.assertEqual(stats[0]['unchanged'], 1)
+        
+        self.models.DocumentModel(self.db).create(tender_id, 'נספח', 'https://mr.gov.il/doc/extra')
+        self.assertGreater(builder.build()['written'], 0)
+        self.assertEqual(len(self.read_shard(f'tenders/{tender_id}.json.gz')['documents']), 2)
+
+class NearDuplicateTest(ModelsTestCase):
+    """בדיקות לזיהוי מכרזים כמעט זהים בין מקורות"""
+    
+    def test_cluster_reworded_tenders(self):
+        """בדיקה שניסוח, פיסוק וסדר מילים שונים מזוהים כאותו מכרז"""
+        import near_duplicates
+        tenders = [
+            {'title': "מכרז פומבי מס' 12/2025 לאספקת והתקנת ארונות מטבח בבית הספר",
+             'publisher': 'עיריית חיפה', 'submission_date': '01/02/2026'},
+            {'title': 'ארונות מטבח, התקנת ואספקת, בבית הספר (12/2025)',
+             'publisher': 'עיריית חיפה', 'submission_date': '01/02/2026'},
+            {'title': 'אספקה והתקנה של ארונות מטבח בבית ספר - מכרז 12/2025',
+             'publisher': 'עירית חיפה', 'submission_date': '01/02/2026'},
+            {'title': 'שיפוץ דלתות עץ במבנה העירייה', 'publisher': 'עיריית חיפה', 'submission_date': '01/02/2026'},
+            # אותה כותרת אצל מפרסם אחר ובמועד אחר היא מכרז אחר
+            {'title': 'ארונות מטבח, התקנת ואספקת, בבית הספר (12/2025)',
+             'publisher': 'עיריית אילת', 'submission_date': '15/03/2026'}
+        ]
+        self.assertEqual(near_duplicates.cluster_duplicates(tenders), [[0, 1, 2], [3], [4]])
+    
+    def test_stopwords_keep_real_words(self):
+        """בדיקה שמילות עצירה מושמטות גם עם אותיות שימוש, אבל מילים שהן הגזע של מילת עצירה נשמרות"""
+        import near_duplicates
+        self.assertEqual(near_duplicates.shingles("מכרז מספר 5 לביצוע עבודות"), {'5', 'עבודות'})
+        self.assertEqual(near_duplicates.shingles('והמכרז הזמנת ריהוט'), {'ריהוט'})
+        self.assertIn('ספר', near_duplicates.shingles('ריהוט לבית הספר'))
+        self.assertIn('ספר', near_duplicates.shingles('ספר'))
+    
+    def test_same_source_tenders_are_not_paired(self):
+        """בדיקה ששני מכרזים מאותו מקור עם מזהים שונים אינם כפילות, גם כשהם דומים"""
+        import near_duplicates
+        tenders = [
+            {'id': '101', 'source': 'mr.gov.il', 'title': 'עבודות נגרות בבית ספר יסודי אלון',
+             'publisher': 'עיריית חיפה', 'submission_date': '01/12/2026'},
+            {'id': '102', 'source': 'mr.gov.il', 'title': 'עבודות נגרות בבית ספר יסודי ארז',
+             'publisher': 'עיריית חיפה', 'submission_date': '15/12/2026'}
+        ]
+        self.assertEqual(near_duplicates.cluster_duplicates(tenders), [[0], [1]])
+        
+        # אותו מכרז במקור אחר, או שוב באותו מקור עם אותו מזהה, הוא כפילות
+        self.assertEqual(near_duplicates.cluster_duplicates([tenders[0], dict(tenders[1], source='govi.co.il')]), [[0, 1]])
+        self.assertEqual(near_duplicates.cluster_duplicates([tenders[0], dict(tenders[0])]), [[0, 1]])
+        
+        # גם מול החתימות השמורות
+        self.models.TenderModel(self.db).bulk_upsert([
+            self.make_tender('101', title=tenders[0]['title'], publisher='עיריית חיפה', submission_date='01/12/2026')
+        ])
+        store = near_duplicates.SignatureStore(self.db)
+        store.index_pending()
+        self.assertEqual(store.find_similar(tenders[1]), [])
+        self.assertEqual(len(store.find_similar(dict(tenders[1], source='govi.co.il'))), 1)
+    
+    def test_signature_store_matches_new_tender(self):
+        """בדיקה שמכרז חדש מותאם לחתימות השמורות ושחתימות מתעדכנות רק כשהתוכן משתנה"""
+        import near_duplicates
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([
+            self.make_tender('1', title='אספקה והתקנה של ארונות מטבח בבית ספר - מכרז 12/2025'),
+            self.make_tender('2', title='שיפוץ דלתות עץ במבנה העירייה')
+        ])
+        store = near_duplicates.SignatureStore(self.db)
+        self.assertEqual(store.index_pending(), 2)
+        self.assertEqual(store.index_pending(), 0)
+        
+        first_id = tender_model.get_by_external_id('1', 'mr.gov.il')['id']
+        matches = store.find_similar({
+            'title': 'ארונות מטבח, התקנת ואספקת, בבית הספר (12/2025)',
+            'publisher': 'משרד החינוך', 'submission_date': '01/02/2025'
+        })
+        self.assertEqual([tender_id for tender_id, _ in matches], [first_id])
+        self.assertEqual(store.find_similar(tender_model.get_by_id(first_id), exclude_id=first_id), [])
+        
+        # שינוי בכותרת מחשב מחדש רק את החתימה של המכרז שהשתנה
+        tender_model.bulk_upsert([self.make_tender('1', title='שיפוץ דלתות עץ במבנה העירייה')])
+        self.assertEqual(store.index_pending(), 1)
+        self.assertEqual(len(store.find_similar({'title': 'שיפוץ דלתות עץ במבנה העירייה', 'publisher': 'משרד החינוך'})), 2)
+        
+        # מחיקת מכרז מוחקת את החתימה והדליים שלו
+        tender_model.delete(first_id)
+        second_id = tender_model.get_by_external_id('2', 'mr.gov.il')['id']
+        self.assertEqual(store.find_similar({'title': 'שיפוץ דלתות עץ במבנה העירייה', 'publisher': 'משרד החינוך'}), [(second_id, 1.0)])
+        self.assertEqual(store.purge_deleted(), 1)
+        self.assertEqual(self.db.execute("SELECT COUNT(*) FROM tender_lsh_buckets")[0][0], near_duplicates.BANDS)
+    
+    def test_import_links_duplicates_across_runs(self):
+        """בדיקה שמכרז ממקור אחר שמגיע בריצה מאוחרת ממוזג לתוך המכרז השמור ונשאר מקושר אליו"""
+        def import_run(name, tenders):
+            path = os.path.join(self.temp_dir.name, name)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(tenders, f, ensure_ascii=False)
+            return self.models.import_tenders_from_json(self.db, path)
+        
+        haifa = {'publisher': 'עיריית חיפה', 'submission_date': '01/12/2026', 'categories': ['נגרות']}
+        import_run('run1.json', [self.make_tender('101', title='עבודות נגרות בבית ספר יסודי אלון', **haifa)])
+        govi = self.make_tender(
+            'g-7', source='govi.co.il', title='נגרות בבית הספר היסודי אלון (עבודות)', description='פירוט מלא',
+            url='https://govi.co.il/tender/7', **dict(haifa, categories=['ריהוט'])
+        )
+        other = self.make_tender('102', title='עבודות נגרות בבית ספר יסודי ארז', **haifa)
+        import_run('run2.json', [govi, other])
+        
+        tender_model = self.models.TenderModel(self.db)
+        rows = {row['external_id']: row for row in self.db.execute("SELECT * FROM tenders")}
+        self.assertEqual(sorted(rows), ['101', '102'])
+        linked = tender_model.get_many_with_relations([rows['101']['id']], records=True)[0]
+        self.assertEqual((linked.source, linked.url), ('mr.gov.il', 'https://mr.gov.il/tender/101'))
+        self.assertEqual(sorted(linked.categories), ['נגרות', 'ריהוט'])
+        
+        # הקישור נשמר: אותו מכרז חוזר לאותה שורה, ומכרז נוסף מאותו מקור מקושר למכרז הדומה האחר
+        import_run('run3.json', [
+            dict(govi, status='סגור', scrape_date='2026-10-01 08:00:00'),
+            self.make_tender('g-9', source='govi.co.il', title='עבודות נגרות בבית ספר יסודי אלון',
+                             url='https://govi.co.il/tender/9', **haifa)
+        ])
+        rows = {row['external_id']: row for row in self.db.execute("SELECT * FROM tenders")}
+        self.assertEqual(sorted(rows), ['101', '102'])
+        self.assertEqual((rows['101']['status'], rows['102']['status']), ('סגור', 'פתוח'))
+        links = {row['external_id']: row['tender_id'] for row in self.db.execute("SELECT * FROM tender_links")}
+        self.assertEqual(links, {'g-7': rows['101']['id'], 'g-9': rows['102']['id']})
+    
+    def test_reimport_of_merged_tender_is_unchanged(self):
+        """בדיקה שייבוא all_tenders ואחריו קבצי המקורות אינו דורס מכרז ממוזג, ושייבוא חוזר אינו כותב דבר"""
+        import tender_record
+        from query_cache import get_generation
+        haifa = {'publisher': 'עיריית חיפה', 'submission_date': '01/12/2026', 'scrape_date': '2026-10-01 08:00:00'}
+        official = tender_record.Tender.from_dict(self.make_tender(
+            '101', title='עבודות נגרות בבית ספר יסודי אלון', description='', contact=None,
+            categories=['נגרות'], **haifa
+        ))
+        wizbiz = tender_record.Tender.from_dict(self.make_tender(
+            'w-5', source='wizbiz.co.il', title='נגרות בבית הספר היסודי אלון (עבודות)', description='פירוט מלא',
+            url='https://wizbiz.co.il/tender/5', categories=['ריהוט'], contact={'name': 'רכש', 'phone': '04-1234567'},
+            documents=[{'name': 'כתב כמויות', 'url': 'https://wizbiz.co.il/doc/5'}], **haifa
+        ))
+        files = []
+        for name, tenders in (('all_tenders.json', [tender_record.merge_tenders([official, wizbiz])]),
+                              ('mr_gov_il_tenders.json', [official]), ('wizbiz_tenders.json', [wizbiz])):
+            files.append(tender_record.write_json(tenders, os.path.join(self.temp_dir.name, name)))
+        
+        for path in files:
+            self.models.import_tenders_from_json(self.db, path)
+        tender_model = self.models.TenderModel(self.db)
+        rows = self.db.execute("SELECT id, content_hash FROM tenders")
+        self.assertEqual(len(rows), 1)
+        merged = tender_model.get_many_with_relations([rows[0]['id']], records=True)[0]
+        self.assertEqual((merged.id, merged.description, merged.contact['phone']), ('101', 'פירוט מלא', '04-1234567'))
+        self.assertEqual(sorted(merged.categories), ['נגרות', 'ריהוט'])
+        
+        # ריענון עם אותם קבצים אינו כותב דבר ואינו מקדם את דור הנתונים
+        generation = get_generation(self.db)
+        for path in files:
+            self.models.import_tenders_from_json(self.db, path)
+        self.assertEqual(get_generation(self.db), generation)
+        self.assertEqual(self.db.execute("SELECT id, content_hash FROM tenders")[0]['content_hash'], rows[0]['content_hash'])
+    
+class SchemaMigrationTest(ModelsTestCase):
+    """בדיקות למיגרציות הסכמה לפי user_version"""
+    
+    def setUp(self):
+        """טעינת מודול המיגרציות"""
+        super().setUp()
+        import schema_migrations
+        self.schema_migrations = schema_migrations
+    
+    def test_existing_database_is_not_rebuilt(self):
+        """בדיקה שאתחול חוזר של בסיס נתונים מעודכן אינו מריץ מיגרציות"""
+        migrations = self.schema_migrations.load_migrations(DATABASE_DIR / "schema.sql")
+        self.assertEqual(self.schema_migrations.get_version(self.db), migrations[-1].version)
+        self.models.TenderModel(self.db).bulk_upsert([self.make_tender('1')])
+        self.db.close_all()
+        
+        db = self.models.initialize_database(self.temp_db_path, DATABASE_DIR / "schema.sql")
+        self.assertEqual(db.query_count, 1)
+        self.assertEqual(db.execute("SELECT COUNT(*) FROM tenders")[0][0], 1)
+        db.close_all()
+    
+    def test_legacy_database_is_upgraded_in_place(self):
+        """בדיקה שבסיס נתונים ללא גרסה מקבל את המיגרציות בלי לאבד נתונים"""
+        legacy_path = os.path.join(self.temp_dir.name, 'legacy.db')
+        conn = sqlite3.connect(legacy_path)
+        with open(DATABASE_DIR / "schema.sql", 'r', encoding='utf-8') as f:
+            conn.executescript(f.read())
+        # עמודה שנוספה כבר בשדרוג שקדם למנגנון הגרסאות
+        conn.execute("ALTER TABLE tenders ADD COLUMN content_hash TEXT")
+        for _ in range(2):
+            conn.execute(
+                "INSERT INTO tenders (external_id, title, publisher, source, publish_date) "
+                "VALUES ('7', 'מכרז נגרות ישן', 'עירייה', 'govi.co.il', '05/01/2025')"
+            )
+        conn.commit()
+        conn.close()
+        
+        db = self.models.initialize_database(legacy_path, DATABASE_DIR / "schema.sql")
+        rows = db.execute("SELECT publish_ts FROM tenders")
+        self.assertEqual([row['publish_ts'] for row in rows], [1736035200])
+        self.assertEqual(len(self.models.TenderModel(db).search('נגרות')), 1)
+        db.close_all()
+    
+    def test_split_statements_keeps_triggers(self):
+        """בדיקה שפירוק הסקריפט שומר טריגר שלם כפקודה אחת"""
+        migrations = self.schema_migrations.load_migrations(DATABASE_DIR / "schema.sql")
+        fts_migration = next(m for m in migrations if m.name == 'fulltext_search')
+        sql = self.schema_migrations.read_migration(fts_migration)
+        statements = self.schema_migrations.split_statements(sql)
+        
+        self.assertEqual(len(statements), 5)
+        self.assertTrue(statements[1].rstrip(';').endswith('END'))
+        self.assertFalse(self.schema_migrations.is_d1_compatible(sql))
+
+class QueryStatsTest(ModelsTestCase):
+    """בדיקות למדידת זמני השאילתות"""
+    
+    def test_stats_grouped_by_normalized_query(self):
+        """בדיקה ששאילתות זהות עם ערכים שונים נצברות תחת אותו מפתח"""
+        stats = self.db.enable_stats(slow_query_ms=10000)
+        tender_model = self.models.TenderModel(self.db)
+        tender_model.bulk_upsert([self.make_tender(str(i)) for i in range(5)])
+        
+        for tender_id in (1, 2, 3):
+            self.db.execute(f"SELECT * FROM tenders WHERE id = {tender_id}")
+        
+        report = {item['query']: item for item in stats.report()}
+        self.assertEqual(report["SELECT * FROM tenders WHERE id = ?"]['count'], 3)
+        self.assertEqual(report["SELECT * FROM tenders WHERE id = ?"]['rows'], 3)
+        self.assertTrue(any(query.startswith("INSERT INTO tenders") for query in report))
+        self.assertEqual(stats.slow_queries, [])
+    
+    def test_slow_query_captures_plan(self):
+        """בדיקה ששאילתה מעל הסף נרשמת עם תוכנית הביצוע שלה"""
+        stats = self.db.enable_stats(slow_query_ms=0)
+        self.db.execute("SELECT id FROM tenders WHERE source = ? AND external_id = ?", ('mr.gov.il', '1'))
+        
+        slow_query = stats.slow_queries[-1]
+        self.assertIn("tenders", slow_query['query'])
+        self.assertTrue(any(step.startswith("SEARCH tenders") for step in slow_query['plan']))
+        
+        stats_path = os.path.join(self.temp_dir.name, 'query_stats.json')
+        stats.dump(stats_path)
+        with open(stats_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(json.load(f)['slow_queries']), len(stats.slow_queries))
+
 def run_tests():
     """הפעלת כל הבדיקות"""
     logger.info("מתחיל בדיקות למערכת בסיס הנתונים")
     
     # הפעלת הבדיקות
-    test_suite = unittest.TestLoader().loadTestsFromTestCase(TenderDatabaseTest)
+    loader = unittest.TestLoader()
+    test_suite = unittest.TestSuite([
+        loader.loadTestsFromTestCase(TenderDatabaseTest),
+        loader.loadTestsFromTestCase(DatabaseConnectionTest),
+        loader.loadTestsFromTestCase(TenderIngestTest),
+        loader.loadTestsFromTestCase(TenderSearchTest),
+        loader.loadTestsFromTestCase(TenderPaginationTest),
+        loader.loadTestsFromTestCase(TenderDatesTest),
+        loader.loadTestsFromTestCase(TenderRelationsTest),
+        loader.loadTestsFromTestCase(CategoryCacheTest),
+        loader.loadTestsFromTestCase(TenderListingTest),
+        loader.loadTestsFromTestCase(TenderArchiveTest),
+        loader.loadTestsFromTestCase(StreamingQueryTest),
+        loader.loadTestsFromTestCase(TenderFacetsTest),
+        loader.loadTestsFromTestCase(TenderRecordTest),
+        loader.loadTestsFromTestCase(QueryCacheTest),
+        loader.loadTestsFromTestCase(ApiServerTest),
+        loader.loadTestsFromTestCase(StaticShardsTest),
+        loader.loadTestsFromTestCase(NearDuplicateTest),
+        loader.loadTestsFromTestCase(SchemaMigrationTest),
+        loader.loadTestsFromTestCase(QueryStatsTest)
+    ])
     test_result = unittest.TextTestRunner(verbosity=2).run(test_suite)
     
     # סיכום תוצאות הבדיקות